@@ -18,24 +18,15 @@ def audit_data():
     print("\n--- 1. AUDITORÍA DE DATOS ---")
     storage = DataStorage()
     df = storage.load_ohlcv("BTC/USDT", "1h")
-    
-    # Order and duplicates
-    is_ordered = df.index.is_monotonic_increasing
-    duplicates = df.index.duplicated().sum()
-    
-    # Gaps
-    diffs = pd.Series(df.index).diff().dropna()
-    expected_diff = pd.Timedelta(hours=1)
-    gaps = (diffs != expected_diff).sum()
+    audit = storage.audit("BTC/USDT", "1h")
     
     print(f"Total filas: {len(df)}")
-    print(f"Orden cronológico: {'OK' if is_ordered else 'FALLA'}")
-    print(f"Duplicados: {duplicates}")
-    print(f"Huecos detectados (gaps > 1h): {gaps}")
+    print(f"Orden cronológico: {'OK' if audit['is_ordered'] else 'FALLA'}")
+    print(f"Duplicados: {audit['duplicates']}")
+    print(f"Huecos detectados (gaps > 1h): {audit['gaps']}")
     
-    if gaps > 0:
-        biggest_gap = diffs.max()
-        print(f"Mayor hueco: {biggest_gap}")
+    if audit['gaps'] > 0:
+        print(f"Mayor hueco: {audit['biggest_gap']}")
 
 def audit_strategy_execution_bug():
     print("\n--- 2. AUDITORÍA DE EJECUCIÓN (RSI vs SMA) ---")
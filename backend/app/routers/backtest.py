@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException
-from ..schemas import BacktestRequest, BacktestResult, SignalInfo, AuditReport, RegimeStat
+from fastapi.responses import StreamingResponse
+from ..schemas import (BacktestRequest, BacktestResult, SignalInfo, AuditReport, RegimeStat,
+                       BatchBacktestRequest, BatchBacktestResult, BatchRunMetrics, SweepRequest,
+                       WalkForwardRequest, WalkForwardResult, WalkForwardWindowInfo, MonteCarloSummary,
+                       PortfolioBacktestRequest, PortfolioBacktestResult, PortfolioSymbolStat,
+                       IncrementalBacktestRequest, IncrementalBacktestResult,
+                       StreamingBacktestRequest, StreamingBacktestResult,
+                       TimeTravelRequest, TimeTravelRunInfo, AccountState)
 import sys
 from pathlib import Path
 import traceback
+import json
 import pandas as pd
 import numpy as np
 from scipy import stats
@@ -15,12 +23,46 @@ if str(ROOT_DIR) not in sys.path:
 from core.data.storage import DataStorage
 from core.strategies.factory import StrategyFactory
 from core.execution.simulated_broker import SimulatedBroker
-from core.core.models import Order, Side, OrderType, Position
+from core.execution import array_engine, batch_engine, sweep, walk_forward, portfolio, incremental, streaming, snapshots, exits
+from core.core.models import Side
 from core.analysis.metrics import PerformanceMetrics
+from core.analysis.stability import StabilityAnalysis
+from core.analysis.monte_carlo import MonteCarlo
+from core.analysis.indicator_cache import indicator_cache
+from core.utils.sim_logging import current_stats, quiet_simulation
 from core.constants import MARKET_SCENARIOS
+from core.config import settings
 
 router = APIRouter()
 
+# Monte Carlo paths per /run (seeded so repeated runs report the same bands)
+MC_PATHS = 5000
+MC_SEED = 42
+
+def _load_frame(symbol, timeframe, scenario_id=None):
+    """Loads OHLCV for the scenario date range (filtered while reading)."""
+    storage = DataStorage()
+    start = end = None
+    if scenario_id:
+        sc = next((s for s in MARKET_SCENARIOS if s["id"] == scenario_id), None)
+        if sc:
+            start, end = sc["start"], sc["end"]
+
+    df = storage.load_ohlcv(symbol, timeframe, start=start, end=end)
+    if df.empty:
+        if start is None or storage.dataset_source(symbol, "1h") is None:
+            raise HTTPException(404, "Data not found.")
+        raise HTTPException(400, "Dataset empty after range filter.")
+    return df
+
+def _audit_report(symbol, timeframe, df):
+    """Data-quality audit of the loaded range, from the dataset's ingest-time index."""
+    audit = DataStorage().audit(symbol, timeframe, df.index[0], df.index[-1])
+    if audit is None:
+        return AuditReport(is_ordered=True, duplicates=0, gaps=0, biggest_gap="0")
+    return AuditReport(**audit)
+
+@quiet_simulation()
 def _simple_backtest(df, strategy_id, params, initial_capital):
     """Bypass for stress and stability checks."""
     strategy = StrategyFactory.get_strategy(strategy_id, params)
@@ -37,205 +79,118 @@ def _simple_backtest(df, strategy_id, params, initial_capital):
         if prev_sig == 1 and amt <= 1e-9:
             qty = (broker.cash * 0.98) / price
             if qty > 0:
-                o = Order(symbol=sym, side=Side.BUY, type=OrderType.MARKET, amount=qty, price=price)
-                broker.create_order(o)
-                broker._execute_fill(o, price, ts)
+                broker.fill_market(sym, Side.BUY, qty, price, ts)
         elif prev_sig == -1 and amt > 1e-9:
-            o = Order(symbol=sym, side=Side.SELL, type=OrderType.MARKET, amount=amt, price=price)
-            broker.create_order(o)
-            broker._execute_fill(o, price, ts)
+            broker.fill_market(sym, Side.SELL, amt, price, ts)
         prev_sig = int(row.get('signal', 0))
         p_pos = broker.get_positions().get(sym)
         p_amt = float(p_pos.amount) if p_pos else 0.0
         equity.append(broker.cash + (p_amt * price))
     return equity
 
-@router.post("/run", response_model=BacktestResult)
-def run_backtest(req: BacktestRequest):
-    try:
-        # 1. Load Data
-        storage = DataStorage()
-        df = storage.load_ohlcv(req.symbol, req.timeframe)
-        if df.empty: raise HTTPException(404, "Data not found.")
-
-        # 2. Scenario Filtering
-        if req.scenario_id:
-            sc = next((s for s in MARKET_SCENARIOS if s["id"] == req.scenario_id), None)
-            if sc:
-                df = df[(df.index >= pd.to_datetime(sc["start"]).tz_localize(None)) & 
-                        (df.index <= pd.to_datetime(sc["end"]).tz_localize(None))]
-        
-        if df.empty: raise HTTPException(400, "Dataset empty after range filter.")
+def _exit_rule(req):
+    return exits.ExitRule(req.tp_type, req.tp_value, req.sl_type, req.sl_value,
+                          req.trail_type, req.trail_value, req.time_stop_bars)
 
-        # 3. Ultimate Execution Loop (T+1)
-        strategy = StrategyFactory.get_strategy(req.strategy_name, req.params)
-        df_signals = strategy.generate_signals(df)
-        
-        # Ensure we have High/Low for TP/SL
-        if 'high' not in df_signals.columns: df_signals['high'] = df_signals['close']
-        if 'low' not in df_signals.columns: df_signals['low'] = df_signals['close']
+def _risk_kwargs(req):
+    """Risk-exit keyword arguments of the array and batch engines."""
+    return dict(tp_type=req.tp_type, tp_value=req.tp_value, sl_type=req.sl_type, sl_value=req.sl_value,
+                trail_type=req.trail_type, trail_value=req.trail_value, time_stop=req.time_stop_bars)
 
-        broker = SimulatedBroker(initial_capital=req.initial_capital)
-        equity_history = []
-        signals_log = []
-        prev_hold_signal = 0
+def _execute_reference(df_signals, req):
+    """Reference per-candle loop through SimulatedBroker. Slow, kept to validate the array engine."""
+    broker = SimulatedBroker(initial_capital=req.initial_capital)
+    equity_history = []
+    signals_log = []
+    prev_hold_signal = 0
+    
+    # Advanced Metrics State
+    candles_in_market = 0
+    candles_in_loss = 0
+    max_latent_dd = 0.0
+    trade_durations = []
+    current_trade_start = None
+    max_locked_capital = 0.0
+    
+    # Risk exits (TP/SL, trailing stop, time stop)
+    rule = _exit_rule(req)
+    peak = 0.0 # Highest high since entry, before the current bar
+    entry_bar = 0
+    
+    for i, (ts, row) in enumerate(df_signals.iterrows()):
+        price = float(row['close'])
+        high = float(row['high'])
+        low = float(row['low'])
         
-        # Advanced Metrics State
-        candles_in_market = 0
-        candles_in_loss = 0
-        total_candles = len(df_signals)
-        max_latent_dd = 0.0
-        trade_durations = []
-        current_trade_start = None
-        max_locked_capital = 0.0
+        # Update Broker (Mark to Market)
+        broker.process_data_event(req.symbol, price, ts)
         
-        # TP/SL Configuration
-        use_tp = req.tp_type in ["percent", "absolute"] and req.tp_value is not None
-        use_sl = req.sl_type in ["percent", "absolute"] and req.sl_value is not None
+        p_curr = broker.get_positions().get(req.symbol)
+        amt = float(p_curr.amount) if p_curr else 0.0
         
-        for ts, row in df_signals.iterrows():
-            price = float(row['close'])
-            high = float(row['high'])
-            low = float(row['low'])
-            
-            # Update Broker (Mark to Market)
-            broker.process_data_event(req.symbol, price, ts)
-            
-            p_curr = broker.get_positions().get(req.symbol)
-            amt = float(p_curr.amount) if p_curr else 0.0
-            
-            # --- 1. CHECK TP/SL for EXISTING Positions (Intra-bar) ---
-            if amt > 1e-9:
-                entry_price = p_curr.average_entry_price
-                sl_hit = False
-                tp_hit = False
-                exit_price = price
+        # --- 1. CHECK RISK EXITS for EXISTING Positions (Intra-bar) ---
+        if amt > 1e-9:
+            hit = rule.check_bar(p_curr.average_entry_price, peak, i - entry_bar, high, low, price)
+            if hit is None:
+                peak = max(peak, high)
+            else:
+                trigger_type = exits.EXIT_TRIGGERS[hit[0]]
+                exit_price = hit[1]
                 
-                # STOP LOSS Logic
-                sl_price = -1.0
-                if use_sl:
-                    if req.sl_type == "percent":
-                        sl_price = entry_price * (1 - req.sl_value / 100)
-                    else:
-                        sl_price = req.sl_value # Absolute price
-                    
-                    if low <= sl_price:
-                        sl_hit = True
-                        exit_price = sl_price # Optimistic: Exit at SL. Realistically: slippage.
-                        # Conflict Resolution: If Low < SL, we assume hit.
+                # Snapshot BEFORE
+                cash_before = broker.cash
+                pos_before = amt
                 
-                # TAKE PROFIT Logic
-                tp_price = 1e9
-                if use_tp:
-                    if req.tp_type == "percent":
-                        tp_price = entry_price * (1 + req.tp_value / 100)
-                    else:
-                        tp_price = req.tp_value
-                    
-                    if high >= tp_price:
-                        tp_hit = True
-                        # Conflict: If both hit, Worst Case -> SL first? 
-                        # Or checking Open? 
-                        # Rule: "Peor caso" -> SL Hit overrides TP if both in same candle
-                        if not sl_hit:
-                            exit_price = tp_price
+                fill = broker.fill_market(req.symbol, Side.SELL, amt, exit_price, ts)
                 
-                # Execute TP/SL
-                if sl_hit or (tp_hit and not sl_hit):
-                    trigger_type = "STOP_LOSS" if sl_hit else "TAKE_PROFIT"
-                    
-                    # Snapshot BEFORE
-                    cash_before = broker.cash
-                    pos_before = amt
-                    
-                    o = Order(symbol=req.symbol, side=Side.SELL, type=OrderType.MARKET, amount=amt, price=exit_price)
-                    broker.create_order(o)
-                    fill = broker._execute_fill(o, exit_price, ts)
-                    
-                    # Snapshot AFTER
-                    cash_after = broker.cash
-                    p_new = broker.get_positions().get(req.symbol)
-                    pos_after = float(p_new.amount) if p_new else 0.0
-                    equity_after = cash_after + (pos_after * exit_price)
-                    
-                    commission = fill.commission if fill else 0.0
-                    cost = fill.cost if fill else 0.0
-                    
-                    signals_log.append(SignalInfo(
-                        timestamp=str(ts), 
-                        side=trigger_type, 
-                        price=exit_price,
-                        trigger=trigger_type,
-                        amount=amt,
-                        cost=cost,
-                        commission=commission,
-                        cash_before=cash_before,
-                        cash_after=cash_after,
-                        pos_before=pos_before,
-                        pos_after=pos_after,
-                        equity_after=equity_after,
-                        rule=f"Hit {trigger_type} at {exit_price:.2f}"
-                    ))
-                    
-                    amt = 0.0 # Position closed
-                    
-                    # Log duration
-                    if current_trade_start:
-                        trade_durations.append((ts - current_trade_start).total_seconds() / 3600) # hours
-                        current_trade_start = None
-
-            # --- 2. EXECUTE STRATEGY SIGNALS (Close of Bar) ---
-            # Re-fetch position in case TP/SL closed it
-            p_curr = broker.get_positions().get(req.symbol)
-            amt = float(p_curr.amount) if p_curr else 0.0
-            
-            # Extract indicators for context
-            indicators = {k: v for k, v in row.items() if k not in ['open', 'high', 'low', 'close', 'volume', 'signal'] and isinstance(v, (int, float))}
-            
-            if prev_hold_signal == 1 and amt <= 1e-9:
-                qty = (broker.cash * 0.98) / price
-                if qty > 0:
-                    # Snapshot BEFORE
-                    cash_before = broker.cash
-                    pos_before = amt
-                    
-                    order = Order(symbol=req.symbol, side=Side.BUY, type=OrderType.MARKET, amount=qty, price=price)
-                    broker.create_order(order)
-                    fill = broker._execute_fill(order, price, ts)
-                    
-                    # Snapshot AFTER
-                    cash_after = broker.cash
-                    p_new = broker.get_positions().get(req.symbol)
-                    pos_after = float(p_new.amount) if p_new else 0.0
-                    equity_after = cash_after + (pos_after * price)
-                    
-                    signals_log.append(SignalInfo(
-                        timestamp=str(ts), 
-                        side="BUY", 
-                        price=price,
-                        trigger="SIGNAL_ENTRY",
-                        amount=qty,
-                        cost=fill.cost if fill else 0.0,
-                        commission=fill.commission if fill else 0.0,
-                        cash_before=cash_before,
-                        cash_after=cash_after,
-                        pos_before=pos_before,
-                        pos_after=pos_after,
-                        equity_after=equity_after,
-                        signal_raw=1,
-                        indicators=indicators,
-                        rule="Strategy Signal: Entry"
-                    ))
-                    current_trade_start = ts
-            
-            elif prev_hold_signal == -1 and amt > 1e-9:
+                # Snapshot AFTER
+                cash_after = broker.cash
+                p_new = broker.get_positions().get(req.symbol)
+                pos_after = float(p_new.amount) if p_new else 0.0
+                equity_after = cash_after + (pos_after * exit_price)
+                
+                commission = fill.fee if fill else 0.0
+                cost = fill.cost if fill else 0.0
+                
+                signals_log.append(SignalInfo(
+                    timestamp=str(ts), 
+                    side=trigger_type, 
+                    price=exit_price,
+                    trigger=trigger_type,
+                    amount=amt,
+                    cost=cost,
+                    commission=commission,
+                    cash_before=cash_before,
+                    cash_after=cash_after,
+                    pos_before=pos_before,
+                    pos_after=pos_after,
+                    equity_after=equity_after,
+                    rule=f"Hit {trigger_type} at {exit_price:.2f}"
+                ))
+                
+                amt = 0.0 # Position closed
+                
+                # Log duration
+                if current_trade_start:
+                    trade_durations.append((ts - current_trade_start).total_seconds() / 3600) # hours
+                    current_trade_start = None
+
+        # --- 2. EXECUTE STRATEGY SIGNALS (Close of Bar) ---
+        # Re-fetch position in case TP/SL closed it
+        p_curr = broker.get_positions().get(req.symbol)
+        amt = float(p_curr.amount) if p_curr else 0.0
+        
+        # Extract indicators for context
+        indicators = {k: v for k, v in row.items() if k not in ['open', 'high', 'low', 'close', 'volume', 'signal'] and isinstance(v, (int, float))}
+        
+        if prev_hold_signal == 1 and amt <= 1e-9:
+            qty = (broker.cash * 0.98) / price
+            if qty > 0:
                 # Snapshot BEFORE
                 cash_before = broker.cash
                 pos_before = amt
                 
-                order = Order(symbol=req.symbol, side=Side.SELL, type=OrderType.MARKET, amount=amt, price=price)
-                broker.create_order(order)
-                fill = broker._execute_fill(order, price, ts)
+                fill = broker.fill_market(req.symbol, Side.BUY, qty, price, ts)
                 
                 # Snapshot AFTER
                 cash_after = broker.cash
@@ -245,52 +200,191 @@ def run_backtest(req: BacktestRequest):
                 
                 signals_log.append(SignalInfo(
                     timestamp=str(ts), 
-                    side="SELL", 
+                    side="BUY", 
                     price=price,
-                    trigger="SIGNAL_EXIT",
-                    amount=amt,
+                    trigger="SIGNAL_ENTRY",
+                    amount=qty,
                     cost=fill.cost if fill else 0.0,
-                    commission=fill.commission if fill else 0.0,
+                    commission=fill.fee if fill else 0.0,
                     cash_before=cash_before,
                     cash_after=cash_after,
                     pos_before=pos_before,
                     pos_after=pos_after,
                     equity_after=equity_after,
-                    signal_raw=-1,
+                    signal_raw=1,
                     indicators=indicators,
-                    rule="Strategy Signal: Exit"
+                    rule="Strategy Signal: Entry"
                 ))
-                
-                if current_trade_start:
-                    trade_durations.append((ts - current_trade_start).total_seconds() / 3600)
-                    current_trade_start = None
+                current_trade_start = ts
+                peak, entry_bar = p_new.average_entry_price, i
+        
+        elif prev_hold_signal == -1 and amt > 1e-9:
+            # Snapshot BEFORE
+            cash_before = broker.cash
+            pos_before = amt
+            
+            fill = broker.fill_market(req.symbol, Side.SELL, amt, price, ts)
             
-            # --- 3. METRICS UPDATE ---
-            prev_hold_signal = int(row.get('signal', 0))
+            # Snapshot AFTER
+            cash_after = broker.cash
+            p_new = broker.get_positions().get(req.symbol)
+            pos_after = float(p_new.amount) if p_new else 0.0
+            equity_after = cash_after + (pos_after * price)
             
-            p_post = broker.get_positions().get(req.symbol)
-            a_post = float(p_post.amount) if p_post else 0.0
-            curr_equity = broker.cash + (a_post * price)
-            equity_history.append(curr_equity)
+            signals_log.append(SignalInfo(
+                timestamp=str(ts), 
+                side="SELL", 
+                price=price,
+                trigger="SIGNAL_EXIT",
+                amount=amt,
+                cost=fill.cost if fill else 0.0,
+                commission=fill.fee if fill else 0.0,
+                cash_before=cash_before,
+                cash_after=cash_after,
+                pos_before=pos_before,
+                pos_after=pos_after,
+                equity_after=equity_after,
+                signal_raw=-1,
+                indicators=indicators,
+                rule="Strategy Signal: Exit"
+            ))
             
-            if a_post > 0:
-                candles_in_market += 1
-                max_locked_capital = max(max_locked_capital, a_post * price)
-                # Latent Drawdown
-                open_pnl_pct = (price - p_post.average_entry_price) / p_post.average_entry_price
-                if open_pnl_pct < 0:
-                    candles_in_loss += 1
-                    max_latent_dd = min(max_latent_dd, open_pnl_pct)
+            if current_trade_start:
+                trade_durations.append((ts - current_trade_start).total_seconds() / 3600)
+                current_trade_start = None
+        
+        # --- 3. METRICS UPDATE ---
+        prev_hold_signal = int(row.get('signal', 0))
+        
+        p_post = broker.get_positions().get(req.symbol)
+        a_post = float(p_post.amount) if p_post else 0.0
+        curr_equity = broker.cash + (a_post * price)
+        equity_history.append(curr_equity)
+        
+        if a_post > 0:
+            candles_in_market += 1
+            max_locked_capital = max(max_locked_capital, a_post * price)
+            # Latent Drawdown
+            open_pnl_pct = (price - p_post.average_entry_price) / p_post.average_entry_price
+            if open_pnl_pct < 0:
+                candles_in_loss += 1
+                max_latent_dd = min(max_latent_dd, open_pnl_pct)
+
+    stats = {
+        "candles_in_market": candles_in_market,
+        "candles_in_loss": candles_in_loss,
+        "max_latent_dd": max_latent_dd,
+        "trade_durations": trade_durations,
+        "max_locked_capital": max_locked_capital,
+    }
+    return equity_history, signals_log, len(broker.trades), stats
+
+def _execute_array(df_signals, req):
+    """Default execution path: the array kernel, producing the same outputs as the reference loop."""
+    run = array_engine.simulate(
+        df_signals['close'].to_numpy(), df_signals['high'].to_numpy(), df_signals['low'].to_numpy(),
+        df_signals['signal'].to_numpy() if 'signal' in df_signals.columns else np.zeros(len(df_signals)),
+        initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+        timestamps=df_signals.index.to_numpy(dtype="datetime64[ns]").astype(np.int64), **_risk_kwargs(req)
+    )
+
+    # Indicator context only for strategy-driven fills
+    ctx_cols = [c for c in df_signals.columns
+                if c not in ['open', 'high', 'low', 'close', 'volume', 'signal']
+                and pd.api.types.is_numeric_dtype(df_signals[c]) and not pd.api.types.is_bool_dtype(df_signals[c])]
+    ctx_values = df_signals[ctx_cols].to_numpy(dtype=float) if ctx_cols else None
+    index = df_signals.index
+
+    signals_log = []
+    for f in run.fills:
+        ts = index[f.bar]
+        equity_after = f.cash_after + (f.pos_after * f.price)
+        if f.kind in exits.EXIT_TRIGGERS:
+            trigger_type = exits.EXIT_TRIGGERS[f.kind]
+            signals_log.append(SignalInfo(
+                timestamp=str(ts), side=trigger_type, price=f.price, trigger=trigger_type,
+                amount=f.amount, cost=f.cost, commission=f.fee,
+                cash_before=f.cash_before, cash_after=f.cash_after,
+                pos_before=f.pos_before, pos_after=f.pos_after, equity_after=equity_after,
+                rule=f"Hit {trigger_type} at {f.price:.2f}"
+            ))
+            continue
+        indicators = dict(zip(ctx_cols, ctx_values[f.bar].tolist())) if ctx_values is not None else {}
+        is_entry = f.kind == array_engine.KIND_ENTRY
+        signals_log.append(SignalInfo(
+            timestamp=str(ts), side="BUY" if is_entry else "SELL", price=f.price,
+            trigger="SIGNAL_ENTRY" if is_entry else "SIGNAL_EXIT",
+            amount=f.amount, cost=f.cost, commission=f.fee,
+            cash_before=f.cash_before, cash_after=f.cash_after,
+            pos_before=f.pos_before, pos_after=f.pos_after, equity_after=equity_after,
+            signal_raw=1 if is_entry else -1, indicators=indicators,
+            rule="Strategy Signal: Entry" if is_entry else "Strategy Signal: Exit"
+        ))
+
+    stats = {
+        "candles_in_market": run.candles_in_market,
+        "candles_in_loss": run.candles_in_loss,
+        "max_latent_dd": run.max_latent_dd,
+        "trade_durations": run.trade_durations,
+        "max_locked_capital": run.max_locked_capital,
+    }
+    return run.equity.tolist(), signals_log, len(run.fills), stats
+
+def _trade_factors(signals_log):
+    """Equity factor of each round trip: cash after the exit / cash before the entry."""
+    factors, cash_in = [], None
+    for s in signals_log:
+        if s.side == "BUY":
+            cash_in = s.cash_before
+        elif cash_in and s.pos_after <= 1e-9:
+            factors.append(s.cash_after / cash_in)
+            cash_in = None
+    return factors
+
+@router.post("/run", response_model=BacktestResult)
+@quiet_simulation("backtest")
+def run_backtest(req: BacktestRequest):
+    try:
+        # 1-2. Load Data + Scenario Filtering
+        df = _load_frame(req.symbol, req.timeframe, req.scenario_id)
+
+        # 3. Ultimate Execution Loop (T+1)
+        strategy = StrategyFactory.get_strategy(req.strategy_name, req.params)
+        df_signals = strategy.generate_signals(df)
+        
+        # Ensure we have High/Low for TP/SL
+        if 'high' not in df_signals.columns: df_signals['high'] = df_signals['close']
+        if 'low' not in df_signals.columns: df_signals['low'] = df_signals['close']
+
+        if req.engine == "reference":
+            equity_history, signals_log, total_trades, run_stats = _execute_reference(df_signals, req)
+        else:
+            equity_history, signals_log, total_trades, run_stats = _execute_array(df_signals, req)
+
+        candles_in_market = run_stats["candles_in_market"]
+        candles_in_loss = run_stats["candles_in_loss"]
+        total_candles = len(df_signals)
+        max_latent_dd = run_stats["max_latent_dd"]
+        trade_durations = run_stats["trade_durations"]
+        max_locked_capital = run_stats["max_locked_capital"]
 
         # 4. Truth Engine Calculations
         equity_series = pd.Series(equity_history, index=df.index)
         main_returns = equity_series.pct_change().fillna(0)
         market_returns = df['close'].pct_change().fillna(0)
         
-        # Stability (Sensitivity Analysis) - SIMPLIFIED for speed/compatibility
-        stability_var = 0.0
-        # ... skipped complex stability logic repetition for brevity, keeping simple variance ...
+        # Stability (Sensitivity Analysis): return dispersion across ±10% parameter neighbors
+        stability_var = StabilityAnalysis.variance(
+            df, req.strategy_name, req.params, pct=10.0, budget_s=1.0,
+            initial_capital=req.initial_capital, fee=settings.TAKER_FEE, **_risk_kwargs(req)
+        )
         
+        # Monte Carlo: trade-order reshuffle and stationary block bootstrap of bar returns
+        mc_trades = MonteCarlo.trade_reshuffle(_trade_factors(signals_log), req.initial_capital,
+                                               n_paths=MC_PATHS, seed=MC_SEED)
+        mc_block = MonteCarlo.block_bootstrap(main_returns.to_numpy()[1:], req.initial_capital,
+                                              n_paths=MC_PATHS, seed=MC_SEED)
+
         # Inaction (Defensive Alpha)
         idle_mask = (main_returns.abs() < 1e-10)
         inaction_alpha = -market_returns[idle_mask].sum() * 100
@@ -358,16 +452,19 @@ def run_backtest(req: BacktestRequest):
             max_drawdown=float(metrics.get("Max Drawdown %", 0.0)),
             sharpe_ratio=float(metrics.get("Sharpe Ratio", 0.0)),
             final_equity=float(equity_history[-1]),
-            total_trades=len(broker.trades),
+            total_trades=total_trades,
             benchmark_return=float(metrics.get("Benchmark Return %", 0.0)),
             equity_curve=[float(x) for x in equity_history],
             benchmark_curve=[float((p/df['close'].iloc[0])*req.initial_capital) for p in df['close']],
             drawdown_curve=[float(x) for x in drawdown_series],
             signals=signals_log, regime_stats=reg_stats,
-            audit=AuditReport(is_ordered=True, duplicates=0, gaps=0, biggest_gap="0"),
+            audit=_audit_report(req.symbol, req.timeframe, df),
             p_value=float(p_val), is_significant=bool(p_val < 0.05),
             stability_variance=float(stability_var), inaction_value=float(inaction_alpha),
-            monte_carlo_runs=[equity_history[-1] * (0.85 + np.random.random()*0.3) for _ in range(50)],
+            monte_carlo_runs=[float(x) for x in mc_block.final_equity[:50]],
+            monte_carlo=MonteCarloSummary(n_paths=MC_PATHS, seed=MC_SEED, trade_reshuffle=mc_trades.bands(),
+                                          block_bootstrap=mc_block.bands()),
+            sim_stats=current_stats().summary(),
             research_conclusion=conclusion, stress_moment_explanation=stress_msg,
             summary_text="Diagnóstico Estructural Finalizado.",
             risk_assessment="Fragilidad Extrema" if stability_var > 25 else "Consistente" if p_val < 0.05 else "Inconcluyente",
@@ -380,6 +477,278 @@ def run_backtest(req: BacktestRequest):
             max_money_at_risk=float(max_locked_capital)
         )
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.get("/indicator_cache")
+def get_indicator_cache_stats():
+    return indicator_cache.stats()
+
+@router.post("/batch", response_model=BatchBacktestResult)
+def run_batch_backtest(req: BatchBacktestRequest):
+    """Evaluates many parameter sets of one strategy in a single vectorized pass."""
+    try:
+        df = _load_frame(req.symbol, req.timeframe, req.scenario_id)
+        param_sets = list(req.param_sets or [])
+        if req.param_grid:
+            param_sets += batch_engine.expand_grid(req.param_grid)
+        if not param_sets:
+            raise HTTPException(400, "No parameter sets provided.")
+
+        run = batch_engine.run_batch(
+            df, req.strategy_name, param_sets,
+            initial_capital=req.initial_capital, fee=settings.TAKER_FEE, **_risk_kwargs(req)
+        )
+        return BatchBacktestResult(strategy_name=req.strategy_name, results=_batch_rows(param_sets, run))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.post("/sweep")
+def run_sweep(req: SweepRequest):
+    """
+    Parameter sweep across a process pool. OHLCV is published once through shared memory;
+    results stream back as NDJSON lines (one BatchRunMetrics per set) as each chunk completes.
+    Failures after the stream has started end it with an {"error": ...} line.
+    """
+    try:
+        df = _load_frame(req.symbol, req.timeframe, req.scenario_id)
+        param_sets = list(req.param_sets or [])
+        if req.param_grid:
+            param_sets += batch_engine.expand_grid(req.param_grid)
+        if not param_sets:
+            raise HTTPException(400, "No parameter sets provided.")
+
+        sim_kwargs = dict(initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+                          **_risk_kwargs(req))
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+    def stream():
+        try:
+            for chunk, run in sweep.iter_sweep(df, req.strategy_name, param_sets,
+                                               max_workers=req.max_workers, chunk_size=req.chunk_size, **sim_kwargs):
+                for row in _batch_rows(chunk, run):
+                    yield row.model_dump_json() + "\n"
+        except Exception as e:
+            traceback.print_exc()
+            yield json.dumps({"error": f"Engine Failure: {str(e)}"}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.post("/portfolio", response_model=PortfolioBacktestResult)
+def run_portfolio_backtest(req: PortfolioBacktestRequest):
+    """One strategy over several symbols sharing a single broker and cash balance."""
+    try:
+        symbols = list(dict.fromkeys(req.symbols))
+        if not symbols:
+            raise HTTPException(400, "No symbols provided.")
+        frames = {sym: _load_frame(sym, req.timeframe, req.scenario_id) for sym in symbols}
+
+        run = portfolio.run_portfolio(frames, req.strategy_name, req.params,
+                                      initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+                                      max_weight=req.max_weight)
+        metrics = PerformanceMetrics.calculate(pd.Series(run.equity, index=run.index))
+        return PortfolioBacktestResult(
+            strategy_name=req.strategy_name,
+            symbols=run.symbols,
+            metrics=metrics,
+            timestamps=[str(ts) for ts in run.index],
+            equity_curve=[float(x) for x in run.equity],
+            total_trades=len(run.ledger),
+            sim_stats=run.stats,
+            per_symbol=[PortfolioSymbolStat(**row) for row in run.per_symbol().to_dict("records")]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.post("/incremental", response_model=IncrementalBacktestResult)
+def run_incremental_backtest(req: IncrementalBacktestRequest):
+    """
+    Full-history backtest that resumes from its last checkpoint and only simulates new bars;
+    a resume reads just the checkpoint's warm-up tail and the bars after it.
+    """
+    try:
+        storage = DataStorage()
+        def load(start):
+            if start is None:
+                return _load_frame(req.symbol, req.timeframe)
+            return storage.load_ohlcv(req.symbol, req.timeframe, start=start)
+
+        run = incremental.run_incremental(load, req.symbol, req.timeframe, req.strategy_name, req.params,
+                                          initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+                                          warmup_bars=req.warmup_bars)
+        if not run.bars:
+            raise HTTPException(404, "Data not found.")
+        # Buy & hold only needs the first and last close
+        benchmark = pd.Series([run.first_close, run.last_close])
+        metrics = PerformanceMetrics.calculate(pd.Series(run.equity, index=run.index), benchmark)
+        return IncrementalBacktestResult(
+            strategy_name=req.strategy_name,
+            metrics=metrics,
+            timestamps=[str(ts) for ts in run.index],
+            equity_curve=[float(x) for x in run.equity],
+            total_trades=len(run.ledger),
+            resumed_bars=run.resumed_bars,
+            new_bars=run.new_bars,
+            sim_stats=run.stats
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.post("/stream", response_model=StreamingBacktestResult)
+def run_streaming_backtest(req: StreamingBacktestRequest):
+    """Out-of-core backtest over the stored parquet; equity and trades are written under RUNS_DIR."""
+    try:
+        source = DataStorage().dataset_source(req.symbol, req.timeframe)
+        if source is None:
+            raise HTTPException(404, f"No stored {req.timeframe} data for {req.symbol}.")
+        key = incremental.checkpoint_key(req.symbol, req.timeframe, req.strategy_name, req.params,
+                                         req.initial_capital, settings.TAKER_FEE)
+        run = streaming.stream_backtest(source, req.strategy_name, req.params, settings.RUNS_DIR / key,
+                                        symbol=req.symbol, initial_capital=req.initial_capital,
+                                        fee=settings.TAKER_FEE, batch_size=req.batch_size,
+                                        warmup_bars=req.warmup_bars)
+        return StreamingBacktestResult(
+            strategy_name=req.strategy_name,
+            bars=run.bars,
+            metrics=run.metrics,
+            total_trades=run.total_trades,
+            equity_path=str(run.equity_path),
+            trades_path=str(run.trades_path),
+            sim_stats=run.stats
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.post("/timetravel", response_model=TimeTravelRunInfo)
+def run_time_travel(req: TimeTravelRequest):
+    """
+    Runs the /run backtest (array engine, same risk exits) with periodic broker snapshots and
+    keeps it for /timetravel/{run_id}/state.
+    """
+    try:
+        if req.snapshot_every <= 0:
+            raise HTTPException(400, "snapshot_every must be positive.")
+        df = _load_frame(req.symbol, req.timeframe, req.scenario_id)
+        run = snapshots.run_with_snapshots(df, req.symbol, req.strategy_name, req.params,
+                                           initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+                                           every=req.snapshot_every, rule=_exit_rule(req))
+        snapshots.time_travel_runs.add(run)
+        return TimeTravelRunInfo(
+            run_id=run.run_id,
+            strategy_name=req.strategy_name,
+            bars=len(run.index),
+            snapshots=len(run.snapshots.bars),
+            total_trades=len(run.ledger),
+            first_timestamp=str(run.index[0]),
+            last_timestamp=str(run.index[-1]),
+            final_equity=float(run.equity[-1]),
+            sim_stats=run.stats
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+@router.get("/timetravel/{run_id}/state", response_model=AccountState)
+def get_time_travel_state(run_id: str, timestamp: str):
+    """Exact account state and indicator row at the close of the bar at/before `timestamp`."""
+    run = snapshots.time_travel_runs.get(run_id)
+    if run is None:
+        raise HTTPException(404, "Run not found (expired or never started).")
+    try:
+        ts = pd.Timestamp(timestamp)
+        state = run.state_at(ts.tz_convert(None) if ts.tz is not None else ts)
+    except (IndexError, ValueError) as e:
+        raise HTTPException(400, str(e))
+    trade = state["last_trade"]
+    return AccountState(
+        run_id=run_id,
+        **{k: v for k, v in state.items() if k not in ("timestamp", "last_trade", "indicators")},
+        timestamp=str(state["timestamp"]),
+        last_trade={"id": trade.id, "side": trade.side.value, "amount": trade.amount, "price": trade.price,
+                    "cost": trade.cost, "fee": trade.fee, "timestamp": str(trade.timestamp)} if trade else None,
+        indicators={k: (None if np.isnan(v) else v) for k, v in state["indicators"].items()}
+    )
+
+@router.post("/walk_forward", response_model=WalkForwardResult)
+def run_walk_forward(req: WalkForwardRequest):
+    """Rolling in-sample optimization / out-of-sample trading over the full local history."""
+    try:
+        df = _load_frame(req.symbol, req.timeframe)
+        param_sets = list(req.param_sets or [])
+        if req.param_grid:
+            param_sets += batch_engine.expand_grid(req.param_grid)
+        if not param_sets:
+            raise HTTPException(400, "No parameter sets provided.")
+
+        try:
+            wf = walk_forward.run_walk_forward(
+                df, req.strategy_name, param_sets,
+                train_bars=req.train_bars, test_bars=req.test_bars, step_bars=req.step_bars,
+                objective=req.objective, initial_capital=req.initial_capital, fee=settings.TAKER_FEE,
+                max_workers=req.max_workers, **_risk_kwargs(req)
+            )
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        if not wf.windows:
+            raise HTTPException(400, "Not enough data for a single train/test window.")
+
+        idx = df.index
+        return WalkForwardResult(
+            strategy_name=req.strategy_name,
+            windows=[WalkForwardWindowInfo(
+                train_start=str(idx[w.train_start]), train_end=str(idx[w.train_end - 1]),
+                test_start=str(idx[w.test_start]), test_end=str(idx[w.test_end - 1]),
+                params=w.params, train_score=float(w.train_score),
+                test_return=float(w.test_return), test_trades=w.test_trades
+            ) for w in wf.windows],
+            oos_timestamps=[str(ts) for ts in wf.oos_index],
+            oos_equity_curve=[float(x) for x in wf.oos_equity],
+            oos_total_return=float((wf.oos_equity[-1] / req.initial_capital - 1) * 100)
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(500, f"Engine Failure: {str(e)}")
+
+def _batch_rows(param_sets, run):
+    """Per-set metrics, rounded like PerformanceMetrics."""
+    def clean(v):
+        v = float(v)
+        return 0.0 if np.isnan(v) or np.isinf(v) else round(v, 2)
+    return [BatchRunMetrics(
+        params=p,
+        total_return=clean(run.total_return[j]),
+        max_drawdown=clean(run.max_drawdown[j]),
+        sharpe_ratio=clean(run.sharpe[j]),
+        final_equity=float(run.final_equity[j]),
+        total_trades=int(run.total_trades[j]),
+        time_in_market_pct=float(run.time_in_market_pct[j])
+    ) for j, p in enumerate(param_sets)]
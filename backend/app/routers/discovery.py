@@ -36,14 +36,7 @@ def get_discovery():
     
     # 3. Available Symbols
     storage = DataStorage()
-    files = list(storage.base_dir.glob("*.parquet"))
-    symbols = set()
-    for f in files:
-        name = f.stem
-        parts = name.split("_")
-        if len(parts) >= 2:
-            sym = f"{parts[0]}/{parts[1]}"
-            symbols.add(sym)
+    symbols = {symbol for symbol, _ in storage.list_datasets()}
     
     return DiscoveryResponse(
         scenarios=scenarios,
@@ -17,10 +17,9 @@ router = APIRouter()
 
 @router.get("/available", response_model=List[str])
 def list_available_data():
-    """Lists locally available parquet files."""
+    """Lists locally available datasets (named as their legacy parquet files)."""
     storage = DataStorage()
-    files = list(storage.base_dir.glob("*.parquet"))
-    return [f.name for f in files]
+    return [f"{symbol.replace('/', '_')}_{timeframe}.parquet" for symbol, timeframe in storage.list_datasets()]
 
 @router.post("/ingest")
 def ingest_data(symbol: str, timeframe: str, days: int):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 
 class StrategyParameter(BaseModel):
     name: str
@@ -35,7 +35,7 @@ class SignalInfo(BaseModel):
     side: str
     price: float
     # Audit Fields
-    trigger: str = "SIGNAL" # SIGNAL, STOP_LOSS, TAKE_PROFIT
+    trigger: str = "SIGNAL" # SIGNAL, STOP_LOSS, TAKE_PROFIT, TRAILING_STOP, TIME_STOP
     amount: float = 0.0
     cost: float = 0.0
     commission: float = 0.0
@@ -77,6 +77,19 @@ class BacktestRequest(BaseModel):
     tp_value: Optional[float] = None
     sl_type: Optional[str] = None # "percent", "absolute", "none"
     sl_value: Optional[float] = None
+    trail_type: Optional[str] = None # "percent", "absolute", "none" (distance below the highest high since entry)
+    trail_value: Optional[float] = None
+    time_stop_bars: Optional[int] = None # Exit at the close of the N-th bar after entry
+
+    # Execution engine: "array" (default) or "reference" (per-candle broker loop)
+    engine: Literal["array", "reference"] = "array"
+
+class MonteCarloSummary(BaseModel):
+    n_paths: int
+    seed: int
+    # Percentile bands: {"final_equity": {"p5": ..., "p50": ...}, "max_drawdown": {...}}
+    trade_reshuffle: Dict[str, Dict[str, float]] = {}
+    block_bootstrap: Dict[str, Dict[str, float]] = {}
 
 class BacktestResult(BaseModel):
     # Core Alpha
@@ -101,6 +114,8 @@ class BacktestResult(BaseModel):
     stability_variance: float
     inaction_value: float
     monte_carlo_runs: List[float]
+    monte_carlo: Optional[MonteCarloSummary] = None
+    sim_stats: Optional[Dict[str, Any]] = None # Broker/strategy counters of the run (orders, fills, rejects)
     
     # Narratives
     research_conclusion: str
@@ -115,3 +130,184 @@ class BacktestResult(BaseModel):
     avg_trade_duration_candles: float = 0.0
     realized_drawdown: float = 0.0 # From closed trades only
     max_money_at_risk: float = 0.0
+
+class BatchBacktestRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    strategy_name: str
+    # Explicit list of parameter dicts and/or a grid {name: [values]} expanded as a cartesian product
+    param_sets: Optional[List[Dict[str, Any]]] = None
+    param_grid: Optional[Dict[str, List[Any]]] = None
+    initial_capital: float = 10000.0
+    scenario_id: Optional[str] = None
+
+    tp_type: Optional[str] = None
+    tp_value: Optional[float] = None
+    sl_type: Optional[str] = None
+    sl_value: Optional[float] = None
+    trail_type: Optional[str] = None
+    trail_value: Optional[float] = None
+    time_stop_bars: Optional[int] = None
+
+class SweepRequest(BatchBacktestRequest):
+    max_workers: Optional[int] = None # Defaults to every core
+    chunk_size: Optional[int] = None # Parameter sets per task
+
+class BatchRunMetrics(BaseModel):
+    params: Dict[str, Any]
+    total_return: float
+    max_drawdown: float
+    sharpe_ratio: float
+    final_equity: float
+    total_trades: int
+    time_in_market_pct: float
+
+class BatchBacktestResult(BaseModel):
+    strategy_name: str
+    results: List[BatchRunMetrics]
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: List[str]
+    timeframe: str
+    strategy_name: str
+    params: Dict[str, Any] = {}
+    initial_capital: float = 10000.0
+    scenario_id: Optional[str] = None
+    max_weight: Optional[float] = None # Share of equity per entry; defaults to 1 / len(symbols)
+
+class PortfolioSymbolStat(BaseModel):
+    symbol: str
+    bars: int
+    trades: int
+    pnl: float
+    win_rate: float
+
+class PortfolioBacktestResult(BaseModel):
+    strategy_name: str
+    symbols: List[str]
+    metrics: Dict[str, float]
+    timestamps: List[str]
+    equity_curve: List[float]
+    total_trades: int
+    per_symbol: List[PortfolioSymbolStat]
+    sim_stats: Optional[Dict[str, Any]] = None
+
+class IncrementalBacktestRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    strategy_name: str
+    params: Dict[str, Any] = {}
+    initial_capital: float = 10000.0
+    warmup_bars: int = 500 # History kept to recompute signals for new bars
+
+class IncrementalBacktestResult(BaseModel):
+    strategy_name: str
+    metrics: Dict[str, float]
+    timestamps: List[str]
+    equity_curve: List[float]
+    total_trades: int
+    resumed_bars: int
+    new_bars: int
+    sim_stats: Optional[Dict[str, Any]] = None
+
+class StreamingBacktestRequest(BaseModel):
+    symbol: str
+    timeframe: str # Must be stored as is (no on-the-fly resampling while streaming)
+    strategy_name: str
+    params: Dict[str, Any] = {}
+    initial_capital: float = 10000.0
+    batch_size: int = 65536
+    warmup_bars: int = 500
+
+class StreamingBacktestResult(BaseModel):
+    strategy_name: str
+    bars: int
+    metrics: Dict[str, float]
+    total_trades: int
+    equity_path: str
+    trades_path: str
+    sim_stats: Optional[Dict[str, Any]] = None
+
+class TimeTravelRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    strategy_name: str
+    params: Dict[str, Any] = {}
+    initial_capital: float = 10000.0
+    scenario_id: Optional[str] = None
+    snapshot_every: int = 500 # Bars between broker snapshots (max replay per lookup)
+
+    # Risk exits, as in BacktestRequest
+    tp_type: Optional[str] = None
+    tp_value: Optional[float] = None
+    sl_type: Optional[str] = None
+    sl_value: Optional[float] = None
+    trail_type: Optional[str] = None
+    trail_value: Optional[float] = None
+    time_stop_bars: Optional[int] = None
+
+class TimeTravelRunInfo(BaseModel):
+    run_id: str
+    strategy_name: str
+    bars: int
+    snapshots: int
+    total_trades: int
+    first_timestamp: str
+    last_timestamp: str
+    final_equity: float
+    sim_stats: Optional[Dict[str, Any]] = None
+
+class AccountState(BaseModel):
+    run_id: str
+    timestamp: str
+    bar: int
+    snapshot_bar: int
+    replayed_bars: int
+    cash: float
+    position: float
+    average_entry_price: float
+    equity: float
+    pending_orders: List[Dict[str, Any]]
+    trades: int # Fills up to and including this bar
+    last_trade: Optional[Dict[str, Any]] = None
+    candle: Dict[str, float]
+    signal: int
+    indicators: Dict[str, Optional[float]]
+
+class WalkForwardRequest(BaseModel):
+    symbol: str
+    timeframe: str
+    strategy_name: str
+    param_sets: Optional[List[Dict[str, Any]]] = None
+    param_grid: Optional[Dict[str, List[Any]]] = None
+    train_bars: int = 24 * 90
+    test_bars: int = 24 * 30
+    step_bars: Optional[int] = None # Defaults to test_bars
+    objective: str = "sharpe" # sharpe, total_return, final_equity
+    initial_capital: float = 10000.0
+    max_workers: Optional[int] = None
+
+    tp_type: Optional[str] = None
+    tp_value: Optional[float] = None
+    sl_type: Optional[str] = None
+    sl_value: Optional[float] = None
+    trail_type: Optional[str] = None
+    trail_value: Optional[float] = None
+    time_stop_bars: Optional[int] = None
+
+class WalkForwardWindowInfo(BaseModel):
+    train_start: str
+    train_end: str
+    test_start: str
+    test_end: str
+    params: Dict[str, Any]
+    train_score: float
+    test_return: float
+    test_trades: int
+
+class WalkForwardResult(BaseModel):
+    strategy_name: str
+    windows: List[WalkForwardWindowInfo]
+    oos_timestamps: List[str]
+    oos_equity_curve: List[float]
+    oos_total_return: float
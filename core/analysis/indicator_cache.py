@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from core.config import settings
+
+Columns = Dict[str, np.ndarray]
+
+
+def fingerprint(df, columns: Sequence[str]) -> str:
+    """
+    Content hash of the index and the given input columns of a DataFrame (or any
+    mapping of columns with an `index`, like strategies' Bars). Two sources with the
+    same bars produce the same key regardless of which request or strategy built them.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    index = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else df.index.to_numpy(dtype=np.float64)
+    h.update(str(len(df)).encode())
+    h.update(np.ascontiguousarray(index).view(np.uint8))
+    for col in columns:
+        h.update(col.encode())
+        h.update(np.ascontiguousarray(np.asarray(df[col], dtype=np.float64)).view(np.uint8))
+    return h.hexdigest()
+
+
+def _owner(arr: np.ndarray) -> np.ndarray:
+    """The array that owns `arr`'s memory (the end of its chain of views)."""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def _identity(df, columns: Sequence[str]):
+    """
+    (token, owners) naming the exact buffers behind the index and input columns, or None
+    when a column is writable (its content could change under the same buffer). The token
+    is only meaningful while the owners are alive.
+    """
+    index = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else df.index.to_numpy()
+    arrays = [np.asarray(df[col]) for col in columns]
+    if any(arr.flags.writeable for arr in arrays):
+        return None
+    token = (len(df), tuple(columns)) + tuple(
+        (arr.__array_interface__["data"][0], arr.shape, arr.strides, arr.dtype.str) for arr in [index] + arrays)
+    return token, [_owner(arr) for arr in [index] + arrays]
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU of computed indicator columns, keyed by
+    (dataset fingerprint, indicator name, params) and bounded by total array bytes.
+    Cached arrays are read-only; callers assign them into their own frames.
+
+    Fingerprints of read-only inputs (strategies' Bars, copy-on-write column views) are
+    remembered per buffer while the arrays owning those buffers are alive, so a lookup on
+    bars already seen compares pointers and shapes instead of hashing the content again.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[Columns, int]]" = OrderedDict()
+        self._fingerprints: Dict[tuple, Tuple[str, list]] = {}
+        self._lock = threading.RLock() # re-entered by weakref callbacks fired by a collection
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.hashes = 0
+
+    def _fingerprint(self, df, inputs: Sequence[str]) -> str:
+        """Content fingerprint of the inputs, hashed only for buffers not seen alive before."""
+        ident = _identity(df, inputs)
+        if ident is not None:
+            token, owners = ident
+            with self._lock:
+                known = self._fingerprints.get(token)
+            if known is not None and all(ref() is o for ref, o in zip(known[1], owners)):
+                return known[0]
+        fp = fingerprint(df, inputs)
+        with self._lock:
+            self.hashes += 1
+            if ident is not None:
+                try:
+                    forget = lambda _, token=token: self._forget(token)
+                    self._fingerprints[token] = (fp, [weakref.ref(o, forget) for o in owners])
+                except TypeError: # owner without weakref support: always hash
+                    pass
+        return fp
+
+    def _forget(self, token: tuple):
+        # Weakref callback: one of the buffers is gone, so its address may be reused
+        with self._lock:
+            self._fingerprints.pop(token, None)
+
+    def get_or_compute(self, df, name: str, params: Dict[str, Any], inputs: Sequence[str],
+                       compute: Callable[[], Any]) -> Columns:
+        """`compute` returns a DataFrame or a dict of named arrays; only called on a miss."""
+        key = (self._fingerprint(df, inputs), name, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Computed outside the lock: concurrent misses on the same key just race to insert
+        out = compute()
+        columns = {}
+        for col, values in out.items():
+            arr = np.array(np.asarray(values), copy=True)
+            arr.flags.writeable = False
+            columns[col] = arr
+        size = sum(a.nbytes for a in columns.values())
+
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (columns, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+                    self.evictions += 1
+        return columns
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.evictions = self.hashes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hashes": self.hashes}
+
+
+indicator_cache = IndicatorCache(max_bytes=settings.INDICATOR_CACHE_MB * 1024 * 1024)
@@ -1,48 +1,145 @@
+import importlib
+from typing import Dict
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+from core.analysis import kernels
+from core.analysis.indicator_cache import indicator_cache
+from core.config import settings
+
+Columns = Dict[str, np.ndarray]
 
 class TechnicalAnalysis:
     """
-    Wrapper around pandas_ta to provide consistent indicator API.
+    Consistent indicator API with pandas_ta column names.
+    `sma/rsi/ema/atr/bbands/macd/volatility` take a DataFrame or strategy Bars and return
+    {column name: read-only ndarray}; the `add_*` variants append those columns to a frame.
+    Backends: "numpy" (core.analysis.kernels, default) or "pandas_ta" (the DataFrame
+    extension, imported on first use). Results are served from the shared indicator
+    cache when the same bars were seen before.
     """
-    
+    backend: str = settings.INDICATOR_BACKEND
+
+    @staticmethod
+    def _pandas_ta():
+        # Registers the df.ta accessor; slow, so only paid when that backend is used
+        return importlib.import_module("pandas_ta")
+
+    @staticmethod
+    def _native() -> bool:
+        return TechnicalAnalysis.backend != "pandas_ta"
+
+    @staticmethod
+    def _cached(source, name: str, params: dict, inputs: list, compute) -> Columns:
+        key_params = {**params, "backend": TechnicalAnalysis.backend}
+        return indicator_cache.get_or_compute(source, name, key_params, inputs, compute)
+
+    @staticmethod
+    def _ta(source, indicator: str, **kwargs) -> pd.DataFrame:
+        TechnicalAnalysis._pandas_ta()
+        df = source if isinstance(source, pd.DataFrame) else source.to_frame()
+        df.ta.cores = 0
+        result = getattr(df.ta, indicator)(**kwargs)
+        return result.to_frame() if isinstance(result, pd.Series) else result
+
+    @staticmethod
+    def _add(df: pd.DataFrame, columns: Columns) -> pd.DataFrame:
+        for col, values in columns.items():
+            df[col] = values
+        return df
+
+    # --- Array API ---
+
+    @staticmethod
+    def sma(source, length: int = 20, column: str = "close") -> Columns:
+        compute = lambda: {f"SMA_{length}": pd.Series(source[column]).rolling(window=length).mean()}
+        return TechnicalAnalysis._cached(source, "sma", {"length": length, "column": column}, [column], compute)
+
+    @staticmethod
+    def rsi(source, length: int = 14) -> Columns:
+        def compute():
+            if TechnicalAnalysis._native():
+                return {f"RSI_{length}": kernels.rsi(source['close'], length)}
+            return TechnicalAnalysis._ta(source, "rsi", length=length)
+        return TechnicalAnalysis._cached(source, "rsi", {"length": length}, ["close"], compute)
+
+    @staticmethod
+    def ema(source, length: int = 20) -> Columns:
+        def compute():
+            if TechnicalAnalysis._native():
+                return {f"EMA_{length}": kernels.ema(source['close'], length)}
+            return TechnicalAnalysis._ta(source, "ema", length=length)
+        return TechnicalAnalysis._cached(source, "ema", {"length": length}, ["close"], compute)
+
+    @staticmethod
+    def atr(source, length: int = 14) -> Columns:
+        def compute():
+            if TechnicalAnalysis._native():
+                return {f"ATRr_{length}": kernels.atr(source['high'], source['low'], source['close'], length)}
+            return TechnicalAnalysis._ta(source, "atr", length=length)
+        return TechnicalAnalysis._cached(source, "atr", {"length": length}, ["high", "low", "close"], compute)
+
+    @staticmethod
+    def bbands(source, length: int = 20, std: float = 2.0) -> Columns:
+        def compute():
+            if TechnicalAnalysis._native():
+                suffix = f"{length}_{float(std)}"
+                bands = kernels.bbands(source['close'], length, float(std))
+                return dict(zip([f"{p}_{suffix}" for p in ("BBL", "BBM", "BBU", "BBB", "BBP")], bands))
+            return TechnicalAnalysis._ta(source, "bbands", length=length, std=std)
+        return TechnicalAnalysis._cached(source, "bbands", {"length": length, "std": std}, ["close"], compute)
+
+    @staticmethod
+    def macd(source, fast: int = 12, slow: int = 26, signal: int = 9) -> Columns:
+        def compute():
+            if TechnicalAnalysis._native():
+                f, s = (slow, fast) if slow < fast else (fast, slow)
+                suffix = f"{f}_{s}_{signal}"
+                line, hist, sig = kernels.macd(source['close'], fast, slow, signal)
+                return {f"MACD_{suffix}": line, f"MACDh_{suffix}": hist, f"MACDs_{suffix}": sig}
+            return TechnicalAnalysis._ta(source, "macd", fast=fast, slow=slow, signal=signal)
+        return TechnicalAnalysis._cached(source, "macd", {"fast": fast, "slow": slow, "signal": signal}, ["close"], compute)
+
+    @staticmethod
+    def volatility(source, length: int = 20) -> Columns:
+        """Bar returns ('returns') and their rolling std ('vol')."""
+        def compute():
+            returns = pd.Series(source['close']).pct_change()
+            return {'returns': returns, 'vol': returns.rolling(length).std()}
+        return TechnicalAnalysis._cached(source, "volatility", {"length": length}, ["close"], compute)
+
+    # --- DataFrame API ---
+
     @staticmethod
     def add_sma(df: pd.DataFrame, length: int = 20, column: str = "close") -> pd.DataFrame:
         """Adds Simple Moving Average."""
-        df[f"SMA_{length}"] = df[column].rolling(window=length).mean()
-        return df
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.sma(df, length, column))
 
     @staticmethod
     def add_rsi(df: pd.DataFrame, length: int = 14) -> pd.DataFrame:
-        """Adds RSI."""
-        df.ta.cores = 0
-        df.ta.rsi(length=length, append=True)
-        return df
+        """Adds RSI (Wilder smoothing)."""
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.rsi(df, length))
     
     @staticmethod
     def add_ema(df: pd.DataFrame, length: int = 20) -> pd.DataFrame:
         """Adds EMA."""
-        df.ta.cores = 0
-        df.ta.ema(length=length, append=True)
-        return df
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.ema(df, length))
 
     @staticmethod
     def add_atr(df: pd.DataFrame, length: int = 14) -> pd.DataFrame:
         """Adds Average True Range (useful for volatility-based stops)."""
-        df.ta.cores = 0
-        df.ta.atr(length=length, append=True)
-        return df
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.atr(df, length))
 
     @staticmethod
     def add_bbands(df: pd.DataFrame, length: int = 20, std: float = 2.0) -> pd.DataFrame:
         """Adds Bollinger Bands."""
-        df.ta.cores = 0
-        df.ta.bbands(length=length, std=std, append=True)
-        return df
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.bbands(df, length, std))
 
     @staticmethod
     def add_macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
         """Adds MACD."""
-        df.ta.cores = 0
-        df.ta.macd(fast=fast, slow=slow, signal=signal, append=True)
-        return df
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.macd(df, fast, slow, signal))
+
+    @staticmethod
+    def add_volatility(df: pd.DataFrame, length: int = 20) -> pd.DataFrame:
+        """Adds bar returns ('returns') and their rolling std ('vol')."""
+        return TechnicalAnalysis._add(df, TechnicalAnalysis.volatility(df, length))
@@ -0,0 +1,110 @@
+"""
+Pure NumPy/SciPy indicator kernels.
+Each function takes float ndarrays and returns ndarrays of the same length, reproducing
+the pandas_ta (0.3.14b) definitions: SMA-seeded EMA, Wilder RMA (adjusted EWM),
+ddof=0 Bollinger deviation and the epsilon guard on zero ranges.
+"""
+import sys
+from typing import Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+
+def _first_valid(x: np.ndarray) -> int:
+    valid = np.flatnonzero(~np.isnan(x))
+    return int(valid[0]) if len(valid) else len(x)
+
+
+def _non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    diff = high - low
+    if (diff == 0).any():
+        diff = diff + sys.float_info.epsilon
+    return diff
+
+
+def sma(x: np.ndarray, length: int) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if 0 < length <= len(x):
+        out[length - 1:] = sliding_window_view(x, length).mean(axis=1)
+    return out
+
+
+def ema(x: np.ndarray, length: int) -> np.ndarray:
+    """EMA (alpha = 2 / (length + 1), adjust=False) seeded with the SMA of the first `length` values."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    start = _first_valid(x)
+    if length <= 0 or len(x) - start < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    seed = x[start:start + length].mean()
+    tail = x[start + length - 1:].copy()
+    tail[0] = seed
+    out[start + length - 1:], _ = lfilter([alpha], [1.0, alpha - 1.0], tail, zi=[(1.0 - alpha) * seed])
+    return out
+
+
+def rma(x: np.ndarray, length: int) -> np.ndarray:
+    """Wilder's moving average: adjusted EWM with alpha = 1 / length and min_periods = length."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    start = _first_valid(x)
+    if length <= 0 or len(x) - start < length:
+        return out
+    decay = 1.0 - 1.0 / length
+    num = lfilter([1.0], [1.0, -decay], x[start:])
+    den = lfilter([1.0], [1.0, -decay], np.ones(len(x) - start))
+    out[start:] = num / den
+    out[start:start + length - 1] = np.nan
+    return out
+
+
+def rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.full(len(close), np.nan)
+    diff[1:] = np.diff(close)
+    up = rma(np.where(diff < 0, 0.0, diff), length)
+    down = rma(np.where(diff > 0, 0.0, diff), length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * up / (up + np.abs(down))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    prev_close = np.full(len(close), np.nan)
+    prev_close[1:] = close[:-1]
+    # NaN-skipping max, like DataFrame.max(axis=1)
+    tr = np.fmax(np.fmax(np.abs(_non_zero_range(high, low)), np.abs(high - prev_close)), np.abs(prev_close - low))
+    tr[:1] = np.nan
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> np.ndarray:
+    return rma(true_range(high, low, close), length)
+
+
+def bbands(close: np.ndarray, length: int = 20, std: float = 2.0) -> Tuple[np.ndarray, ...]:
+    """(lower, mid, upper, bandwidth, percent) with a population (ddof=0) rolling deviation."""
+    close = np.asarray(close, dtype=np.float64)
+    mid = sma(close, length)
+    dev = np.full(len(close), np.nan)
+    if 0 < length <= len(close):
+        dev[length - 1:] = sliding_window_view(close, length).std(axis=1)
+    lower = mid - std * dev
+    upper = mid + std * dev
+    ulr = _non_zero_range(upper, lower)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bandwidth = 100.0 * ulr / mid
+        percent = _non_zero_range(close, lower) / ulr
+    return lower, mid, upper, bandwidth, percent
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, ...]:
+    """(macd, histogram, signal). The signal EMA starts at the first valid MACD value."""
+    if slow < fast:
+        fast, slow = slow, fast
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)
+    return line, line - sig, sig
@@ -0,0 +1,146 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    n_paths: int
+    final_equity: np.ndarray # one value per path
+    max_drawdown: np.ndarray # one value per path, in % (<= 0)
+
+    def bands(self, percentiles: Sequence[float] = PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """Percentile bands of final equity and max drawdown, e.g. {'final_equity': {'p5': ...}}."""
+        return {
+            "final_equity": {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(self.final_equity, percentiles))},
+            "max_drawdown": {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(self.max_drawdown, percentiles))},
+        }
+
+
+class MonteCarlo:
+    """
+    Resampling of a finished backtest. Paths are built in log space as whole
+    (paths x steps) matrices: cumsum gives log equity, a running maximum gives the peak.
+    """
+
+    @staticmethod
+    def _log_returns(factors: np.ndarray) -> np.ndarray:
+        return np.log(np.maximum(np.asarray(factors, dtype=np.float64), 1e-12))
+
+    @staticmethod
+    def _summarize(log_eq: np.ndarray, initial_capital: float):
+        # Starting capital is the first peak (log equity 0)
+        peak = np.maximum.accumulate(np.maximum(log_eq, 0.0), axis=1)
+        max_dd = np.expm1((log_eq - peak).min(axis=1)) * 100
+        return initial_capital * np.exp(log_eq[:, -1]), max_dd
+
+    @staticmethod
+    def trade_reshuffle(trade_factors: Sequence[float], initial_capital: float, n_paths: int = 10000,
+                        seed: Optional[int] = None, replace: bool = False) -> MonteCarloResult:
+        """
+        Reorders the realized per-trade equity factors (equity after / before each round trip).
+        Without replacement the final equity is order-invariant and only the drawdown path changes;
+        with `replace=True` it becomes a plain trade bootstrap.
+        """
+        r = MonteCarlo._log_returns(trade_factors)
+        if len(r) == 0:
+            flat = np.full(n_paths, float(initial_capital))
+            return MonteCarloResult("trade_reshuffle", n_paths, flat, np.zeros(n_paths))
+        rng = np.random.default_rng(seed)
+        if replace:
+            paths = r[rng.integers(0, len(r), size=(n_paths, len(r)))]
+        else:
+            paths = rng.permuted(np.tile(r, (n_paths, 1)), axis=1)
+        final, max_dd = MonteCarlo._summarize(np.cumsum(paths, axis=1), initial_capital)
+        return MonteCarloResult("trade_bootstrap" if replace else "trade_reshuffle", n_paths, final, max_dd)
+
+    @staticmethod
+    def _segment_tables(r: np.ndarray, max_len: int) -> np.ndarray:
+        """
+        (T * (max_len + 1), 4) table indexed by start * (max_len + 1) + length with the
+        [sum, min, max, internal max drawdown] of the cumulative log return over
+        r[start:start + length] (circular). Length 0 is the neutral segment.
+        """
+        T = len(r)
+        P = np.concatenate([[0.0], np.cumsum(np.concatenate([r, r]))])
+        s = np.arange(T)
+        tab = np.empty((T, max_len + 1, 4))
+        tab[:, 0] = (0.0, np.inf, -np.inf, 0.0)
+        for L in range(1, max_len + 1):
+            q = P[s + L] - P[s]
+            tab[:, L, 0] = q
+            tab[:, L, 1] = np.minimum(tab[:, L - 1, 1], q)
+            tab[:, L, 2] = np.maximum(tab[:, L - 1, 2], q)
+            tab[:, L, 3] = np.minimum(tab[:, L - 1, 3], q - tab[:, L, 2])
+        return tab.reshape(-1, 4)
+
+    @staticmethod
+    def _segments(rng: np.random.Generator, n_paths: int, T: int, mean_block: float, max_len: int):
+        """
+        Stationary-bootstrap blocks as (starts, lengths) of shape (n_paths, K), lengths summing to T.
+        Blocks longer than `max_len` continue as extra segments at start + max_len; by the
+        memorylessness of the geometric law this leaves the block-length distribution exact.
+        """
+        p = 1.0 / mean_block
+        mean_seg = (1 - (1 - p) ** max_len) / p # E[min(G, max_len)]
+        K = int(np.ceil(T / mean_seg * 1.15)) + 64
+        kk = np.arange(K)
+        while True:
+            u = rng.random((n_paths, K))
+            G = (np.log(u) / np.log1p(-p)).astype(np.int64) + 1 if p < 1 else np.ones((n_paths, K), dtype=np.int64)
+            lens = np.minimum(G, max_len)
+            ends = np.minimum(np.cumsum(lens, axis=1), T)
+            if (ends[:, -1] == T).all():
+                break
+        cont = np.zeros((n_paths, K), dtype=bool)
+        cont[:, 1:] = G[:, :-1] > max_len
+        fresh = rng.integers(0, T, size=(n_paths, K))
+        last_new = np.maximum.accumulate(np.where(cont, 0, kk), axis=1)
+        starts = (np.take_along_axis(fresh, last_new, axis=1) + (kk - last_new) * max_len) % T
+        return starts, np.diff(ends, axis=1, prepend=0)
+
+    @staticmethod
+    def _reduce_segments(table: np.ndarray, starts: np.ndarray, lens: np.ndarray, max_len: int,
+                         initial_capital: float):
+        seg = table[starts * (max_len + 1) + lens] # (paths, K, 4)
+        seg_sum, seg_min, seg_max, seg_mdd = seg[..., 0], seg[..., 1], seg[..., 2], seg[..., 3]
+        total = np.cumsum(seg_sum, axis=1)
+        base = total - seg_sum # log equity before each segment
+        # Peak before each segment: starting capital and every earlier bar
+        peak = np.maximum.accumulate(base + seg_max, axis=1)
+        peak = np.concatenate([np.zeros((len(seg), 1)), np.maximum(peak[:, :-1], 0.0)], axis=1)
+        dd = np.minimum(base + seg_min - peak, seg_mdd).min(axis=1)
+        return initial_capital * np.exp(total[:, -1]), np.expm1(np.minimum(dd, 0.0)) * 100
+
+    @staticmethod
+    def block_bootstrap(bar_returns: Sequence[float], initial_capital: float, n_paths: int = 10000,
+                        mean_block: float = 24.0, seed: Optional[int] = None,
+                        chunk_paths: int = 2048) -> MonteCarloResult:
+        """
+        Stationary block bootstrap (Politis & Romano) of simple bar returns: uniform block
+        starts, geometric lengths with mean `mean_block`, circular wrap.
+        Inside a block the path follows the original prefix sums, so per-(start, length)
+        sum/min/max/drawdown tables turn each path into ~T/mean_block segment ops instead of
+        T bar ops; the path drawdown combines each segment's internal drawdown with the
+        running peak carried over from earlier segments.
+        """
+        r = MonteCarlo._log_returns(1.0 + np.asarray(bar_returns, dtype=np.float64))
+        T = len(r)
+        if T == 0:
+            return MonteCarloResult("block_bootstrap", n_paths, np.full(n_paths, float(initial_capital)), np.zeros(n_paths))
+
+        mean_block = max(float(mean_block), 1.0)
+        max_len = int(min(T, max(8, 3 * mean_block)))
+        table = MonteCarlo._segment_tables(r, max_len)
+        rng = np.random.default_rng(seed)
+        final = np.empty(n_paths)
+        max_dd = np.empty(n_paths)
+        for lo in range(0, n_paths, chunk_paths):
+            c = min(chunk_paths, n_paths - lo)
+            starts, lens = MonteCarlo._segments(rng, c, T, mean_block, max_len)
+            final[lo:lo + c], max_dd[lo:lo + c] = MonteCarlo._reduce_segments(
+                table, starts, lens, max_len, initial_capital)
+        return MonteCarloResult("block_bootstrap", n_paths, final, max_dd)
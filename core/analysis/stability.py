@@ -0,0 +1,117 @@
+import contextvars
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from core.execution import batch_engine
+from core.strategies.base import Bars
+from core.strategies.factory import StrategyFactory
+from core.utils.logger import logger
+from core.utils.sim_logging import quiet_simulation
+
+# Parameters whose perturbation says nothing about robustness
+_SKIP_PARAMS = {"seed"}
+
+
+class StabilityAnalysis:
+    """
+    Parameter-perturbation sensitivity: how much does the total return move when every
+    numeric parameter is nudged by ±k%?
+    """
+    _cache: "OrderedDict[str, float]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_size = 256
+
+    @staticmethod
+    def neighbors(strategy_id: str, params: Dict[str, Any], pct: float = 10.0) -> List[Dict[str, Any]]:
+        """One-at-a-time ±pct% perturbations of the numeric parameters in parameters_schema()."""
+        schema = StrategyFactory.get_strategy(strategy_id, params).parameters_schema()
+        out, seen = [], {json.dumps(params, sort_keys=True, default=str)}
+        for p in schema:
+            name = p["name"]
+            if p.get("type") != "number" or name in _SKIP_PARAMS:
+                continue
+            base = params.get(name, p.get("default"))
+            if not isinstance(base, (int, float)) or isinstance(base, bool):
+                continue
+            for sign in (-1, 1):
+                val = round(base * (1 + sign * pct / 100), 10)
+                if isinstance(base, int) or isinstance(p.get("default"), int):
+                    # Integer parameters (lengths, periods) move by at least one step
+                    val = int(round(val))
+                    if val == base:
+                        val = int(base) + sign
+                    val = max(val, 1)
+                nb = {**params, name: val}
+                key = json.dumps(nb, sort_keys=True, default=str)
+                if key not in seen:
+                    seen.add(key)
+                    out.append(nb)
+        return out
+
+    @staticmethod
+    def variance(df: pd.DataFrame, strategy_id: str, params: Dict[str, Any], pct: float = 10.0,
+                 budget_s: float = 1.0, max_workers: int = 4, **sim_kwargs) -> float:
+        """
+        Dispersion of total return across the base parameters and their ±pct% neighbors,
+        as the population std dev in return percentage points (not its square). It feeds
+        BacktestResult.stability_variance, whose name predates it: the UI shows the value as
+        a percentage and the 18/25 fragility thresholds are in points, which a variance
+        (points squared) would not match. Neighbor signals are generated concurrently on
+        the shared frame and all columns are simulated in a single batched pass. Neighbors
+        not ready within `budget_s` are dropped. Results are memoized per dataset and inputs.
+        """
+        params = dict(params or {})
+        key = StabilityAnalysis._key(df, strategy_id, params, pct, sim_kwargs)
+        with StabilityAnalysis._cache_lock:
+            if key in StabilityAnalysis._cache:
+                StabilityAnalysis._cache.move_to_end(key)
+                return StabilityAnalysis._cache[key]
+
+        candidates = [params] + StabilityAnalysis.neighbors(strategy_id, params, pct)
+        if len(candidates) < 2:
+            return 0.0
+
+        deadline = time.perf_counter() + budget_s / 2 # leave half the budget for the simulation
+        columns: Dict[int, np.ndarray] = {}
+
+        bars = Bars.from_frame(df)
+
+        def gen(j):
+            columns[j] = StrategyFactory.get_strategy(strategy_id, candidates[j]).compute(bars).signal
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        # Each task runs in a copy of the caller's context, so a quiet run stays quiet in the pool
+        with quiet_simulation():
+            futures = [pool.submit(contextvars.copy_context().run, gen, j) for j in range(len(candidates))]
+        wait(futures, timeout=max(deadline - time.perf_counter(), 0.0))
+        pool.shutdown(wait=False, cancel_futures=True)
+        ready = dict(columns)
+        done = sorted(ready)
+        if 0 not in done or len(done) < 2:
+            logger.warning(f"Stability analysis for {strategy_id} exceeded its {budget_s}s budget")
+            return 0.0
+
+        close = df['close'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64) if 'high' in df.columns else close
+        low = df['low'].to_numpy(dtype=np.float64) if 'low' in df.columns else close
+        run = batch_engine.simulate_batch(close, high, low, np.stack([ready[j] for j in done], axis=1), **sim_kwargs)
+        rets = np.nan_to_num(run.total_return, nan=0.0, posinf=0.0, neginf=0.0)
+        result = float(np.std(rets))
+        if len(done) < len(candidates):
+            return result # partial answer, don't memoize
+
+        with StabilityAnalysis._cache_lock:
+            StabilityAnalysis._cache[key] = result
+            while len(StabilityAnalysis._cache) > StabilityAnalysis._cache_size:
+                StabilityAnalysis._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _key(df: pd.DataFrame, strategy_id: str, params: Dict[str, Any], pct: float, sim_kwargs: Dict[str, Any]) -> str:
+        fp = (len(df), str(df.index[0]), str(df.index[-1]), float(df['close'].iloc[-1])) if len(df) else (0,)
+        return json.dumps([fp, strategy_id, params, pct, sim_kwargs], sort_keys=True, default=str)
@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     PROCESSED_DATA_DIR: Path = DATA_DIR / "processed"
     DB_DIR: Path = DATA_DIR / "db"
     LOGS_DIR: Path = BASE_DIR / "logs"
+    CHECKPOINT_DIR: Path = DATA_DIR / "checkpoints"
+    RUNS_DIR: Path = DATA_DIR / "runs" # Streaming backtest outputs
 
     # Exchange Config
     EXCHANGE_ID: str = "binance"
@@ -19,6 +21,16 @@ class Settings(BaseSettings):
     INITIAL_CAPITAL: float = 10000.0
     MAKER_FEE: float = 0.001
     TAKER_FEE: float = 0.001
+    # Quiet simulation runs: one DEBUG line per this many fills (0 = none)
+    SIM_LOG_SAMPLE_EVERY: int = 1000
+
+    # Indicator cache (shared across strategies and requests)
+    INDICATOR_CACHE_MB: int = 256
+    # "numpy" (native kernels) or "pandas_ta"
+    INDICATOR_BACKEND: str = "numpy"
+
+    # Serve OHLCV loads from memory-mapped Arrow IPC copies (shared across worker processes)
+    OHLCV_IPC_CACHE: bool = True
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -0,0 +1,90 @@
+"""
+Slotted internal records for the simulation hot path.
+No validation, integer order ids from a monotonic counter (trade ids are positions in the
+TradeLedger) and no wall-clock timestamps; `to_model()` converts trades and positions to the
+pydantic models in core.core.models at the API boundary.
+"""
+import itertools
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+from core.core.models import Order, OrderStatus, OrderType, Position, Side, Trade
+
+_order_ids = itertools.count(1)
+
+
+def _as_datetime(ts: Any) -> datetime:
+    if isinstance(ts, datetime):
+        return ts
+    if hasattr(ts, "to_pydatetime"):
+        return ts.to_pydatetime()
+    if isinstance(ts, (int, float)):
+        return datetime.fromtimestamp(ts, tz=timezone.utc)
+    raise TypeError(f"Not a timestamp: {ts!r}")
+
+
+@dataclass(slots=True, eq=False)
+class OrderRecord:
+    symbol: str
+    side: Side
+    type: OrderType
+    amount: float
+    price: Optional[float] = None
+    status: OrderStatus = OrderStatus.PENDING
+    id: int = field(default_factory=_order_ids.__next__)
+    updated_at: Any = None
+    # Pydantic order this record was created from; its status is kept in sync
+    source: Optional[Order] = field(default=None, repr=False)
+
+    @classmethod
+    def from_model(cls, order: Order) -> "OrderRecord":
+        return cls(order.symbol, order.side, order.type, order.amount, order.price, order.status, source=order)
+
+    def set_status(self, status: OrderStatus, timestamp: Any = None):
+        self.status = status
+        if timestamp is not None:
+            self.updated_at = timestamp
+        if self.source is not None:
+            self.source.status = status
+            if timestamp is not None:
+                self.source.updated_at = timestamp
+
+
+@dataclass(slots=True, eq=False)
+class TradeRecord:
+    order_id: Any
+    symbol: str
+    side: Side
+    amount: float
+    price: float
+    cost: float # amount * price
+    fee: float
+    timestamp: Any = None
+    id: int = 0 # 1-based position in the TradeLedger
+
+    def to_model(self) -> Trade:
+        return Trade(id=str(self.id), order_id=str(self.order_id), symbol=self.symbol, side=self.side,
+                     amount=self.amount, price=self.price, cost=self.cost, fee=self.fee,
+                     timestamp=_as_datetime(self.timestamp))
+
+
+@dataclass(slots=True, eq=False)
+class PositionRecord:
+    symbol: str
+    amount: float = 0.0
+    average_entry_price: float = 0.0
+    current_price: float = 0.0
+    unrealized_pnl: float = 0.0
+
+    def update(self, last_price: float):
+        self.current_price = last_price
+        if self.amount == 0:
+            self.unrealized_pnl = 0
+            return
+
+        diff = self.current_price - self.average_entry_price
+        self.unrealized_pnl = diff * self.amount
+
+    def to_model(self) -> Position:
+        return Position(symbol=self.symbol, amount=self.amount, average_entry_price=self.average_entry_price,
+                        current_price=self.current_price, unrealized_pnl=self.unrealized_pnl)
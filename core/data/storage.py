@@ -1,70 +1,420 @@
+import hashlib
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from core.config import settings
+from core.data.quality import QualityIndex, timeframe_step
 from core.utils.logger import logger
 
+# Bounded row groups, so readers can stream a file group by group
+ROW_GROUP_ROWS = 65_536
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# CCXT/Standard timeframes served by resampling 1h data -> Pandas aliases
+RESAMPLE_RULES = {"4h": "4h", "1d": "1D", "12h": "12h"}
+
+# IPC metadata key: fingerprint of the 1h files a cached copy was built from
+SOURCE_KEY = b"source_fingerprint"
+
 class DataStorage:
-    def __init__(self, base_dir: Path = settings.PROCESSED_DATA_DIR):
+    """
+    OHLCV store. Each (symbol, timeframe) is a hive-partitioned dataset:
+
+        <base>/symbol=BTC_USDT/timeframe=1h/year=2024/month=03/part-<first ns>-<last ns>.parquet
+
+    Files are sorted and duplicate-free, and their names carry their time range, so paths in
+    sorted order are already in time order. New candles that start after a partition's last
+    candle are appended as a new file; overlapping ones rewrite only the affected partitions.
+    `compact` merges each partition's appended files back into one.
+    Flat `<SYMBOL>_<tf>.parquet` files of the previous layout are still read, and are migrated
+    into the partitioned layout on the next save.
+
+    The RESAMPLE_RULES timeframes are materialized under `<base>/resampled/`, partitioned
+    by year (`symbol=BTC_USDT/timeframe=4h/year=2024/part-<first ns>-<last ns>.parquet`),
+    next to a `_source` file with the fingerprint of the 1h files they were built from:
+    saving 1h candles recomputes only the buckets from the first new candle on and rewrites
+    only the partitions holding them, and loads serve the series while the fingerprint
+    still matches (otherwise it is rebuilt from 1h first).
+
+    With `ipc_cache`, 1h/4h/12h/1d loads are served from uncompressed Arrow IPC (Feather v2)
+    copies under `<base>/ipc/`, memory-mapped so every worker process shares the OS page
+    cache and frames are views of the mapping (read-only: copy before writing in place).
+    Copies are named after the fingerprint of their 1h source (`<SYMBOL>_<tf>.<fingerprint>.arrow`),
+    so a change writes a new file instead of replacing one that may still be mapped; older
+    versions are deleted when possible. Saving 1h candles carries existing copies over to
+    the new version from their mapped rows before the first new candle plus the stored
+    tail, so only the tail is decoded from parquet; a copy is built from the full series
+    only on the first load without one.
+
+    Every save also refreshes the dataset's QualityIndex (`<base>/quality/`): the ordering
+    and duplicates of the written rows and the gaps of the stored series, which `audit`
+    answers for any date range by binary search.
+    """
+    def __init__(self, base_dir: Path = settings.PROCESSED_DATA_DIR, ipc_cache: Optional[bool] = None):
         self.base_dir = base_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.ipc_cache = settings.OHLCV_IPC_CACHE if ipc_cache is None else ipc_cache
 
     def _get_file_path(self, symbol: str, timeframe: str) -> Path:
+        """Flat file of the legacy (unpartitioned) layout."""
         # Normalize symbol: BTC/USDT -> BTC_USDT
         safe_symbol = symbol.replace("/", "_")
         return self.base_dir / f"{safe_symbol}_{timeframe}.parquet"
 
+    def _dataset_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.base_dir / f"symbol={symbol.replace('/', '_')}" / f"timeframe={timeframe}"
+
+    def partition_files(self, symbol: str, timeframe: str, start: Optional[pd.Timestamp] = None,
+                        end: Optional[pd.Timestamp] = None) -> List[Path]:
+        """
+        Data files of the partitioned dataset, in time order (empty if there is none); with
+        `start`/`end`, only the files whose time range overlaps [start, end].
+        """
+        return _overlapping(sorted(self._dataset_dir(symbol, timeframe).glob("year=*/month=*/part-*.parquet")),
+                            start, end)
+
+    def dataset_source(self, symbol: str, timeframe: str) -> Optional[List[Path]]:
+        """Files holding the stored data (partitioned or legacy), in time order, or None."""
+        files = self.partition_files(symbol, timeframe)
+        if files:
+            return files
+        legacy = self._get_file_path(symbol, timeframe)
+        return [legacy] if legacy.exists() else None
+
+    def _resampled_dir(self, symbol: str, timeframe: str) -> Path:
+        return self.base_dir / "resampled" / f"symbol={symbol.replace('/', '_')}" / f"timeframe={timeframe}"
+
+    def _source_fingerprint(self, symbol: str, timeframe: str = "1h") -> Optional[str]:
+        """Hash of the stored files' names, sizes and mtimes (changes with any write), or None."""
+        files = self.dataset_source(symbol, timeframe)
+        if files is None:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        for f in files:
+            st = f.stat()
+            h.update(f"{f.relative_to(self.base_dir)}:{st.st_size}:{st.st_mtime_ns};".encode())
+        return h.hexdigest()
+
+    def list_datasets(self) -> List[Tuple[str, str]]:
+        """(symbol, timeframe) of every stored dataset, e.g. ("BTC/USDT", "1h")."""
+        found = set()
+        for tf_dir in self.base_dir.glob("symbol=*/timeframe=*"):
+            if any(tf_dir.glob("year=*/month=*/part-*.parquet")):
+                safe = tf_dir.parent.name[len("symbol="):]
+                found.add((safe.replace("_", "/", 1), tf_dir.name[len("timeframe="):]))
+        for f in self.base_dir.glob("*.parquet"):
+            safe, _, tf = f.stem.rpartition("_")
+            if safe:
+                found.add((safe.replace("_", "/", 1), tf))
+        return sorted(found)
+
     def save_ohlcv(self, df: pd.DataFrame, symbol: str, timeframe: str):
-        """Saves OHLCV data to parquet."""
+        """Saves OHLCV data into the partitioned dataset (new candles win over stored ones)."""
         if df.empty:
             logger.warning(f"No data to save for {symbol} {timeframe}")
             return
 
-        file_path = self._get_file_path(symbol, timeframe)
-        
         # Ensure timestamp is index
         if 'timestamp' in df.columns:
             df.set_index('timestamp', inplace=True)
-        
+        written_ts = df.index.as_unit("ns").asi8.copy() # as received, for the quality index
+
         # Sort by index
         df.sort_index(inplace=True)
 
         try:
-            # If file exists, merge (simplified for now: overwrite or append could be complex with parquet chunks)
-            # For robustness in this MVP, we will simpler overwrite or read-concat-write
-            if file_path.exists():
-                existing_df = pd.read_parquet(file_path)
-                combined = pd.concat([existing_df, df])
-                combined = combined[~combined.index.duplicated(keep='last')] # Deduplicate
-                combined.sort_index(inplace=True)
-                combined.to_parquet(file_path, compression='snappy')
-                logger.info(f"Updated data for {symbol} {timeframe}. Rows: {len(combined)}")
-            else:
-                df.to_parquet(file_path, compression='snappy')
-                logger.info(f"Saved new data for {symbol} {timeframe}. Rows: {len(df)}")
-                
+            df = df[~df.index.duplicated(keep='last')]
+            source_before = self._source_fingerprint(symbol) if timeframe == "1h" else None
+            quality = self.quality_index(symbol, timeframe)
+            legacy = self._get_file_path(symbol, timeframe)
+            if legacy.exists():
+                # One-off migration of the flat file into partitions
+                df = _merge(pd.read_parquet(legacy), df)
+
+            root = self._dataset_dir(symbol, timeframe)
+            rewritten = added = 0
+            for (year, month), part in df.groupby([df.index.year, df.index.month], sort=True):
+                was_rewritten, rows = self._write_partition(root / f"year={year}" / f"month={month:02d}", part)
+                rewritten += was_rewritten
+                added += rows
+            span = (df.index[0], df.index[-1])
+            if legacy.exists():
+                legacy.unlink()
+                span = None # the whole series was rewritten
+                logger.info(f"Migrated {legacy.name} to the partitioned layout")
+            logger.info(f"Saved {len(df)} rows for {symbol} {timeframe} "
+                        f"({rewritten} partitions rewritten, the rest appended)")
+            if timeframe == "1h":
+                self._refresh_resampled(symbol, source_before, since=df.index[0])
+                self._refresh_ipc(symbol, source_before, since=df.index[0])
+            self._index_quality(symbol, timeframe, quality, written_ts, span, added)
         except Exception as e:
             logger.error(f"Failed to save data for {symbol} {timeframe}: {e}")
             raise
 
-    def load_ohlcv(self, symbol: str, timeframe: str) -> pd.DataFrame:
-        """Loads OHLCV data. If timeframe is not 1h, it resamples from 1h."""
+    def _write_partition(self, part_dir: Path, new: pd.DataFrame) -> Tuple[int, int]:
+        """
+        Appends `new` to one partition, or merges and rewrites it on overlap.
+        Returns (1 if rewritten else 0, rows added to the partition).
+        """
+        files = sorted(part_dir.glob("part-*.parquet"))
+        if not files or new.index[0].value > _file_range(files[-1])[1]:
+            _write_file(part_dir, new)
+            return 0, len(new)
+        old = _read_files(files)
+        merged = _merge(old, new)
+        kept = _write_file(part_dir, merged)
+        for f in files:
+            if f != kept:
+                f.unlink()
+        return 1, len(merged) - len(old)
+
+    def compact(self, symbol: str, timeframe: str) -> int:
+        """
+        Merges every partition made of several files into one file. Returns partitions merged.
+        The rows do not change, so what was derived from them (quality index, and for 1h the
+        resampled series and IPC copies) is re-stamped with the new fingerprint, not rebuilt.
+        """
+        source_before = self._source_fingerprint(symbol, timeframe)
+        compacted = 0
+        for part_dir in sorted(self._dataset_dir(symbol, timeframe).glob("year=*/month=*")):
+            files = sorted(part_dir.glob("part-*.parquet"))
+            if len(files) < 2:
+                continue
+            kept = _write_file(part_dir, _merge(_read_files(files), None))
+            for f in files:
+                if f != kept:
+                    f.unlink()
+            compacted += 1
+        if compacted:
+            self._restamp(symbol, timeframe, source_before, self._source_fingerprint(symbol, timeframe))
+            logger.info(f"Compacted {compacted} partitions of {symbol} {timeframe}")
+        return compacted
+
+    def _restamp(self, symbol: str, timeframe: str, before: Optional[str], after: Optional[str]):
+        """Points what was up to date with the `before` fingerprint at `after` (same rows)."""
+        if before is None or after is None:
+            return
+        index = QualityIndex.load(self._quality_path(symbol, timeframe))
+        if index is not None and index.source == before:
+            index.source = after
+            index.save(self._quality_path(symbol, timeframe))
+        if timeframe != "1h":
+            return
+        for tf in RESAMPLE_RULES:
+            root = self._resampled_dir(symbol, tf)
+            if _resampled_source(root) == before:
+                _stamp_resampled(root, after)
+        for tf in ("1h", *RESAMPLE_RULES):
+            copy = self._ipc_path(symbol, tf, before)
+            if copy.exists():
+                try:
+                    os.replace(copy, self._ipc_path(symbol, tf, after))
+                except OSError:
+                    pass # still mapped (Windows): regenerated on the next load
+
+    def _quality_path(self, symbol: str, timeframe: str) -> Path:
+        return self.base_dir / "quality" / f"{symbol.replace('/', '_')}_{timeframe}.json"
+
+    def _index_quality(self, symbol: str, timeframe: str, previous: Optional[QualityIndex],
+                       written_ts: Optional[np.ndarray] = None,
+                       span: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None,
+                       added: int = 0) -> Optional[QualityIndex]:
+        """
+        Brings the gap index up to date and adds the rows of `written_ts` to its write history.
+        After a save of `added` new rows in `span`, `previous` (the index of the data before
+        it) is updated from the partitions holding the span alone, the bars around it being
+        read from the neighbouring file names; otherwise the index is rebuilt from every
+        stored timestamp (one int64 column, read as stored), keeping the history of `previous`.
+        """
+        source = self._source_fingerprint(symbol, timeframe)
+        files = self.dataset_source(symbol, timeframe)
+        if source is None or files is None:
+            return None
+        if previous is not None and span is not None and self.partition_files(symbol, timeframe):
+            lo, hi = span[0].value, span[1].value
+            inside = _overlapping(files, span[0], span[1])
+            ts = _read_timestamps(inside) if inside else np.empty(0, dtype=np.int64)
+            ranges = [_file_range(f) for f in files]
+            before = [last for _, last in ranges if last < lo] + ts[ts < lo][-1:].tolist()
+            after = [first for first, _ in ranges if first > hi] + ts[ts > hi][:1].tolist()
+            index = previous
+            index.splice(ts[(ts >= lo) & (ts <= hi)], lo, hi, max(before, default=None),
+                         min(after, default=None), added, source)
+        else:
+            index = QualityIndex.build(_read_timestamps(files), timeframe_step(timeframe), source)
+            if previous is not None:
+                index.carry(previous)
+        if written_ts is not None:
+            index.add_written(written_ts)
+        index.save(self._quality_path(symbol, timeframe))
+        return index
+
+    def quality_index(self, symbol: str, timeframe: str) -> Optional[QualityIndex]:
+        """The dataset's QualityIndex, rebuilt if missing or out of date; None without data."""
+        index = QualityIndex.load(self._quality_path(symbol, timeframe))
+        if index is not None and index.source == self._source_fingerprint(symbol, timeframe):
+            return index
+        return self._index_quality(symbol, timeframe, index)
+
+    def audit(self, symbol: str, timeframe: str, start: Any = None, end: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        AuditReport fields (is_ordered, duplicates, gaps, biggest_gap) of the stored data
+        behind the bars of `timeframe` in [start, end]; resampled timeframes report their 1h
+        source over the range their buckets cover. None without data.
+        """
+        start, end = _naive(start), _naive(end)
+        rule = RESAMPLE_RULES.get(timeframe)
+        if rule:
+            timeframe = "1h"
+            if end is not None:
+                end = end.floor(rule) + pd.Timedelta(rule) - pd.Timedelta(1, "ns")
+        index = self.quality_index(symbol, timeframe)
+        return index.audit(start, end) if index is not None else None
+
+    def _refresh_resampled(self, symbol: str, source_before: Optional[str], since: pd.Timestamp):
+        """
+        Brings the materialized timeframes up to date after 1h candles from `since` on were
+        saved. Series built from the previous 1h state keep their buckets before `since` and
+        only the trailing ones are recomputed; any other series is rebuilt in full.
+        """
+        source = self._source_fingerprint(symbol)
+        for timeframe, rule in RESAMPLE_RULES.items():
+            root = self._resampled_dir(symbol, timeframe)
+            if source_before is not None and _resampled_source(root) == source_before:
+                cut = since.floor(rule)
+                tail = self._resample(self._load_from_parquet(symbol, "1h", start=cut), timeframe)
+                _write_resampled(root, tail, source, cut)
+            else:
+                bars = self._resample(self._load_from_parquet(symbol, "1h"), timeframe)
+                _write_resampled(root, bars, source)
+
+    def _load_resampled(self, symbol: str, timeframe: str, start: Optional[pd.Timestamp],
+                        end: Optional[pd.Timestamp], columns: Optional[Sequence[str]]) -> pd.DataFrame:
+        """Materialized bars of `timeframe`, rebuilt from 1h first if missing or stale."""
+        source = self._source_fingerprint(symbol)
+        if source is None:
+            return pd.DataFrame()
+        root = self._resampled_dir(symbol, timeframe)
+        if _resampled_source(root) != source:
+            bars = self._resample(self._load_from_parquet(symbol, "1h"), timeframe)
+            if bars.empty:
+                return bars
+            _write_resampled(root, bars, source)
+        files = _overlapping(sorted(root.glob("year=*/part-*.parquet")), start, end)
+        if not files:
+            return pd.DataFrame()
+        df = _read_files(files, start, end, list(columns) if columns is not None else OHLCV_COLUMNS)
+        ts = df.index.asi8
+        if len(ts) > 1 and not (np.diff(ts) > 0).all():
+            df = _merge(df, None) # raced a partition rewrite
+        return df
+
+    def _ipc_path(self, symbol: str, timeframe: str, source: str) -> Path:
+        return self.base_dir / "ipc" / f"{symbol.replace('/', '_')}_{timeframe}.{source}.arrow"
+
+    def _ipc_table(self, symbol: str, timeframe: str) -> Optional[pa.Table]:
+        """Memory-mapped IPC copy of the whole series, written first if there is none for its source."""
+        source = self._source_fingerprint(symbol)
+        if source is None:
+            return None
+        path = self._ipc_path(symbol, timeframe, source)
+        table = _map_ipc(path)
+        if table is not None:
+            return table
         if timeframe == "1h":
-             return self._load_from_parquet(symbol, "1h")
-        
+            df = self._load_from_parquet(symbol, "1h")
+        else:
+            df = self._load_resampled(symbol, timeframe, None, None, None)
+        if df.empty:
+            return None
+        _write_ipc(path, df, source)
+        self._drop_ipc_versions(symbol, timeframe, keep=path)
+        return _map_ipc(path)
+
+    def _refresh_ipc(self, symbol: str, source_before: Optional[str], since: pd.Timestamp):
+        """
+        Carries the IPC copies of the previous 1h state over to the current one after 1h
+        candles from `since` on were saved: their rows before the first affected bar are
+        taken from the mapping, and only the bars from it on are read from the store.
+        """
+        if source_before is None:
+            return
+        source = self._source_fingerprint(symbol)
+        for timeframe in ("1h", *RESAMPLE_RULES):
+            table = _map_ipc(self._ipc_path(symbol, timeframe, source_before))
+            if table is None:
+                continue
+            if timeframe == "1h":
+                cut = since
+                tail = self._load_from_parquet(symbol, "1h", start=cut)
+            else:
+                cut = since.floor(RESAMPLE_RULES[timeframe])
+                tail = self._load_resampled(symbol, timeframe, cut, None, None)
+            kept = _slice_frame(table, None, cut - pd.Timedelta(1, "ns"), None)
+            path = self._ipc_path(symbol, timeframe, source)
+            _write_ipc(path, pd.concat([kept, tail]), source)
+            del table, kept # release the old mapping before deleting it
+            self._drop_ipc_versions(symbol, timeframe, keep=path)
+
+    def _drop_ipc_versions(self, symbol: str, timeframe: str, keep: Path):
+        """Deletes the other versions of an IPC copy, best-effort."""
+        # Older versions may still be mapped by other readers (undeletable on Windows):
+        # whatever is left is retried on the next regeneration
+        for old in keep.parent.glob(f"{symbol.replace('/', '_')}_{timeframe}.*.arrow"):
+            if old != keep:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+    def load_ohlcv(self, symbol: str, timeframe: str, start: Any = None, end: Any = None,
+                   columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Loads OHLCV data, optionally only the bars in [start, end] (inclusive; tz-aware
+        bounds are taken in UTC) and a subset of the OHLCV columns. The range and columns are
+        pushed down to the reader: partition files outside the range are skipped and the
+        timestamp filter prunes row groups by their statistics. 4h/12h/1d come from their
+        materialized series (bars labeled in [start, end]); other timeframes are resampled
+        from 1h on the fly. With the IPC cache, 1h/4h/12h/1d are slices of its mapped copy.
+        """
+        start, end = _naive(start), _naive(end)
+        if self.ipc_cache and (timeframe == "1h" or timeframe in RESAMPLE_RULES):
+            table = self._ipc_table(symbol, timeframe)
+            return _slice_frame(table, start, end, columns) if table is not None else pd.DataFrame()
+        if timeframe == "1h":
+             return self._load_from_parquet(symbol, "1h", start, end, columns)
+        if timeframe in RESAMPLE_RULES:
+            return self._load_resampled(symbol, timeframe, start, end, columns)
+
         # Load 1h and resample
-        df_1h = self._load_from_parquet(symbol, "1h")
+        df_1h = self._load_from_parquet(symbol, "1h", start, end, columns)
         if df_1h.empty:
             return df_1h
-            
+
         return self._resample(df_1h, timeframe)
 
-    def _load_from_parquet(self, symbol: str, timeframe: str) -> pd.DataFrame:
-        file_path = self._get_file_path(symbol, timeframe)
-        if not file_path.exists():
-            return pd.DataFrame()
+    def _load_from_parquet(self, symbol: str, timeframe: str, start: Optional[pd.Timestamp] = None,
+                           end: Optional[pd.Timestamp] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        files = self.partition_files(symbol, timeframe, start, end)
+        if not files:
+            legacy = self._get_file_path(symbol, timeframe)
+            if self.partition_files(symbol, timeframe) or not legacy.exists():
+                return pd.DataFrame()
+            files = [legacy]
+        cols = list(columns) if columns is not None else OHLCV_COLUMNS
         try:
-            df = pd.read_parquet(file_path)
-            cols = ['open', 'high', 'low', 'close', 'volume']
+            df = _read_files(files, start, end, cols)
+            # A reader racing a partition rewrite may briefly see old and new files
+            ts = df.index.asi8
+            if len(ts) > 1 and not (np.diff(ts) > 0).all():
+                df = _merge(df, None)
             df[cols] = df[cols].astype(float)
             return df
         except Exception as e:
@@ -73,20 +423,151 @@ class DataStorage:
 
     def _resample(self, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
         """Resamples 1h data to higher timeframes."""
-        # Map CCXT/Standard timeframes to Pandas aliases
-        mapping = {"4h": "4h", "1d": "1D", "12h": "12h"}
-        alias = mapping.get(timeframe)
+        alias = RESAMPLE_RULES.get(timeframe)
         if not alias:
             logger.warning(f"Unsupported resampling timeframe: {timeframe}")
             return df
 
         resampler = df.resample(alias)
-        resampled_df = resampler.agg({
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).dropna()
-        
+        how = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+        resampled_df = resampler.agg({c: f for c, f in how.items() if c in df.columns}).dropna()
+
         return resampled_df
+
+
+def _merge(old: pd.DataFrame, new: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Sorted, duplicate-free union; on equal timestamps the later frame wins."""
+    combined = pd.concat([old, new]) if new is not None else old
+    combined = combined[~combined.index.duplicated(keep='last')]
+    return combined.sort_index()
+
+
+def _file_range(path: Path) -> Tuple[int, int]:
+    """(first, last) timestamp in ns of a partition file, from its name."""
+    first, last = path.stem[len("part-"):].split("-")
+    return int(first), int(last)
+
+
+def _overlapping(files: List[Path], start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> List[Path]:
+    """The partition files whose time range overlaps [start, end]."""
+    if start is None and end is None:
+        return files
+    lo = start.value if start is not None else np.iinfo(np.int64).min
+    hi = end.value if end is not None else np.iinfo(np.int64).max
+    return [f for f in files if _file_range(f)[0] <= hi and _file_range(f)[1] >= lo]
+
+
+def _naive(ts: Any) -> Optional[pd.Timestamp]:
+    """Bound as a naive (UTC wall time) timestamp, like the stored index."""
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert("UTC").tz_localize(None) if ts.tz is not None else ts
+
+
+def _read_files(files: List[Path], start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None,
+                columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    # The partition keys are in the paths only; the files hold timestamp + OHLCV
+    dataset = ds.dataset([str(f) for f in files], format="parquet", partitioning=None)
+    ts = ds.field("timestamp")
+    bounds = []
+    if start is not None:
+        bounds.append(ts >= pa.scalar(start.as_unit("ns").to_datetime64(), pa.timestamp("ns")))
+    if end is not None:
+        bounds.append(ts <= pa.scalar(end.as_unit("ns").to_datetime64(), pa.timestamp("ns")))
+    flt = bounds[0] & bounds[1] if len(bounds) == 2 else (bounds[0] if bounds else None)
+    cols = None if columns is None else ["timestamp"] + [c for c in columns if c != "timestamp"]
+    return dataset.to_table(columns=cols, filter=flt).to_pandas()
+
+
+def _read_timestamps(files: List[Path]) -> np.ndarray:
+    """The timestamp column alone, as int64 ns in stored order."""
+    dataset = ds.dataset([str(f) for f in files], format="parquet", partitioning=None)
+    column = dataset.to_table(columns=["timestamp"]).column(0)
+    return column.cast(pa.timestamp("ns")).cast(pa.int64()).to_numpy()
+
+
+def _resampled_source(root: Path) -> Optional[str]:
+    """Source fingerprint of a materialized series, or None if there is none."""
+    try:
+        return (root / "_source").read_text() or None
+    except OSError:
+        return None
+
+
+def _write_resampled(root: Path, bars: pd.DataFrame, source: str, cut: Optional[pd.Timestamp] = None):
+    """
+    Writes a materialized series into its yearly partitions. With `cut`, `bars` replace the
+    stored bars from `cut` on and only the partitions reaching `cut` are rewritten; without
+    it, they replace the whole series. The fingerprint is recorded last, so an interrupted
+    write leaves the series stale (rebuilt on the next load) rather than half-refreshed.
+    """
+    stale = [f for f in sorted(root.glob("year=*/part-*.parquet")) if cut is None or _file_range(f)[1] >= cut.value]
+    if cut is not None and stale:
+        kept = _read_files(stale)
+        bars = pd.concat([kept[kept.index < cut], bars])
+    written = set()
+    if not bars.empty:
+        for year, part in bars.groupby(bars.index.year, sort=True):
+            written.add(_write_file(root / f"year={year}", part))
+    for f in stale:
+        if f not in written:
+            f.unlink()
+    _stamp_resampled(root, source)
+
+
+def _stamp_resampled(root: Path, source: str):
+    """Records the source fingerprint of a materialized series (atomically)."""
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f"._source.{os.getpid()}.tmp"
+    tmp.write_text(source)
+    os.replace(tmp, root / "_source")
+
+
+def _map_ipc(path: Path) -> Optional[pa.Table]:
+    """Zero-copy table over a memory-mapped IPC file, or None if it is missing or unreadable."""
+    if not path.exists():
+        return None
+    try:
+        return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def _write_ipc(path: Path, df: pd.DataFrame, source: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(df.astype(np.float64), preserve_index=True)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: source.encode()})
+    # Per-process temp name: workers may regenerate the same copy concurrently
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, str(tmp), compression="uncompressed")
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Another worker wrote (and mapped) the same version first
+        tmp.unlink(missing_ok=True)
+        if not path.exists():
+            raise
+
+
+def _slice_frame(table: pa.Table, start: Optional[pd.Timestamp], end: Optional[pd.Timestamp],
+                 columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    """Bars in [start, end] of a time-ordered table, located by binary search (no scan)."""
+    ts = table.column("timestamp").to_numpy()
+    lo = int(np.searchsorted(ts, start.as_unit("ns").to_datetime64(), side="left")) if start is not None else 0
+    hi = int(np.searchsorted(ts, end.as_unit("ns").to_datetime64(), side="right")) if end is not None else len(ts)
+    table = table.slice(lo, max(hi - lo, 0))
+    if columns is not None:
+        table = table.select(["timestamp"] + [c for c in columns if c != "timestamp"])
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_file(part_dir: Path, df: pd.DataFrame) -> Path:
+    """Writes one partition file atomically (temp file + rename) and returns its path."""
+    part_dir.mkdir(parents=True, exist_ok=True)
+    ts = df.index.as_unit("ns").asi8
+    path = part_dir / f"part-{ts[0]:019d}-{ts[-1]:019d}.parquet"
+    tmp = part_dir / f".{path.name}.tmp"
+    df.to_parquet(tmp, compression='snappy', row_group_size=ROW_GROUP_ROWS)
+    os.replace(tmp, path)
+    return path
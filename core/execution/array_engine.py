@@ -0,0 +1,194 @@
+from dataclasses import dataclass, field
+from typing import List, NamedTuple, Optional
+import numpy as np
+from core.config import settings
+from core.execution.exits import (ExitRule, tp_sl_levels, KIND_STOP_LOSS, KIND_TAKE_PROFIT,
+                                  KIND_TRAILING_STOP, KIND_TIME_STOP)
+
+# Fill kinds emitted by the kernel (risk exits are defined in exits)
+KIND_ENTRY = 1
+KIND_SIGNAL_EXIT = -1
+
+_DUST = 1e-9
+
+
+class Fill(NamedTuple):
+    bar: int
+    kind: int
+    price: float
+    amount: float
+    cost: float
+    fee: float
+    cash_before: float
+    cash_after: float
+    pos_before: float
+    pos_after: float
+
+
+@dataclass
+class ArrayRunResult:
+    equity: np.ndarray
+    fills: List[Fill] = field(default_factory=list)
+    candles_in_market: int = 0
+    candles_in_loss: int = 0
+    max_latent_dd: float = 0.0
+    max_locked_capital: float = 0.0
+    trade_durations: List[float] = field(default_factory=list)
+
+
+def _scalar_tail(res: ArrayRunResult, close, high, low, signal, start: int, cash: float, fee: float,
+                 rule: ExitRule, timestamps):
+    """Bar-by-bar replica of the reference loop from `start` (flat) to the end."""
+    equity = res.equity
+    amt, entry, trade_start, peak = 0.0, 0.0, None, 0.0
+    prev = int(signal[start - 1]) if start > 0 else 0
+    for i in range(start, len(close)):
+        price = close[i]
+        if amt > _DUST:
+            hit = rule.check_bar(entry, peak, i - trade_start, high[i], low[i], price)
+            if hit is not None:
+                kind, exit_price = hit
+                cost = amt * exit_price
+                fee_paid = cost * fee
+                cash_before = cash
+                cash += (cost - fee_paid)
+                res.fills.append(Fill(i, kind, exit_price, amt, cost, fee_paid, cash_before, cash, amt, 0.0))
+                amt, entry = 0.0, 0.0
+                if trade_start is not None and timestamps is not None:
+                    res.trade_durations.append(float(timestamps[i] - timestamps[trade_start]) / 3.6e12)
+                trade_start = None
+            else:
+                peak = max(peak, high[i])
+
+        if prev == 1 and amt <= _DUST:
+            qty = (cash * 0.98) / price
+            if qty > 0:
+                cost = qty * price
+                fee_paid = cost * fee
+                cash_before = cash
+                cash -= (cost + fee_paid)
+                new_amt = amt + qty
+                entry = ((amt * entry) + (qty * price)) / new_amt
+                res.fills.append(Fill(i, KIND_ENTRY, price, qty, cost, fee_paid,
+                                      cash_before, cash, amt, new_amt))
+                amt = new_amt
+                trade_start, peak = i, entry
+        elif prev == -1 and amt > _DUST:
+            cost = amt * price
+            fee_paid = cost * fee
+            cash_before = cash
+            cash += (cost - fee_paid)
+            res.fills.append(Fill(i, KIND_SIGNAL_EXIT, price, amt, cost, fee_paid,
+                                  cash_before, cash, amt, 0.0))
+            amt, entry = 0.0, 0.0
+            if trade_start is not None and timestamps is not None:
+                res.trade_durations.append(float(timestamps[i] - timestamps[trade_start]) / 3.6e12)
+            trade_start = None
+
+        prev = int(signal[i])
+        equity[i] = cash + (amt * price)
+        if amt > 0:
+            res.candles_in_market += 1
+            res.max_locked_capital = max(res.max_locked_capital, amt * price)
+            open_pnl = (price - entry) / entry
+            if open_pnl < 0:
+                res.candles_in_loss += 1
+                res.max_latent_dd = min(res.max_latent_dd, open_pnl)
+
+
+def simulate(close: np.ndarray, high: np.ndarray, low: np.ndarray, signal: np.ndarray,
+             initial_capital: float = settings.INITIAL_CAPITAL, fee: float = settings.TAKER_FEE,
+             tp_type: Optional[str] = None, tp_value: Optional[float] = None,
+             sl_type: Optional[str] = None, sl_value: Optional[float] = None,
+             timestamps: Optional[np.ndarray] = None, trail_type: Optional[str] = None,
+             trail_value: Optional[float] = None, time_stop: Optional[int] = None) -> ArrayRunResult:
+    """
+    Long-only T+1 execution over contiguous arrays.
+    Reproduces the reference loop in `run_backtest`: a signal at bar T is acted on
+    at the close of T+1, risk exits (ExitRule: TP/SL, trailing and time stops) are checked
+    intrabar before signals (stops win ties), entries use 98% of cash and every fill pays
+    `fee` on its notional.
+    Jumps from event to event instead of stepping through every bar.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    signal = np.nan_to_num(np.asarray(signal, dtype=np.float64)).astype(np.int64)
+    n = len(close)
+
+    equity = np.empty(n, dtype=np.float64)
+    res = ArrayRunResult(equity=equity)
+    if n == 0:
+        return res
+
+    rule = ExitRule(tp_type, tp_value, sl_type, sl_value, trail_type, trail_value, time_stop)
+    use_exits = rule.active
+
+    # Bars where the previous candle's signal asks for an entry / exit
+    entry_bars = np.flatnonzero(signal[:-1] == 1) + 1
+    exit_bars = np.flatnonzero(signal[:-1] == -1) + 1
+
+    cash = float(initial_capital)
+    i = 0
+    while i < n:
+        # Flat until the next entry bar
+        e_pos = np.searchsorted(entry_bars, i)
+        j = int(entry_bars[e_pos]) if e_pos < len(entry_bars) else n
+        equity[i:j] = cash
+        if j >= n:
+            break
+
+        price = close[j]
+        qty = (cash * 0.98) / price
+        if not qty > _DUST:
+            # Ruined account: dust positions bypass TP/SL and exits in the reference
+            _scalar_tail(res, close, high, low, signal, j, cash, fee, rule, timestamps)
+            break
+        cost = qty * price
+        fee_paid = cost * fee
+        cash_before = cash
+        cash -= (cost + fee_paid)
+        entry_price = (qty * price) / qty
+        res.fills.append(Fill(j, KIND_ENTRY, price, qty, cost, fee_paid,
+                              cash_before, cash, 0.0, qty))
+
+        # In market from j; the exit is the first risk exit or exit signal after j
+        x_pos = np.searchsorted(exit_bars, j, side="right")
+        k_sig = int(exit_bars[x_pos]) if x_pos < len(exit_bars) else n
+        k_hit = -1
+        if use_exits:
+            k_hit, hit_kind, hit_price = rule.first_exit(high, low, close, j, entry_price, min(k_sig + 1, n))
+        k = k_hit if k_hit >= 0 else k_sig
+
+        held = close[j:k]
+        equity[j:k] = cash + qty * held
+        res.candles_in_market += len(held)
+        res.max_locked_capital = max(res.max_locked_capital, float(np.max(qty * held)))
+        open_pnl = (held - entry_price) / entry_price
+        losing = open_pnl[open_pnl < 0]
+        if len(losing):
+            res.candles_in_loss += len(losing)
+            res.max_latent_dd = min(res.max_latent_dd, float(losing.min()))
+
+        if k >= n:
+            break
+
+        if k_hit >= 0:
+            kind, exit_price = hit_kind, hit_price
+        else:
+            kind = KIND_SIGNAL_EXIT
+            exit_price = close[k]
+        cost = qty * exit_price
+        fee_paid = cost * fee
+        cash_before = cash
+        cash += (cost - fee_paid)
+        res.fills.append(Fill(k, kind, exit_price, qty, cost, fee_paid,
+                              cash_before, cash, qty, 0.0))
+        if timestamps is not None:
+            res.trade_durations.append(float(timestamps[k] - timestamps[j]) / 3.6e12)
+
+        # A risk exit frees the bar for a same-bar re-entry; a signal exit does not
+        equity[k] = cash
+        i = k if kind != KIND_SIGNAL_EXIT else k + 1
+
+    return res
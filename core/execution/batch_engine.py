@@ -0,0 +1,175 @@
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from core.config import settings
+from core.execution.exits import ExitRule
+from core.strategies.base import Bars
+from core.strategies.ensemble import ENSEMBLE_ID, ensemble_signal_matrix
+from core.strategies.factory import StrategyFactory
+from core.utils.sim_logging import quiet_simulation
+
+_DUST = 1e-9
+
+
+@dataclass
+class BatchRunResult:
+    final_equity: np.ndarray
+    total_return: np.ndarray
+    max_drawdown: np.ndarray
+    sharpe: np.ndarray
+    total_trades: np.ndarray
+    time_in_market_pct: np.ndarray
+    equity: Optional[np.ndarray] = None # (bars, sets), only when requested
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """{'fast_period': [10, 20], 'slow_period': [50]} -> list of param dicts (cartesian product)."""
+    keys = list(grid.keys())
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def signal_matrix(df: pd.DataFrame, strategy_id: str, param_sets: List[Dict[str, Any]]) -> np.ndarray:
+    """Stacks each parameter set's signal array into a (bars, sets) int8 matrix."""
+    bars = Bars.from_frame(df)
+    with quiet_simulation(): # thousands of strategy instances: counted, not logged
+        if strategy_id == ENSEMBLE_ID:
+            # One shared DAG: legs common to several ensembles are computed once
+            return ensemble_signal_matrix(bars, param_sets)
+        sig = np.zeros((len(df), len(param_sets)), dtype=np.int8)
+        for j, params in enumerate(param_sets):
+            sig[:, j] = StrategyFactory.get_strategy(strategy_id, params).compute(bars).signal
+        return sig
+
+
+def simulate_batch(close: np.ndarray, high: np.ndarray, low: np.ndarray, signals: np.ndarray,
+                   initial_capital: float = settings.INITIAL_CAPITAL, fee: float = settings.TAKER_FEE,
+                   tp_type: Optional[str] = None, tp_value: Optional[float] = None,
+                   sl_type: Optional[str] = None, sl_value: Optional[float] = None,
+                   keep_equity: bool = False, trail_type: Optional[str] = None,
+                   trail_value: Optional[float] = None, time_stop: Optional[int] = None) -> BatchRunResult:
+    """
+    Runs every column of `signals` through the T+1 long-only state machine at once.
+    Same fill rules as `array_engine.simulate`, risk exits included (TP/SL, trailing and
+    time stops); each bar is a handful of NumPy ops over all parameter sets, and metrics are
+    accumulated online so no (bars, sets) equity matrix is kept unless `keep_equity` is set.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    signals = np.ascontiguousarray(signals, dtype=np.int8)
+    n, m = signals.shape
+
+    use_sl = sl_type in ["percent", "absolute"] and sl_value is not None
+    use_tp = tp_type in ["percent", "absolute"] and tp_value is not None
+    rule = ExitRule(tp_type, tp_value, sl_type, sl_value, trail_type, trail_value, time_stop)
+
+    cash = np.full(m, float(initial_capital))
+    qty = np.zeros(m)
+    entry = np.zeros(m)
+    sl = np.full(m, -1.0)
+    tp = np.full(m, 1e9)
+    prev = np.zeros(m, dtype=np.int8)
+    high_since = np.zeros(m) # highest high since entry, before the current bar
+    entry_bar = np.zeros(m, dtype=np.int64)
+
+    trades = np.zeros(m, dtype=np.int64)
+    in_market = np.zeros(m, dtype=np.int64)
+    peak = np.full(m, -np.inf)
+    max_dd = np.zeros(m)
+    ret_sum = np.zeros(m)
+    ret_sq = np.zeros(m)
+    first_eq = None
+    prev_eq = None
+    equity_out = np.empty((n, m)) if keep_equity else None
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(n):
+            price = close[i]
+
+            # 1. Intrabar risk exits on open positions (stops win ties, then TP, then time)
+            if rule.active:
+                holding = qty > _DUST
+                stop = np.maximum(sl, rule.trail_stop(high_since)) if rule.trailing else sl
+                hit_stop = holding & (low[i] <= stop)
+                hit_tp = holding & ~hit_stop & (high[i] >= tp)
+                hit = hit_stop | hit_tp
+                if time_stop:
+                    hit |= holding & (i - entry_bar >= time_stop)
+                if rule.trailing:
+                    high_since = np.where(holding & ~hit, np.maximum(high_since, high[i]), high_since)
+                if hit.any():
+                    px = np.where(hit_stop, stop, np.where(hit_tp, tp, price))
+                    cost = qty * px
+                    cash = np.where(hit, cash + (cost - cost * fee), cash)
+                    qty = np.where(hit, 0.0, qty)
+                    entry = np.where(hit, 0.0, entry)
+                    trades += hit
+
+            # 2. Previous bar's signal at this close
+            buy = (prev == 1) & (qty <= _DUST)
+            if buy.any():
+                q = (cash * 0.98) / price
+                buy &= q > 0
+                cost = q * price
+                new_qty = qty + q
+                entry = np.where(buy, ((qty * entry) + (q * price)) / new_qty, entry)
+                cash = np.where(buy, cash - (cost + cost * fee), cash)
+                qty = np.where(buy, new_qty, qty)
+                trades += buy
+                if use_sl:
+                    sl = np.where(buy, entry * (1 - sl_value / 100) if sl_type == "percent" else sl_value, sl)
+                if use_tp:
+                    tp = np.where(buy, entry * (1 + tp_value / 100) if tp_type == "percent" else tp_value, tp)
+                high_since = np.where(buy, entry, high_since)
+                entry_bar = np.where(buy, i, entry_bar)
+            sell = (prev == -1) & (qty > _DUST)
+            if sell.any():
+                cost = qty * price
+                cash = np.where(sell, cash + (cost - cost * fee), cash)
+                qty = np.where(sell, 0.0, qty)
+                entry = np.where(sell, 0.0, entry)
+                trades += sell
+            prev = signals[i]
+
+            # 3. Online metrics
+            eq = cash + (qty * price)
+            in_market += qty > 0
+            peak = np.maximum(peak, eq)
+            max_dd = np.minimum(max_dd, (eq - peak) / peak)
+            if prev_eq is None:
+                first_eq = eq
+            else:
+                r = eq / prev_eq - 1
+                ret_sum += r
+                ret_sq += r * r
+            prev_eq = eq
+            if keep_equity:
+                equity_out[i] = eq
+
+        final = prev_eq if prev_eq is not None else cash
+        first = first_eq if first_eq is not None else cash
+        k = max(n - 1, 1)
+        mean = ret_sum / k
+        var = (ret_sq - k * mean * mean) / max(k - 1, 1)
+        std = np.sqrt(np.maximum(var, 0.0))
+        sharpe = np.where(std > 0, mean / std * np.sqrt(8760), 0.0)
+
+    return BatchRunResult(
+        final_equity=final,
+        total_return=(final - first) / first * 100,
+        max_drawdown=max_dd * 100,
+        sharpe=np.nan_to_num(sharpe, nan=0.0, posinf=0.0, neginf=0.0),
+        total_trades=trades,
+        time_in_market_pct=in_market / max(n, 1) * 100,
+        equity=equity_out,
+    )
+
+
+def run_batch(df: pd.DataFrame, strategy_id: str, param_sets: List[Dict[str, Any]], **kwargs) -> BatchRunResult:
+    """Signal matrix + batched simulation over an OHLCV frame."""
+    close = df['close'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64) if 'high' in df.columns else close
+    low = df['low'].to_numpy(dtype=np.float64) if 'low' in df.columns else close
+    return simulate_batch(close, high, low, signal_matrix(df, strategy_id, param_sets), **kwargs)
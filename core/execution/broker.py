@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
-from core.core.models import Order, Position, Trade
+from typing import Dict, Union
+from core.core.models import Order
+from core.core.records import OrderRecord, PositionRecord
 
 class Broker(ABC):
     @abstractmethod
@@ -9,11 +10,11 @@ class Broker(ABC):
         pass
 
     @abstractmethod
-    def get_positions(self) -> Dict[str, Position]:
+    def get_positions(self) -> Dict[str, PositionRecord]:
         pass
     
     @abstractmethod
-    def create_order(self, order: Order) -> Order:
+    def create_order(self, order: Union[Order, OrderRecord]) -> Union[Order, OrderRecord]:
         pass
     
     @abstractmethod
@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+
+# Exit kinds (fill kinds shared with array_engine)
+KIND_STOP_LOSS = 2
+KIND_TAKE_PROFIT = 3
+KIND_TRAILING_STOP = 4
+KIND_TIME_STOP = 5
+
+# SignalInfo trigger / side per exit kind
+EXIT_TRIGGERS = {
+    KIND_STOP_LOSS: "STOP_LOSS",
+    KIND_TAKE_PROFIT: "TAKE_PROFIT",
+    KIND_TRAILING_STOP: "TRAILING_STOP",
+    KIND_TIME_STOP: "TIME_STOP",
+}
+
+_SCAN_CHUNK = 256
+_NO_HIT = (-1, 0, float("nan"))
+
+
+def _enabled(kind: Optional[str], value: Optional[float]) -> bool:
+    return kind in ["percent", "absolute"] and value is not None
+
+
+def tp_sl_levels(entry_price: float, tp_type: Optional[str], tp_value: Optional[float],
+                 sl_type: Optional[str], sl_value: Optional[float]):
+    """Returns (sl_price, tp_price) with the same sentinels as the reference loop."""
+    sl_price = -1.0
+    if _enabled(sl_type, sl_value):
+        sl_price = entry_price * (1 - sl_value / 100) if sl_type == "percent" else sl_value
+    tp_price = 1e9
+    if _enabled(tp_type, tp_value):
+        tp_price = entry_price * (1 + tp_value / 100) if tp_type == "percent" else tp_value
+    return sl_price, tp_price
+
+
+@dataclass(frozen=True)
+class ExitRule:
+    """
+    Risk exits of a long position, checked intrabar before the strategy's signals:
+    fixed TP/SL (percent of entry or absolute price), a trailing stop below the highest
+    high since entry (percent or absolute distance) and a time stop at the close of the
+    `time_stop`-th bar after entry. When a stop and the TP are both touched in one bar the
+    stop wins (worst case); stops fill at their level, the time stop at the close.
+    """
+    tp_type: Optional[str] = None
+    tp_value: Optional[float] = None
+    sl_type: Optional[str] = None
+    sl_value: Optional[float] = None
+    trail_type: Optional[str] = None
+    trail_value: Optional[float] = None
+    time_stop: Optional[int] = None # bars
+
+    @property
+    def trailing(self) -> bool:
+        return _enabled(self.trail_type, self.trail_value)
+
+    @property
+    def active(self) -> bool:
+        return (_enabled(self.tp_type, self.tp_value) or _enabled(self.sl_type, self.sl_value)
+                or self.trailing or bool(self.time_stop))
+
+    def levels(self, entry_price: float) -> Tuple[float, float]:
+        return tp_sl_levels(entry_price, self.tp_type, self.tp_value, self.sl_type, self.sl_value)
+
+    def trail_stop(self, peak):
+        """Trailing stop level below `peak` (scalar or array); the SL sentinel when disabled."""
+        if not self.trailing:
+            return -1.0 if np.ndim(peak) == 0 else np.full(np.shape(peak), -1.0)
+        if self.trail_type == "percent":
+            return peak * (1 - self.trail_value / 100)
+        return peak - self.trail_value
+
+    def check_bar(self, entry_price: float, peak: float, held: int, high: float, low: float,
+                  close: float) -> Optional[Tuple[int, float]]:
+        """
+        Scalar check of one bar for per-candle loops: (kind, price) or None. `peak` is the
+        highest high before this bar since entry (at least the entry price), `held` the bars
+        elapsed since the entry bar.
+        """
+        sl_price, tp_price = self.levels(entry_price)
+        trail = self.trail_stop(peak)
+        stop = max(sl_price, trail)
+        if low <= stop:
+            return (KIND_TRAILING_STOP if trail > sl_price else KIND_STOP_LOSS), stop
+        if high >= tp_price:
+            return KIND_TAKE_PROFIT, tp_price
+        if self.time_stop and held >= self.time_stop:
+            return KIND_TIME_STOP, close
+        return None
+
+    def first_exit(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, entry_bar: int,
+                   entry_price: float, stop: int) -> Tuple[int, int, float]:
+        """
+        First exit in bars (entry_bar, stop) as (bar, kind, price), or (-1, 0, nan).
+        Scans in growing chunks so the cost is proportional to the holding period; the
+        trailing level of each bar comes from the running maximum of the highs before it.
+        """
+        start = entry_bar + 1
+        timed = entry_bar + self.time_stop if self.time_stop else stop
+        end = min(stop, timed + 1)
+        sl_price, tp_price = self.levels(entry_price)
+        peak = entry_price
+        chunk = _SCAN_CHUNK
+        i = start
+        while i < end:
+            j = min(i + chunk, end)
+            h = high[i:j]
+            lows = low[i:j]
+            if self.trailing:
+                prior = np.maximum.accumulate(np.concatenate(([peak], h[:-1])))
+                trail = self.trail_stop(prior)
+                level = np.maximum(trail, sl_price)
+                peak = max(prior[-1], h[-1])
+            else:
+                level = sl_price
+            stop_hit = lows <= level
+            hit = stop_hit | (h >= tp_price)
+            k = int(np.argmax(hit))
+            if hit[k]:
+                if stop_hit[k]:
+                    if self.trailing and trail[k] > sl_price:
+                        return i + k, KIND_TRAILING_STOP, float(trail[k])
+                    return i + k, KIND_STOP_LOSS, sl_price
+                return i + k, KIND_TAKE_PROFIT, tp_price
+            i = j
+            chunk *= 2
+        if timed < stop:
+            return timed, KIND_TIME_STOP, float(close[timed])
+        return _NO_HIT
+
+
+def find_exits(high: np.ndarray, low: np.ndarray, close: np.ndarray, entries: np.ndarray,
+               entry_prices: np.ndarray, rule: ExitRule,
+               stops: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Risk exits of independent trades: for each entry bar/price, the first exit before its
+    `stops` bar (default: end of data). Returns (bars, kinds, prices); bar -1 = no exit.
+    """
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.int64)
+    stops = np.full(len(entries), len(close), dtype=np.int64) if stops is None else np.asarray(stops, dtype=np.int64)
+    bars = np.full(len(entries), -1, dtype=np.int64)
+    kinds = np.zeros(len(entries), dtype=np.int8)
+    prices = np.full(len(entries), np.nan)
+    for t, (e, p, s) in enumerate(zip(entries.tolist(), np.asarray(entry_prices, dtype=np.float64).tolist(),
+                                      stops.tolist())):
+        bars[t], kinds[t], prices[t] = rule.first_exit(high, low, close, e, p, min(s, len(close)))
+    return bars, kinds, prices
@@ -0,0 +1,355 @@
+"""
+Incremental backtests resumed from persisted checkpoints.
+
+A checkpoint for (symbol, timeframe, strategy, params, capital, fee) holds the broker state,
+the ledger offset, the last processed timestamp and a warm-up tail (the last OHLCV bars with
+their signals). When the dataset has grown, only the new bars are simulated: signals are
+recomputed over tail + new bars, and the run continues from the saved broker. Anything that
+doesn't line up (history revised, tail too short for the strategy's indicators) falls back to
+a full replay. The bar index, equity curve and ledger rows of every run are appended to
+append-only history columns, so a resume reads the warm-up tail and the new bars from storage
+and writes only the new bars' history; the full history is read only when asked for.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from core.config import settings
+from core.core.models import Side
+from core.execution.ledger import TradeLedger
+from core.execution.portfolio import ffill
+from core.execution.simulated_broker import SimulatedBroker
+from core.strategies.base import Bars
+from core.strategies.factory import StrategyFactory
+from core.utils.logger import logger
+from core.utils.sim_logging import current_stats, quiet_simulation
+
+CHECKPOINT_VERSION = 3
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+@dataclass
+class IncrementalRun:
+    """
+    Result of run_incremental. `index`, `equity` and `ledger` cover every bar so far; after a
+    resume they are read from the checkpoint's history on first access.
+    """
+    bars: int # bars in the dataset
+    resumed_bars: int # bars taken from the checkpoint (0 = full replay)
+    new_bars: int # bars simulated by this run
+    first_close: float # closes of the dataset's first and last bars (buy & hold benchmark)
+    last_close: float
+    stats: Dict[str, Any] = field(default_factory=dict) # SimStats summary of the run
+    history: Optional[Callable[[], Tuple[pd.DatetimeIndex, np.ndarray, TradeLedger]]] = field(default=None, repr=False)
+    _history: Optional[Tuple[pd.DatetimeIndex, np.ndarray, TradeLedger]] = field(default=None, init=False, repr=False)
+
+    def _full(self) -> Tuple[pd.DatetimeIndex, np.ndarray, TradeLedger]:
+        if self._history is None:
+            self._history = self.history()
+        return self._history
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return self._full()[0]
+
+    @property
+    def equity(self) -> np.ndarray:
+        return self._full()[1]
+
+    @property
+    def ledger(self) -> TradeLedger:
+        return self._full()[2]
+
+
+def checkpoint_key(symbol: str, timeframe: str, strategy_id: str, params: Dict[str, Any],
+                   initial_capital: float, fee: float) -> str:
+    payload = json.dumps([symbol, timeframe, strategy_id, params or {}, float(initial_capital), float(fee)],
+                         sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+class CheckpointStore:
+    """
+    One checkpoint per key: `<key>.npz` (warm-up tail), `<key>.json` (broker state and
+    metadata) and `<key>.history/` (one append-only raw file per history column: `index`,
+    `equity` and the `ledger_*` columns). The JSON is written last and names the bar count and
+    the length of every history column it belongs to: a tail torn by a crash between the
+    writes is detected on load and only costs a replay, and history rows past the recorded
+    lengths are ignored and cut off by the next append.
+    """
+    def __init__(self, base_dir: Path = settings.CHECKPOINT_DIR):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.base_dir / f"{key}.json", self.base_dir / f"{key}.npz"
+
+    def _history_dir(self, key: str) -> Path:
+        return self.base_dir / f"{key}.history"
+
+    def append_history(self, key: str, lengths: Dict[str, int], columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        Appends `columns` to the history files, each first cut back to its recorded length in
+        `lengths` (0 if absent). Returns the new {name: [dtype, length]} for the metadata.
+        """
+        root = self._history_dir(key)
+        root.mkdir(parents=True, exist_ok=True)
+        out = {}
+        for name, values in columns.items():
+            values = np.ascontiguousarray(values)
+            n = int(lengths.get(name, 0))
+            with open(root / f"{name}.bin", "ab") as f:
+                f.truncate(n * values.itemsize)
+                f.write(values.tobytes())
+            out[name] = [values.dtype.str, n + len(values)]
+        return out
+
+    def load_history(self, key: str, history: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """The history columns described by a checkpoint's metadata, at their recorded lengths."""
+        root = self._history_dir(key)
+        out = {}
+        for name, (dtype, n) in history.items():
+            values = np.fromfile(root / f"{name}.bin", dtype=np.dtype(dtype), count=n)
+            if len(values) != n:
+                raise ValueError(f"History column {name} of {key} is shorter than recorded")
+            out[name] = values
+        return out
+
+    def _history_complete(self, key: str, history: Dict[str, Any]) -> bool:
+        root = self._history_dir(key)
+        for name, (dtype, n) in history.items():
+            path = root / f"{name}.bin"
+            if not path.exists() or path.stat().st_size < n * np.dtype(dtype).itemsize:
+                return False
+        return True
+
+    def save(self, key: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        meta_path, arrays_path = self._paths(key)
+        tmp = arrays_path.with_name(arrays_path.stem + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, arrays_path)
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_path)
+
+    def load(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        meta_path, arrays_path = self._paths(key)
+        if not meta_path.exists() or not arrays_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            with np.load(arrays_path, allow_pickle=False) as data:
+                arrays = {k: data[k] for k in data.files}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Checkpoint {key} unreadable, ignoring: {e}")
+            return None
+        if meta.get("version") != CHECKPOINT_VERSION:
+            return None
+        if int(arrays.get("bars", -1)) != meta["bars"] or not self._history_complete(key, meta["history"]):
+            logger.warning(f"Checkpoint {key} torn by an interrupted save, ignoring")
+            return None
+        return meta, arrays
+
+    def delete(self, key: str):
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+        for path in self._history_dir(key).glob("*.bin"):
+            path.unlink()
+
+
+def _signals(df: pd.DataFrame, strategy_id: str, params: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    out = StrategyFactory.get_strategy(strategy_id, params).compute(Bars.from_frame(df))
+    return np.asarray(out.signal, dtype=np.int8), out.indicators
+
+
+def _ns(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("ns").asi8
+
+
+def _ohlcv(df: pd.DataFrame) -> np.ndarray:
+    return np.column_stack([df[c].to_numpy(dtype=np.float64) if c in df.columns else np.zeros(len(df))
+                            for c in OHLCV])
+
+
+def step_broker(broker: SimulatedBroker, symbol: str, index: pd.DatetimeIndex, close: np.ndarray,
+                prev_signal: np.ndarray, start: int, snapshots=None) -> np.ndarray:
+    """
+    Same rules as the single-symbol broker loop (_simple_backtest): the previous bar's signal
+    acts at this close, entries with 98% of cash, exits sell everything. The broker is only
+    stepped where a signal can act; returns the equity of bars[start:], rebuilt from the fills.
+    `snapshots` (a SnapshotIndex) is handed the broker before each event and at the end.
+    """
+    pos = broker.positions.get(symbol)
+    amt = pos.amount if pos else 0.0
+    start_cash, start_amt = broker.cash, amt
+    cash = np.full(len(close) - start, np.nan)
+    held = np.full(len(close) - start, np.nan)
+    for t in (start + np.flatnonzero(prev_signal[start:] != 0)).tolist():
+        if snapshots is not None:
+            snapshots.capture_until(t, broker)
+        price = float(close[t])
+        if prev_signal[t] == 1 and amt <= 1e-9:
+            qty = (broker.cash * 0.98) / price
+            if qty <= 0:
+                continue
+            side = Side.BUY
+        elif prev_signal[t] == -1 and amt > 1e-9:
+            side, qty = Side.SELL, amt
+        else:
+            continue
+        if broker.fill_market(symbol, side, qty, price, index[t]) is None:
+            continue
+        amt = broker.positions[symbol].amount
+        cash[t - start] = broker.cash
+        held[t - start] = amt
+    if snapshots is not None:
+        snapshots.capture_until(len(close), broker)
+    return ffill(cash, start_cash) + ffill(held, start_amt) * close[start:]
+
+
+@quiet_simulation("incremental")
+def run_incremental(df: Union[pd.DataFrame, Callable[[Optional[pd.Timestamp]], pd.DataFrame]], symbol: str,
+                    timeframe: str, strategy_id: str, params: Dict[str, Any],
+                    initial_capital: float = settings.INITIAL_CAPITAL, fee: Optional[float] = None,
+                    warmup_bars: int = 500, store: Optional[CheckpointStore] = None) -> IncrementalRun:
+    """
+    Backtests `df` (sorted OHLCV, DatetimeIndex), resuming from the stored checkpoint when
+    `df` extends the dataset it was taken on, and saves a new checkpoint at the last bar.
+    `df` may also be a loader: `df(start)` returns the stored bars from timestamp `start` on
+    (None = all of them), and is asked for the checkpoint's warm-up tail onwards first.
+
+    `warmup_bars` is how much history is kept to recompute signals for new bars; it must
+    cover the strategy's longest lookback. On resume, the signals and indicators recomputed
+    over the second half of the tail must reproduce the stored ones (indicators to 1e-6 of their
+    scale, which lets recursive EMA/RMA seeds fade out), otherwise the run replays from bar 0.
+    """
+    store = store or CheckpointStore()
+    fee = settings.TAKER_FEE if fee is None else fee
+    key = checkpoint_key(symbol, timeframe, strategy_id, params, initial_capital, fee)
+    load = df if callable(df) else (lambda start: df if start is None else df.loc[start:])
+
+    # `frame` holds dataset bars [offset, n); positions below are relative to it
+    checkpoint = store.load(key)
+    resumed = frame = None
+    if checkpoint is not None:
+        meta, arrays = checkpoint
+        offset = int(meta["bars"]) - len(arrays["tail_index"])
+        frame = load(pd.Timestamp(int(meta["tail_timestamp"])))
+        resumed = _resume(checkpoint, frame, offset, strategy_id, params)
+    if resumed is not None:
+        broker, start, (signal, indicators) = resumed
+        lengths = {name: n for name, (_, n) in meta["history"].items()}
+        ledger_offset = int(meta["ledger_rows"])
+        first_close = float(meta["first_close"])
+        logger.info(f"Resuming {symbol} {timeframe} {strategy_id} at bar {offset + start} ({len(frame) - start} new)")
+    else:
+        frame = load(None)
+        offset, start, lengths, ledger_offset = 0, 0, {}, 0
+        broker = SimulatedBroker(initial_capital=initial_capital)
+        broker.taker_fee = fee
+        signal, indicators = _signals(frame, strategy_id, params)
+        first_close = float(frame["close"].iloc[0]) if len(frame) else float("nan")
+
+    m = len(frame)
+    close = frame["close"].to_numpy(dtype=np.float64)
+    prev_signal = np.zeros(m, dtype=np.int8)
+    prev_signal[1:] = signal[:-1]
+    equity = step_broker(broker, symbol, frame.index, close, prev_signal, start)
+
+    if m:
+        tail = slice(max(m - warmup_bars, 0), m)
+        history = store.append_history(key, lengths, {
+            "index": _ns(frame.index[start:]),
+            "equity": equity,
+            **{f"ledger_{k}": v for k, v in broker.trades.columns().items()},
+        })
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "symbol": symbol, "timeframe": timeframe, "strategy": strategy_id, "params": params,
+            "bars": offset + m,
+            "last_timestamp": int(frame.index[-1].value),
+            "tail_timestamp": int(frame.index[tail.start].value),
+            "first_close": first_close,
+            "broker": broker.state_dict(),
+            "ledger_rows": ledger_offset + len(broker.trades),
+            "ledger_symbols": broker.trades.symbols,
+            "history": history,
+        }
+        store.save(key, meta, {
+            "bars": np.array(offset + m),
+            "tail_index": _ns(frame.index[tail]),
+            "tail_ohlcv": _ohlcv(frame.iloc[tail]),
+            "tail_signal": signal[tail],
+            **{f"tail_ind_{k}": np.asarray(v, dtype=np.float64)[tail] for k, v in indicators.items()},
+        })
+
+    if resumed is None:
+        # Replayed in full: the whole history is at hand
+        index, ledger = frame.index, broker.trades
+        read = lambda: (index, equity, ledger)
+    else:
+        unit, symbols = frame.index.unit, meta["ledger_symbols"]
+        def read():
+            cols = store.load_history(key, history)
+            index = pd.DatetimeIndex(cols["index"].view("datetime64[ns]")).as_unit(unit)
+            ledger = TradeLedger.from_columns({k[len("ledger_"):]: v for k, v in cols.items()
+                                               if k.startswith("ledger_")}, symbols)
+            return index, cols["equity"], ledger
+    return IncrementalRun(bars=offset + m, resumed_bars=offset + start, new_bars=m - start, first_close=first_close,
+                          last_close=float(close[-1]) if m else float("nan"), stats=current_stats().summary(),
+                          history=read)
+
+
+def _close(a: np.ndarray, b: np.ndarray, tol: float = 1e-6) -> bool:
+    """Equal to `tol` of the series' own scale (oscillators like MACD sit near zero)."""
+    scale = np.nanmax(np.abs(b)) if np.isfinite(b).any() else 0.0
+    return bool(np.allclose(a, b, rtol=tol, atol=tol * scale, equal_nan=True))
+
+
+def tail_reproduced(signal: np.ndarray, indicators: Dict[str, np.ndarray],
+                    known_signal: np.ndarray, known_indicators: Dict[str, np.ndarray]) -> bool:
+    """
+    Whether signals/indicators recomputed from a warm-up tail (aligned to its first bar) match
+    the known ones over the second half of the tail: signals exactly, indicators to 1e-6 of
+    their scale. A mismatch means the tail is shorter than the strategy's lookback.
+    """
+    n = len(known_signal)
+    check = slice(n // 2, n)
+    return (np.array_equal(signal[check], known_signal[check]) and indicators.keys() == known_indicators.keys()
+            and all(_close(np.asarray(indicators[k], dtype=np.float64)[check], np.asarray(v, dtype=np.float64)[check])
+                    for k, v in known_indicators.items()))
+
+
+def _resume(checkpoint, frame: pd.DataFrame, offset: int, strategy_id: str, params: Dict[str, Any]):
+    """
+    (broker, first new bar, (signals, indicators)) or None, for a `frame` that starts at the
+    checkpoint's warm-up tail (dataset bar `offset`); positions are frame-relative. The broker
+    starts an empty ledger (with the stored symbol table): its rows are the new ones only.
+    """
+    meta, arrays = checkpoint
+    bars = int(meta["bars"]) - offset # checkpointed bars in the frame: the tail
+    tail_index = arrays["tail_index"]
+    # The dataset must extend the checkpointed one unchanged: same tail bars, ending at the
+    # last processed timestamp
+    if len(frame) < bars or bars <= 0 \
+            or frame.index[bars - 1].value != meta["last_timestamp"]:
+        return None
+    if not (np.array_equal(_ns(frame.index[:bars]), tail_index)
+            and np.array_equal(_ohlcv(frame.iloc[:bars]), arrays["tail_ohlcv"])):
+        logger.info("Checkpoint tail differs from the data (history revised), replaying")
+        return None
+
+    signal, indicators = _signals(frame, strategy_id, params)
+    stored = {k[len("tail_ind_"):]: v for k, v in arrays.items() if k.startswith("tail_ind_")}
+    if not tail_reproduced(signal, indicators, arrays["tail_signal"], stored):
+        logger.warning("Warm-up tail too short to reproduce the stored signals and indicators, replaying")
+        return None
+
+    broker = SimulatedBroker.from_state(meta["broker"])
+    empty = TradeLedger().columns()
+    broker.trades = TradeLedger.from_columns(empty, meta["ledger_symbols"])
+    return broker, bars, (signal, indicators)
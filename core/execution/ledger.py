@@ -0,0 +1,208 @@
+from typing import Any, Dict, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+from core.core.models import Side
+from core.core.records import TradeRecord
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+_FLOAT_COLUMNS = ("amount", "price", "cost", "fee", "position")
+
+
+def to_ns(ts: Any) -> int:
+    """Timestamps as int64 ns since the epoch; plain numbers are taken as epoch seconds."""
+    if ts is None:
+        return np.iinfo(np.int64).min # NaT
+    if isinstance(ts, (int, float, np.integer, np.floating)):
+        return int(ts * 1_000_000_000)
+    return pd.Timestamp(ts).as_unit("ns").value
+
+
+class TradeLedger:
+    """
+    Struct-of-arrays fill log: preallocated NumPy columns (timestamp int64 ns, side int8,
+    symbol int32 code, order id int64, amount/price/cost/fee float64 and the symbol's position
+    after the fill) grown by doubling.
+    Indexing and iteration yield TradeRecords, so it still reads like a list of trades;
+    analytics should use the column views, `to_pandas()`/`to_arrow()` or `round_trips()`.
+    """
+    def __init__(self, capacity: int = 1024):
+        capacity = max(int(capacity), 1)
+        self._n = 0
+        self.timestamp = np.empty(capacity, dtype=np.int64)
+        self.side = np.empty(capacity, dtype=np.int8)
+        self.symbol = np.empty(capacity, dtype=np.int32)
+        self.order_id = np.empty(capacity, dtype=np.int64)
+        self.amount = np.empty(capacity)
+        self.price = np.empty(capacity)
+        self.cost = np.empty(capacity)
+        self.fee = np.empty(capacity)
+        self.position = np.empty(capacity)
+        self.symbols: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self.order_labels: Dict[int, str] = {} # external (pydantic) order ids, when known
+
+    _COLUMNS = ("timestamp", "side", "symbol", "order_id") + _FLOAT_COLUMNS
+
+    def _grow(self):
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(len(old) * 2, dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            setattr(self, name, new)
+
+    def append(self, timestamp: Any, side: Union[Side, int], symbol: str, amount: float, price: float,
+               cost: float, fee: float, order_id: int = -1, order_label: Optional[str] = None,
+               position: float = np.nan) -> int:
+        """Adds one fill and returns its row. `position` is the holding after the fill, if known."""
+        i = self._n
+        if i == len(self.timestamp):
+            self._grow()
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        self.timestamp[i] = to_ns(timestamp)
+        self.side[i] = SIDE_BUY if side == Side.BUY or side == SIDE_BUY else SIDE_SELL
+        self.symbol[i] = code
+        self.order_id[i] = order_id
+        self.amount[i] = amount
+        self.price[i] = price
+        self.cost[i] = cost
+        self.fee[i] = fee
+        self.position[i] = position
+        if order_label is not None:
+            self.order_labels[order_id] = order_label
+        self._n = i + 1
+        return i
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], symbols: List[str],
+                     order_labels: Optional[Dict[int, str]] = None) -> "TradeLedger":
+        """Rebuilds a ledger from `columns()` output and its symbol table (e.g. loaded from disk)."""
+        n = len(columns["timestamp"])
+        ledger = cls(capacity=max(n, 1024))
+        for name in cls._COLUMNS:
+            getattr(ledger, name)[:n] = columns[name]
+        ledger._n = n
+        ledger.symbols = list(symbols)
+        ledger._symbol_codes = {s: i for i, s in enumerate(ledger.symbols)}
+        ledger.order_labels = dict(order_labels or {})
+        return ledger
+
+    def truncate(self, n: int):
+        """Drops every row from `n` on (rolls the log back to an earlier offset)."""
+        self._n = min(max(int(n), 0), self._n)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> TradeRecord:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("trade index out of range")
+        oid = int(self.order_id[i])
+        return TradeRecord(self.order_labels.get(oid, oid), self.symbols[self.symbol[i]],
+                           Side.BUY if self.side[i] == SIDE_BUY else Side.SELL,
+                           float(self.amount[i]), float(self.price[i]), float(self.cost[i]), float(self.fee[i]),
+                           pd.Timestamp(int(self.timestamp[i])), id=i + 1)
+
+    def __iter__(self) -> Iterator[TradeRecord]:
+        return (self[i] for i in range(self._n))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Views (no copy) of the filled part of every column."""
+        return {name: getattr(self, name)[:self._n] for name in self._COLUMNS}
+
+    def to_pandas(self) -> pd.DataFrame:
+        cols = self.columns()
+        data = {
+            "timestamp": cols["timestamp"].view("datetime64[ns]"),
+            "symbol": pd.Categorical.from_codes(cols["symbol"], categories=self.symbols) if self.symbols
+                      else pd.Categorical([]),
+            "side": cols["side"],
+            "order_id": cols["order_id"],
+            **{name: cols[name] for name in _FLOAT_COLUMNS},
+        }
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        import pyarrow as pa
+        cols = self.columns()
+        return pa.table({
+            "timestamp": pa.array(cols["timestamp"].view("datetime64[ns]")),
+            "symbol": pa.DictionaryArray.from_arrays(pa.array(cols["symbol"]), pa.array(self.symbols, pa.string())),
+            "side": pa.array(cols["side"]),
+            "order_id": pa.array(cols["order_id"]),
+            **{name: pa.array(cols[name]) for name in _FLOAT_COLUMNS},
+        })
+
+    def round_trips(self, flat_tol: float = 1e-8) -> pd.DataFrame:
+        """
+        Flat-to-flat round trips per symbol: every fill from opening a position until it is
+        flat again forms one trip. PnL is sell proceeds - buy costs - all fees; trips still open
+        at the end are left out. One row per trip, ordered by exit.
+        """
+        cols = self.columns()
+        n = self._n
+        empty = pd.DataFrame({k: [] for k in ("symbol", "entry_time", "exit_time", "entry_price", "exit_price",
+                                               "amount", "pnl", "return_pct", "fills")})
+        if n == 0:
+            return empty
+
+        # Group fills by symbol (stable, so time order is kept inside each symbol)
+        order = np.argsort(cols["symbol"], kind="stable")
+        sym = cols["symbol"][order]
+        side = cols["side"][order].astype(np.float64)
+        amount = cols["amount"][order]
+        signed = side * amount
+        new_symbol = np.empty(n, dtype=bool)
+        new_symbol[0] = True
+        new_symbol[1:] = sym[1:] != sym[:-1]
+
+        # Position after each fill: as recorded by the broker, else rebuilt per symbol
+        pos = cols["position"][order]
+        if np.isnan(pos).any():
+            pos = np.cumsum(signed)
+            starts = np.flatnonzero(new_symbol)
+            pos -= np.repeat(pos[starts] - signed[starts], np.diff(np.append(starts, n)))
+        flat = np.abs(pos) <= flat_tol
+
+        # Trip id: a new trip starts after every flat point and at every symbol boundary
+        opens = new_symbol.copy()
+        opens[1:] |= flat[:-1]
+        trip = np.cumsum(opens) - 1
+        closed = np.zeros(trip[-1] + 1, dtype=bool)
+        closed[trip[flat]] = True
+
+        buy = side > 0
+        cost = cols["cost"][order]
+        buy_cost = np.bincount(trip, weights=np.where(buy, cost, 0.0))
+        sell_cost = np.bincount(trip, weights=np.where(buy, 0.0, cost))
+        buy_qty = np.bincount(trip, weights=np.where(buy, amount, 0.0))
+        sell_qty = np.bincount(trip, weights=np.where(buy, 0.0, amount))
+        fees = np.bincount(trip, weights=cols["fee"][order])
+        fills = np.bincount(trip)
+        first = np.flatnonzero(opens)
+        last = np.append(first[1:], n) - 1
+        ts = cols["timestamp"][order]
+
+        keep = np.flatnonzero(closed)
+        if len(keep) == 0:
+            return empty
+        pnl = sell_cost[keep] - buy_cost[keep] - fees[keep]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = pd.DataFrame({
+                "symbol": pd.Categorical.from_codes(sym[first[keep]], categories=self.symbols),
+                "entry_time": ts[first[keep]].view("datetime64[ns]"),
+                "exit_time": ts[last[keep]].view("datetime64[ns]"),
+                "entry_price": buy_cost[keep] / buy_qty[keep],
+                "exit_price": sell_cost[keep] / sell_qty[keep],
+                "amount": buy_qty[keep],
+                "pnl": pnl,
+                "return_pct": pnl / buy_cost[keep] * 100,
+                "fills": fills[keep],
+            })
+        return out.sort_values("exit_time", kind="stable").reset_index(drop=True)
@@ -0,0 +1,167 @@
+"""
+Multi-symbol portfolio backtest: one SimulatedBroker with shared cash trading N symbols.
+
+Signals are computed once per symbol over its whole history. The symbols' bars are merged
+into one timeline (a shared index union), and the broker is only stepped at bars where a
+T+1 signal can act, i.e. an order may be sent. The equity curve is rebuilt afterwards from
+the fills and the forward-filled closes. Cost is linear in total bars plus the number of
+signal events, not N full per-bar backtests.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from core.config import settings
+from core.core.models import Side
+from core.execution.ledger import TradeLedger
+from core.execution.simulated_broker import SimulatedBroker
+from core.strategies.base import Bars
+from core.strategies.factory import StrategyFactory
+from core.utils.logger import logger
+from core.utils.sim_logging import current_stats, quiet_simulation
+
+# Share of the slot budget that is invested, like the single-symbol loops (leaves room for the fee)
+CASH_BUFFER = 0.98
+
+_EXIT, _ENTRY = 0, 1
+
+
+@dataclass
+class PortfolioResult:
+    symbols: List[str]
+    index: pd.DatetimeIndex # union of all symbols' timestamps
+    equity: np.ndarray
+    cash: np.ndarray
+    market_value: np.ndarray # (symbols, bars) value of each holding
+    ledger: TradeLedger
+    bars: Dict[str, int] = field(default_factory=dict)
+    stats: Dict[str, Any] = field(default_factory=dict) # SimStats summary of the run
+
+    def per_symbol(self) -> pd.DataFrame:
+        """Closed round trips, PnL and win rate per symbol."""
+        trips = self.ledger.round_trips()
+        rows = []
+        for sym in self.symbols:
+            t = trips[trips["symbol"] == sym] if len(trips) else trips
+            rows.append({
+                "symbol": sym,
+                "bars": self.bars.get(sym, 0),
+                "trades": len(t),
+                "pnl": float(t["pnl"].sum()) if len(t) else 0.0,
+                "win_rate": float((t["pnl"] > 0).mean() * 100) if len(t) else 0.0,
+            })
+        return pd.DataFrame(rows, columns=["symbol", "bars", "trades", "pnl", "win_rate"])
+
+
+def ffill(mat: np.ndarray, fill: float) -> np.ndarray:
+    """Forward-fills NaNs along the last axis; leading NaNs become `fill`."""
+    valid = ~np.isnan(mat)
+    idx = np.where(valid, np.arange(mat.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    out = np.take_along_axis(mat, idx, axis=-1)
+    out[~np.maximum.accumulate(valid, axis=-1)] = fill
+    return out
+
+
+def compute_signals(frames: Dict[str, pd.DataFrame], strategy_id: str, params: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """int8 signals per symbol, each from one vectorized pass over the symbol's bars."""
+    strategy = StrategyFactory.get_strategy(strategy_id, params)
+    return {sym: np.asarray(strategy.compute(Bars.from_frame(df)).signal, dtype=np.int8)
+            for sym, df in frames.items()}
+
+
+@quiet_simulation("portfolio")
+def run_portfolio(frames: Dict[str, pd.DataFrame], strategy_id: str, params: Dict[str, Any],
+                  initial_capital: float = settings.INITIAL_CAPITAL, fee: Optional[float] = None,
+                  max_weight: Optional[float] = None) -> PortfolioResult:
+    """
+    Trades every symbol of `frames` (OHLCV by symbol, DatetimeIndex) with the same strategy.
+    A signal on a symbol's bar acts at that symbol's next bar close. Entries are sized to
+    `max_weight` (default 1 / N) of current equity, capped by free cash; exits sell the whole
+    holding. Exits are processed before entries on the same timestamp so freed cash can be reused.
+    """
+    symbols = [s for s, df in frames.items() if not df.empty]
+    for sym in frames:
+        if sym not in symbols:
+            logger.warning(f"Portfolio: no bars for {sym}, skipped")
+    if not symbols:
+        raise ValueError("No data for any symbol")
+    weight = max_weight if max_weight is not None else 1.0 / len(symbols)
+
+    signals = compute_signals({s: frames[s] for s in symbols}, strategy_id, params)
+
+    # Shared timeline and each symbol's bars placed on it
+    index = frames[symbols[0]].index
+    for sym in symbols[1:]:
+        index = index.union(frames[sym].index)
+    n_bars = len(index)
+    close = np.full((len(symbols), n_bars), np.nan)
+    ev_pos, ev_sym, ev_kind = [], [], []
+    for k, sym in enumerate(symbols):
+        df = frames[sym]
+        pos = index.get_indexer(df.index)
+        c = df["close"].to_numpy(dtype=np.float64)
+        close[k, pos] = c
+        # T+1: the previous bar's signal is acted on at this bar
+        prev = np.zeros(len(df), dtype=np.int8)
+        prev[1:] = signals[sym][:-1]
+        act = np.flatnonzero((prev != 0) & (c > 0))
+        ev_pos.append(pos[act])
+        ev_sym.append(np.full(len(act), k, dtype=np.int32))
+        ev_kind.append(np.where(prev[act] > 0, _ENTRY, _EXIT).astype(np.int8))
+    close = ffill(close, 0.0)
+    close_by_bar = np.ascontiguousarray(close.T) # (bars, symbols) rows for marking holdings
+
+    # Merge every symbol's events into one time-ordered stream: by bar, exits first, then symbol order
+    ev_pos, ev_sym, ev_kind = (np.concatenate(a) for a in (ev_pos, ev_sym, ev_kind))
+    order = np.lexsort((ev_sym, ev_kind, ev_pos))
+    ev_pos, ev_sym, ev_kind = ev_pos[order], ev_sym[order], ev_kind[order]
+    ev_time = list(index[ev_pos]) # boxed once, in bulk
+
+    broker = SimulatedBroker(initial_capital=initial_capital)
+    if fee is not None:
+        broker.taker_fee = fee
+    held = np.zeros(len(symbols))
+    fill_pos: List[int] = []
+    fill_sym: List[int] = []
+    fill_cash: List[float] = []
+    for t, k, kind, ts in zip(ev_pos.tolist(), ev_sym.tolist(), ev_kind.tolist(), ev_time):
+        sym = symbols[k]
+        row = close_by_bar[t]
+        price = float(row[k])
+        amt = float(held[k])
+        if kind == _ENTRY:
+            if amt > 1e-9:
+                continue
+            equity = broker.cash + float(held @ row)
+            qty = min(broker.cash, equity * weight) * CASH_BUFFER / price
+            if qty <= 0:
+                continue
+            side = Side.BUY
+        else:
+            if amt <= 1e-9:
+                continue
+            side, qty = Side.SELL, amt
+        if broker.fill_market(sym, side, qty, price, ts) is None:
+            continue
+        held[k] = broker.positions[sym].amount
+        fill_pos.append(t)
+        fill_sym.append(k)
+        fill_cash.append(broker.cash)
+
+    # Cash and holdings are step functions of the fills; value them at forward-filled closes
+    cash = np.full(n_bars, np.nan)
+    holdings = np.full((len(symbols), n_bars), np.nan)
+    if fill_pos:
+        fp = np.asarray(fill_pos)
+        cash[fp] = fill_cash # several fills on one bar: the last one wins
+        positions = broker.trades.columns()["position"]
+        holdings[np.asarray(fill_sym), fp] = positions
+    cash = ffill(cash, initial_capital)
+    holdings = ffill(holdings, 0.0)
+    market_value = holdings * close
+    equity = cash + market_value.sum(axis=0)
+
+    return PortfolioResult(symbols=symbols, index=index, equity=equity, cash=cash, market_value=market_value,
+                           ledger=broker.trades, bars={s: len(frames[s]) for s in symbols},
+                           stats=current_stats().summary())
@@ -1,9 +1,30 @@
-from typing import Dict, List
+import heapq
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
+import numpy as np
+import pandas as pd
 from core.execution.broker import Broker
-from core.core.models import Order, Position, Trade, OrderStatus, Side, OrderType
+from core.core.models import Order, OrderStatus, Side, OrderType
+from core.core.records import OrderRecord, PositionRecord, TradeRecord
+from core.execution.ledger import TradeLedger
 from core.config import settings
 from core.utils.logger import logger
+from core.utils.sim_logging import SimStats, current_stats
+
+class _SymbolBook:
+    """
+    Pending orders of one symbol: market orders FIFO, buy limits in a max-heap and sell
+    limits in a min-heap by price (ties by arrival, i.e. order id). Entries whose order left
+    the pending set (filled directly, canceled, rejected) are dropped lazily when they surface.
+    """
+    __slots__ = ("market", "buys", "sells")
+
+    def __init__(self):
+        self.market: Deque[int] = deque()
+        self.buys: List[Tuple[float, int]] = [] # (-price, order_id)
+        self.sells: List[Tuple[float, int]] = [] # (price, order_id)
+
 
 class SimulatedBroker(Broker):
     """
@@ -11,39 +32,99 @@ class SimulatedBroker(Broker):
     Keeps track of:
     - Cash balance
     - Asset holdings
-    - Active orders
+    - Active orders (indexed per symbol; terminal orders move to `order_archive`)
+    Internally everything is a slotted record (core.core.records) keyed by integer id;
+    pydantic Orders are accepted at the edges and kept in sync with their record.
+    Orders, fills and rejects are always counted on `stats`; inside quiet_simulation() the
+    counters replace the per-event log lines and are shared with the rest of the run.
     """
     def __init__(self, initial_capital: float = settings.INITIAL_CAPITAL):
         self.cash = initial_capital
-        self.positions: Dict[str, Position] = {}
-        self.orders: Dict[str, Order] = {}
-        self.trades: List[Trade] = []
+        self.positions: Dict[str, PositionRecord] = {}
+        self.orders: Dict[int, OrderRecord] = {} # pending only
+        self.order_archive: Dict[int, OrderRecord] = {} # filled / canceled / rejected
+        self._books: Dict[str, _SymbolBook] = {}
+        self._model_ids: Dict[str, int] = {} # pydantic order id -> record id
+        self.trades = TradeLedger()
         self.maker_fee = settings.MAKER_FEE
         self.taker_fee = settings.TAKER_FEE
-        
-        logger.info(f"SimulatedBroker initialized with ${initial_capital}")
+        run_stats = current_stats()
+        self.quiet = run_stats is not None
+        self.stats = run_stats if run_stats is not None else SimStats()
+
+        if not self.quiet:
+            logger.info("SimulatedBroker initialized with ${}", initial_capital)
 
     def get_balance(self) -> Dict[str, float]:
         return {"USDT": self.cash}
 
-    def get_positions(self) -> Dict[str, Position]:
+    def get_positions(self) -> Dict[str, PositionRecord]:
         return self.positions
 
-    def create_order(self, order: Order) -> Order:
-        logger.info(f"Order received: {order.side} {order.amount} {order.symbol}")
-        # Basic validation
-        cost = order.amount * (order.price if order.price else 0) 
+    def create_order(self, order: Union[Order, OrderRecord]) -> Union[Order, OrderRecord]:
+        """Queues an order. Returns what was passed in (pydantic Orders stay usable by the caller)."""
+        self.stats.orders += 1
+        if not self.quiet:
+            logger.info("Order received: {} {} {}", order.side, order.amount, order.symbol)
         # In simulation, we might not know price for market orders yet, 
         # so validation happens at execution time or we estimate.
-        
-        self.orders[order.id] = order
+        if order.type == OrderType.LIMIT and order.price is None:
+            raise ValueError(f"Limit order {order.id} needs a price")
+
+        rec = order
+        if isinstance(order, Order):
+            rec = OrderRecord.from_model(order)
+            self._model_ids[order.id] = rec.id
+        if rec.status != OrderStatus.PENDING:
+            self.order_archive[rec.id] = rec
+            return order
+        self._queue(rec)
         return order
 
-    def cancel_order(self, order_id: str) -> bool:
-        if order_id in self.orders:
-            self.orders[order_id].status = OrderStatus.CANCELED
-            return True
-        return False
+    def _queue(self, rec: OrderRecord):
+        self.orders[rec.id] = rec
+        book = self._books.get(rec.symbol)
+        if book is None:
+            book = self._books[rec.symbol] = _SymbolBook()
+        if rec.type == OrderType.MARKET:
+            book.market.append(rec.id)
+        elif rec.side == Side.BUY:
+            heapq.heappush(book.buys, (-rec.price, rec.id))
+        else:
+            heapq.heappush(book.sells, (rec.price, rec.id))
+
+    def fill_market(self, symbol: str, side: Side, amount: float, price: float,
+                    timestamp: Any) -> Optional[TradeRecord]:
+        """
+        Market order filled on the spot at `price`, for loops that trade on their own signals.
+        Counted like create_order + _execute_fill, but never queued nor archived: the fill is
+        in the ledger and nothing else is kept, so long runs don't grow the order books.
+        """
+        self.stats.orders += 1
+        if not self.quiet:
+            logger.info("Order received: {} {} {}", side, amount, symbol)
+        return self._execute_fill(OrderRecord(symbol, side, OrderType.MARKET, amount, price), price, timestamp,
+                                  keep=False)
+
+    def cancel_order(self, order_id: Union[int, str]) -> bool:
+        order = self.orders.get(self._model_ids.get(order_id, order_id))
+        if order is None:
+            return False
+        order.set_status(OrderStatus.CANCELED)
+        self._archive(order)
+        return True
+
+    def _archive(self, order: OrderRecord):
+        # Its book entry stays behind and is skipped when popped
+        self.orders.pop(order.id, None)
+        self.order_archive[order.id] = order
+
+    def _record(self, order: Union[Order, OrderRecord]) -> OrderRecord:
+        if isinstance(order, OrderRecord):
+            return order
+        rid = self._model_ids.get(order.id)
+        rec = self.orders.get(rid, self.order_archive.get(rid)) if rid is not None else None
+        return rec if rec is not None else OrderRecord.from_model(order)
 
     def process_data_event(self, symbol: str, current_price: float, timestamp: datetime):
         """
@@ -54,33 +135,138 @@ class SimulatedBroker(Broker):
         if symbol in self.positions:
             self.positions[symbol].update(current_price)
 
-        # Match orders
-        for order_id, order in list(self.orders.items()):
-            if order.status != OrderStatus.PENDING:
+        # Match orders: only the triggerable ones are touched
+        book = self._books.get(symbol)
+        if book is None:
+            return
+
+        # Market orders fill at the current price, in arrival order (slippage could be added here)
+        for _ in range(len(book.market)):
+            order = self.orders.get(book.market.popleft())
+            if order is not None:
+                self._execute_fill(order, current_price, timestamp)
+
+        # Limits fill at their own price (conservative), best price first
+        while book.buys and -book.buys[0][0] >= current_price:
+            order = self.orders.get(heapq.heappop(book.buys)[1])
+            if order is not None:
+                self._execute_fill(order, order.price, timestamp)
+        while book.sells and book.sells[0][0] <= current_price:
+            order = self.orders.get(heapq.heappop(book.sells)[1])
+            if order is not None:
+                self._execute_fill(order, order.price, timestamp)
+
+    def process_bars(self, symbol: str, ts: Sequence, open: Sequence[float], high: Sequence[float],
+                     low: Sequence[float], close: Sequence[float]) -> List[TradeRecord]:
+        """
+        Matches the symbol's pending orders against a whole block of OHLC bars at once.
+        Market orders fill at the first bar's open. A buy limit triggers on the first bar whose
+        low reaches its price, a sell limit on the first bar whose high does, and fills at its
+        own price (conservative, like process_data_event). Each order's first trigger bar is
+        found by binary search on the running low minimum / high maximum, and the broker only
+        visits those bars: in bar order, then market, buys (best first), sells (best first).
+        Returns the fills in execution order.
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        n = len(high)
+        book = self._books.get(symbol)
+        if n == 0 or book is None:
+            return []
+        ts = pd.Index(ts)
+
+        market = [oid for oid in book.market if oid in self.orders]
+        buys = [oid for _, oid in book.buys if oid in self.orders]
+        sells = [oid for _, oid in book.sells if oid in self.orders]
+        book.market.clear()
+
+        # First bar where the running extreme crosses each limit (n = never triggers in this block)
+        buy_px = np.array([self.orders[oid].price for oid in buys], dtype=np.float64)
+        sell_px = np.array([self.orders[oid].price for oid in sells], dtype=np.float64)
+        buy_bar = np.searchsorted(-np.minimum.accumulate(low), -buy_px, side="left")
+        sell_bar = np.searchsorted(np.maximum.accumulate(high), sell_px, side="left")
+
+        ids = np.array(market + buys + sells, dtype=np.int64)
+        bar = np.concatenate([np.zeros(len(market), dtype=np.int64), buy_bar, sell_bar])
+        kind = np.repeat([0, 1, 2], [len(market), len(buys), len(sells)])
+        # Best price first inside a kind; market orders keep arrival order
+        rank = np.concatenate([np.arange(len(market), dtype=np.float64), -buy_px, sell_px])
+        sequence = np.lexsort((ids, rank, kind, bar))
+
+        fills = []
+        first_open = float(np.asarray(open, dtype=np.float64)[0])
+        for i in sequence:
+            b = int(bar[i])
+            if b >= n:
                 continue
-            
-            if order.symbol != symbol:
+            order = self.orders.get(int(ids[i]))
+            if order is None:
                 continue
-                
-            # Simulate Fill
-            should_fill = False
-            fill_price = current_price
-            
-            if order.type == OrderType.MARKET:
-                should_fill = True
-                # Slippage could be added here
-            elif order.type == OrderType.LIMIT:
-                if order.side == Side.BUY and current_price <= order.price:
-                    should_fill = True
-                    fill_price = order.price # Optimistic fill or current_price? Conservative is order.price
-                elif order.side == Side.SELL and current_price >= order.price:
-                    should_fill = True
-                    fill_price = order.price
-            
-            if should_fill:
-                self._execute_fill(order, fill_price, timestamp)
+            trade = self._execute_fill(order, first_open if kind[i] == 0 else order.price, ts[b])
+            if trade is not None:
+                fills.append(trade)
+
+        # Drop everything that left the pending set from the heaps
+        book.buys = [(p, oid) for p, oid in book.buys if oid in self.orders]
+        book.sells = [(p, oid) for p, oid in book.sells if oid in self.orders]
+        heapq.heapify(book.buys)
+        heapq.heapify(book.sells)
+
+        if symbol in self.positions:
+            self.positions[symbol].update(float(np.asarray(close, dtype=np.float64)[-1]))
+        return fills
+
+    def state_dict(self) -> Dict[str, Any]:
+        """
+        JSON-serializable account state: cash, fees, positions and pending orders (market queue
+        order preserved) plus the number of ledger rows it corresponds to. The ledger itself is
+        persisted separately (see TradeLedger.columns / from_columns).
+        """
+        def order_state(o: OrderRecord) -> Dict[str, Any]:
+            return {"symbol": o.symbol, "side": o.side.value, "type": o.type.value, "amount": o.amount,
+                    "price": o.price, "label": o.source.id if o.source is not None else None}
+        queued = [oid for book in self._books.values() for oid in book.market if oid in self.orders]
+        queued_set = set(queued)
+        limits = [oid for oid in self.orders if oid not in queued_set]
+        return {
+            "cash": self.cash,
+            "maker_fee": self.maker_fee,
+            "taker_fee": self.taker_fee,
+            "positions": [{"symbol": p.symbol, "amount": p.amount, "average_entry_price": p.average_entry_price,
+                           "current_price": p.current_price} for p in self.positions.values()],
+            "orders": [order_state(self.orders[oid]) for oid in queued + limits],
+            "ledger_rows": len(self.trades),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], ledger: Optional[TradeLedger] = None) -> "SimulatedBroker":
+        """
+        Rebuilds a broker from `state_dict()`. Pending orders are re-queued in their original
+        order under fresh record ids (their external labels still resolve for cancel_order);
+        they were counted when first created, so `stats` is not charged again.
+        """
+        broker = cls(initial_capital=state["cash"])
+        broker.maker_fee = state.get("maker_fee", broker.maker_fee)
+        broker.taker_fee = state.get("taker_fee", broker.taker_fee)
+        for p in state.get("positions", []):
+            pos = PositionRecord(p["symbol"], p["amount"], p["average_entry_price"])
+            pos.update(p.get("current_price", 0.0))
+            broker.positions[pos.symbol] = pos
+        for o in state.get("orders", []):
+            rec = OrderRecord(o["symbol"], Side(o["side"]), OrderType(o["type"]), o["amount"], o.get("price"))
+            broker._queue(rec)
+            if o.get("label") is not None:
+                broker._model_ids[o["label"]] = rec.id
+        if ledger is not None:
+            if len(ledger) < state.get("ledger_rows", 0):
+                raise ValueError(f"Ledger has {len(ledger)} rows, state expects {state['ledger_rows']}")
+            ledger.truncate(state.get("ledger_rows", len(ledger)))
+            broker.trades = ledger
+        return broker
 
-    def _execute_fill(self, order: Order, price: float, timestamp: datetime):
+    def _execute_fill(self, order: Union[Order, OrderRecord], price: float, timestamp: datetime,
+                      keep: bool = True) -> Optional[TradeRecord]:
+        order = self._record(order)
         # Calculate cost and fee
         cost = order.amount * price
         fee = cost * self.taker_fee # Simplify to taker for now
@@ -89,9 +275,13 @@ class SimulatedBroker(Broker):
         if order.side == Side.BUY:
             total_deduction = cost + fee
             if self.cash < total_deduction:
-                logger.warning(f"Order {order.id} rejected: Insufficient funds")
-                order.status = OrderStatus.REJECTED
-                return
+                self.stats.reject("insufficient_funds")
+                if not self.quiet:
+                    logger.warning("Order {} rejected: Insufficient funds", order.id)
+                order.set_status(OrderStatus.REJECTED)
+                if keep:
+                    self._archive(order)
+                return None
             
             self.cash -= total_deduction
             self._update_position(order.symbol, order.amount, price)
@@ -101,32 +291,37 @@ class SimulatedBroker(Broker):
             # position check
             pos = self.positions.get(order.symbol)
             if not pos or pos.amount < order.amount:
-                 logger.warning(f"Order {order.id} rejected: Insufficient assets")
-                 order.status = OrderStatus.REJECTED
-                 return
+                 self.stats.reject("insufficient_assets")
+                 if not self.quiet:
+                     logger.warning("Order {} rejected: Insufficient assets", order.id)
+                 order.set_status(OrderStatus.REJECTED)
+                 if keep:
+                     self._archive(order)
+                 return None
                  
             self.cash += (cost - fee)
             self._update_position(order.symbol, -order.amount, price)
 
         # Create Trade Record
-        trade = Trade(
-            order_id=order.id,
-            symbol=order.symbol,
-            side=order.side,
-            amount=order.amount,
-            price=price,
-            cost=cost,
-            fee=fee,
-            timestamp=timestamp
-        )
-        self.trades.append(trade)
+        row = self.trades.append(timestamp, order.side, order.symbol, order.amount, price, cost, fee,
+                                 order_id=order.id, order_label=order.source.id if order.source is not None else None,
+                                 position=self.positions[order.symbol].amount)
+        trade = self.trades[row]
         
-        order.status = OrderStatus.FILLED
-        order.updated_at = timestamp
-        logger.info(f"FILLED: {order.side} {order.amount} {order.symbol} @ {price}")
+        order.set_status(OrderStatus.FILLED, timestamp)
+        if keep:
+            self._archive(order)
+        self.stats.fills += 1
+        if not self.quiet:
+            logger.info("FILLED: {} {} {} @ {}", order.side, order.amount, order.symbol, price)
+        elif self.stats.sampled(self.stats.fills):
+            logger.debug("FILLED #{}: {} {} {} @ {}", self.stats.fills, order.side, order.amount, order.symbol, price)
+        return trade
 
     def _update_position(self, symbol: str, amount_delta: float, price: float):
-        pos = self.positions.get(symbol, Position(symbol=symbol))
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = PositionRecord(symbol)
         
         # Weighted Average Entry Price logic (simplified)
         if amount_delta > 0: # Buying
@@ -0,0 +1,192 @@
+"""
+Time travel over a finished backtest: periodic broker snapshots next to the trade ledger.
+The backtest is the array engine's, with the same risk exits as /run; its fills are replayed
+through a SimulatedBroker to take the snapshots. The account state at any bar is the closest
+snapshot at or before it plus the fills of at most `every - 1` bars, instead of rerunning
+the whole simulation.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from core.config import settings
+from core.core.models import Side
+from core.execution import array_engine
+from core.execution.exits import ExitRule
+from core.execution.ledger import TradeLedger
+from core.execution.simulated_broker import SimulatedBroker
+from core.strategies.base import Bars
+from core.strategies.factory import StrategyFactory
+from core.utils.sim_logging import current_stats, quiet_simulation
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+class SnapshotIndex:
+    """
+    Broker state (SimulatedBroker.state_dict: cash, positions, pending orders, ledger offset)
+    at the end of bars 0, every, 2 * every, ... Consecutive snapshots with no fill in
+    between share one state object, so idle stretches cost a list slot each.
+    """
+    def __init__(self, every: int = 500):
+        if every <= 0:
+            raise ValueError("Snapshot interval must be positive")
+        self.every = every
+        self.bars: List[int] = []
+        self.states: List[Dict[str, Any]] = []
+        self._next = 0
+
+    def capture_until(self, bar: int, broker: SimulatedBroker):
+        """Records every pending grid bar before `bar`; the broker holds all fills before `bar`."""
+        if self._next >= bar:
+            return
+        state = broker.state_dict()
+        while self._next < bar:
+            self.bars.append(self._next)
+            self.states.append(state)
+            self._next += self.every
+
+    def at_or_before(self, bar: int) -> int:
+        """Position of the latest snapshot taken at or before `bar`."""
+        j = int(np.searchsorted(np.asarray(self.bars), bar, side="right")) - 1
+        if j < 0:
+            raise IndexError(f"No snapshot at or before bar {bar}")
+        return j
+
+
+@dataclass
+class TimeTravelRun:
+    """A finished single-symbol backtest kept for inspection (see `state_at`)."""
+    symbol: str
+    strategy_id: str
+    params: Dict[str, Any]
+    index: pd.DatetimeIndex
+    bars: Bars
+    signal: np.ndarray
+    indicators: Dict[str, np.ndarray]
+    equity: np.ndarray
+    ledger: TradeLedger
+    snapshots: SnapshotIndex
+    fills: Dict[str, np.ndarray] # engine fills by bar: bar, side (1 buy / -1 sell), amount, price
+    stats: Dict[str, Any] = field(default_factory=dict) # SimStats summary of the run
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def bar_at(self, timestamp: Any) -> int:
+        """Last bar at or before `timestamp`."""
+        n = int(self.index.searchsorted(pd.Timestamp(timestamp), side="right")) - 1
+        if n < 0:
+            raise IndexError(f"{timestamp} is before the first bar ({self.index[0]})")
+        return n
+
+    def state_at(self, timestamp: Any) -> Dict[str, Any]:
+        """Account state at the close of the bar at/before `timestamp`, with that bar's data."""
+        n = self.bar_at(timestamp)
+        j = self.snapshots.at_or_before(n)
+        snap_bar = self.snapshots.bars[j]
+        state = self.snapshots.states[j]
+
+        close = self.bars["close"]
+        bar = self.fills["bar"]
+        replay = slice(int(np.searchsorted(bar, snap_bar, side="right")), int(np.searchsorted(bar, n, side="right")))
+        with quiet_simulation():
+            broker = SimulatedBroker.from_state(state) # fresh ledger: counts only the replayed fills
+            replay_fills(broker, self.symbol, self.index, {k: v[replay] for k, v in self.fills.items()})
+
+        pos = broker.positions.get(self.symbol)
+        amount = pos.amount if pos else 0.0
+        fills = state["ledger_rows"] + len(broker.trades)
+        return {
+            "timestamp": self.index[n],
+            "bar": n,
+            "snapshot_bar": snap_bar,
+            "replayed_bars": n - snap_bar,
+            "cash": broker.cash,
+            "position": amount,
+            "average_entry_price": pos.average_entry_price if pos else 0.0,
+            "equity": broker.cash + amount * float(close[n]),
+            "pending_orders": broker.state_dict()["orders"],
+            "trades": fills,
+            "last_trade": self.ledger[fills - 1] if fills else None,
+            "candle": {c: float(self.bars[c][n]) for c in OHLCV if c in self.bars},
+            "signal": int(self.signal[n]),
+            "indicators": {k: float(v[n]) for k, v in self.indicators.items()},
+        }
+
+
+def replay_fills(broker: SimulatedBroker, symbol: str, index: pd.DatetimeIndex, fills: Dict[str, np.ndarray],
+                 snapshots: Optional[SnapshotIndex] = None, end: Optional[int] = None):
+    """
+    Applies engine fills (sorted by bar) to `broker` at their own prices. `snapshots` is
+    handed the broker before each fill and, with `end`, up to that bar.
+    """
+    for b, side, amount, price in zip(fills["bar"].tolist(), fills["side"].tolist(), fills["amount"].tolist(),
+                                      fills["price"].tolist()):
+        if snapshots is not None:
+            snapshots.capture_until(b, broker)
+        broker.fill_market(symbol, Side.BUY if side > 0 else Side.SELL, amount, price, index[b])
+    if snapshots is not None and end is not None:
+        snapshots.capture_until(end, broker)
+
+
+@quiet_simulation("time-travel")
+def run_with_snapshots(df: pd.DataFrame, symbol: str, strategy_id: str, params: Dict[str, Any],
+                       initial_capital: float = settings.INITIAL_CAPITAL, fee: Optional[float] = None,
+                       every: int = 500, rule: Optional[ExitRule] = None) -> TimeTravelRun:
+    """
+    Single-symbol backtest with the array engine (the /run execution: T+1 signals, `rule`'s
+    risk exits) that keeps a broker snapshot every `every` bars.
+    """
+    fee = settings.TAKER_FEE if fee is None else fee
+    rule = rule or ExitRule()
+    bars = Bars.from_frame(df)
+    out = StrategyFactory.get_strategy(strategy_id, params).compute(bars)
+    signal = np.asarray(out.signal, dtype=np.int8)
+    close = bars["close"]
+    run = array_engine.simulate(close, bars["high"] if "high" in bars else close, bars["low"] if "low" in bars else close,
+                                signal, initial_capital=initial_capital, fee=fee,
+                                tp_type=rule.tp_type, tp_value=rule.tp_value, sl_type=rule.sl_type,
+                                sl_value=rule.sl_value, timestamps=df.index.as_unit("ns").asi8,
+                                trail_type=rule.trail_type, trail_value=rule.trail_value, time_stop=rule.time_stop)
+    fills = {
+        "bar": np.array([f.bar for f in run.fills], dtype=np.int64),
+        "side": np.array([1 if f.kind == array_engine.KIND_ENTRY else -1 for f in run.fills], dtype=np.int8),
+        "amount": np.array([f.amount for f in run.fills], dtype=np.float64),
+        "price": np.array([f.price for f in run.fills], dtype=np.float64),
+    }
+
+    broker = SimulatedBroker(initial_capital=initial_capital)
+    broker.taker_fee = fee
+    snapshots = SnapshotIndex(every)
+    replay_fills(broker, symbol, df.index, fills, snapshots=snapshots, end=len(df))
+    return TimeTravelRun(symbol=symbol, strategy_id=strategy_id, params=params, index=df.index, bars=bars,
+                         signal=signal, indicators={k: np.asarray(v) for k, v in out.indicators.items()},
+                         equity=run.equity, ledger=broker.trades, snapshots=snapshots, fills=fills,
+                         stats=current_stats().summary())
+
+
+class RunRegistry:
+    """Bounded LRU of finished time-travel runs, by run id."""
+    def __init__(self, max_runs: int = 8):
+        self.max_runs = max_runs
+        self._runs: "OrderedDict[str, TimeTravelRun]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, run: TimeTravelRun) -> str:
+        with self._lock:
+            self._runs[run.run_id] = run
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+        return run.run_id
+
+    def get(self, run_id: str) -> Optional[TimeTravelRun]:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None:
+                self._runs.move_to_end(run_id)
+            return run
+
+
+time_travel_runs = RunRegistry()
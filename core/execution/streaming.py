@@ -0,0 +1,165 @@
+"""
+Out-of-core backtest: the OHLCV parquet is read batch by batch (pyarrow dataset scan, so
+one row group at a time), and only a warm-up tail of the previous bars is kept in memory.
+Broker state carries across batches; equity and fills are appended to parquet outputs as
+each batch completes, and the summary metrics are accumulated on the fly.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from core.config import settings
+from core.execution.incremental import step_broker, tail_reproduced
+from core.execution.ledger import TradeLedger
+from core.execution.simulated_broker import SimulatedBroker
+from core.strategies.base import Bars
+from core.strategies.factory import StrategyFactory
+from core.utils.logger import logger
+from core.utils.sim_logging import current_stats, quiet_simulation
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+EQUITY_SCHEMA = pa.schema([("timestamp", pa.timestamp("ns")), ("equity", pa.float64())])
+
+
+@dataclass
+class StreamingResult:
+    bars: int
+    metrics: Dict[str, float]
+    total_trades: int
+    equity_path: Path
+    trades_path: Path
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+class _RunningMetrics:
+    """PerformanceMetrics.calculate, accumulated batch by batch (no full equity series)."""
+    def __init__(self):
+        self.first = self.last = self.peak = np.nan
+        self.max_dd = 0.0
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, equity: np.ndarray):
+        if not len(equity):
+            return
+        series = equity if np.isnan(self.last) else np.concatenate([[self.last], equity])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rets = series[1:] / series[:-1] - 1
+        rets = rets[~np.isnan(rets)]
+        self.n += len(rets)
+        self.total += rets.sum()
+        self.total_sq += (rets ** 2).sum()
+        if np.isnan(self.first):
+            self.first = equity[0]
+        peak = np.fmax.accumulate(np.concatenate([[self.peak], equity]))[1:]
+        self.max_dd = min(self.max_dd, float(((equity - peak) / peak).min()))
+        self.peak = peak[-1]
+        self.last = equity[-1]
+
+    def result(self) -> Dict[str, float]:
+        if np.isnan(self.first):
+            return {}
+        mean = self.total / self.n if self.n else 0.0
+        var = (self.total_sq - self.n * mean ** 2) / (self.n - 1) if self.n > 1 else 0.0
+        std = np.sqrt(max(var, 0.0))
+        res = {
+            "Total Return %": (self.last - self.first) / self.first * 100,
+            "Max Drawdown %": self.max_dd * 100,
+            "Sharpe Ratio": mean / std * np.sqrt(8760) if std > 0 else 0.0,
+            "Final Equity": self.last,
+        }
+        return {k: 0.0 if np.isnan(v) or np.isinf(v) else round(float(v), 2) for k, v in res.items()}
+
+
+@quiet_simulation("streaming")
+def stream_backtest(source: Union[str, Path, List[Path]], strategy_id: str, params: Dict[str, Any], out_dir: Union[str, Path],
+                    symbol: str = "TICKER", initial_capital: float = settings.INITIAL_CAPITAL,
+                    fee: Optional[float] = None, batch_size: int = 65_536, warmup_bars: int = 500) -> StreamingResult:
+    """
+    Backtests the OHLCV parquet file, dataset directory or time-ordered file list (e.g.
+    DataStorage.dataset_source) at `source` without loading it whole, with the single-symbol
+    broker rules (previous bar's signal at this close, 98% of cash, full exits). Writes `equity.parquet` (timestamp, equity) and `trades.parquet`
+    (ledger rows) into `out_dir`.
+
+    Each batch's signals are computed over the last `warmup_bars` bars + the batch, so the
+    warm-up must cover the strategy's longest lookback; a warning is logged when the tail's
+    recomputed signals or indicators disagree with the ones already used.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    equity_path, trades_path = out_dir / "equity.parquet", out_dir / "trades.parquet"
+    paths = [str(p) for p in source] if isinstance(source, list) else str(source)
+    dataset = ds.dataset(paths, format="parquet", partitioning=None)
+
+    strategy = StrategyFactory.get_strategy(strategy_id, params)
+    broker = SimulatedBroker(initial_capital=initial_capital)
+    broker.taker_fee = settings.TAKER_FEE if fee is None else fee
+    metrics = _RunningMetrics()
+    tail: Optional[pd.DataFrame] = None
+    tail_signal = np.empty(0, dtype=np.int8)
+    tail_indicators: Dict[str, np.ndarray] = {}
+    last_signal = 0
+    bars = trades = 0
+    warned = False
+    equity_writer = pq.ParquetWriter(equity_path, EQUITY_SCHEMA)
+    trades_writer = None
+    try:
+        for batch in dataset.to_batches(columns=["timestamp"] + OHLCV, batch_size=batch_size):
+            if batch.num_rows == 0:
+                continue
+            chunk = pd.DataFrame({c: batch.column(c).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                                  for c in OHLCV},
+                                 index=pd.DatetimeIndex(batch.column("timestamp").to_numpy(zero_copy_only=False),
+                                                        name="timestamp"))
+            frame = pd.concat([tail, chunk]) if tail is not None else chunk
+            k = 0 if tail is None else len(tail)
+            out = strategy.compute(Bars.from_frame(frame))
+            signal = np.array(out.signal, dtype=np.int8)
+            indicators = {name: np.array(v, dtype=np.float64) for name, v in out.indicators.items()}
+
+            if k and not warned and not tail_reproduced(signal[:k], {name: v[:k] for name, v in indicators.items()},
+                                                        tail_signal, tail_indicators):
+                logger.warning(f"Streaming {strategy_id}: warm-up of {warmup_bars} bars is too short for {params}")
+                warned = True
+            prev_signal = np.zeros(len(frame), dtype=np.int8)
+            prev_signal[1:] = signal[:-1]
+            prev_signal[k] = last_signal # the signal actually used for the previous bar
+            signal[:k] = tail_signal
+            for name, v in tail_indicators.items():
+                if name in indicators:
+                    indicators[name][:k] = v
+
+            close = frame["close"].to_numpy(dtype=np.float64)
+            equity = step_broker(broker, symbol, frame.index, close, prev_signal, start=k)
+            equity_writer.write_table(pa.table({"timestamp": pa.array(frame.index[k:].as_unit("ns").asi8, pa.timestamp("ns")),
+                                                "equity": equity}, schema=EQUITY_SCHEMA))
+            metrics.update(equity)
+
+            # Fills leave memory with the batch
+            if len(broker.trades):
+                table = broker.trades.to_arrow()
+                if trades_writer is None:
+                    trades_writer = pq.ParquetWriter(trades_path, table.schema)
+                trades_writer.write_table(table)
+                trades += len(broker.trades)
+                broker.trades = TradeLedger()
+
+            bars += len(chunk)
+            last_signal = signal[-1]
+            tail = frame.iloc[-warmup_bars:] if warmup_bars > 0 else frame.iloc[:0]
+            tail_signal = signal[len(frame) - len(tail):]
+            tail_indicators = {name: v[len(frame) - len(tail):] for name, v in indicators.items()}
+    finally:
+        equity_writer.close()
+        if trades_writer is not None:
+            trades_writer.close()
+    if trades_writer is None:
+        pq.write_table(TradeLedger().to_arrow(), trades_path)
+
+    return StreamingResult(bars=bars, metrics=metrics.result(), total_trades=trades,
+                           equity_path=equity_path, trades_path=trades_path, stats=current_stats().summary())
@@ -0,0 +1,129 @@
+import math
+import multiprocessing as mp
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.execution import batch_engine
+from core.utils.logger import logger
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Per-worker state, set once by the pool initializer
+_worker_shm = None
+_worker_df = None
+
+
+class SharedOHLCV:
+    """
+    One shared-memory block holding the timestamps (int64 ns) and the float64 OHLCV
+    columns as a (6, n) matrix. Workers attach by name instead of receiving pickled frames.
+    """
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(6 * n * 8, 8))
+        block = np.ndarray((6, n), dtype=np.float64, buffer=self.shm.buf)
+        block[0].view(np.int64)[:] = df.index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        for row, col in enumerate(OHLCV_COLUMNS, start=1):
+            block[row] = df[col].to_numpy(dtype=np.float64) if col in df.columns else df['close'].to_numpy(dtype=np.float64)
+        self.descriptor = (self.shm.name, n)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedArrays:
+    """
+    Packs several ndarrays into a single shared-memory block.
+    `descriptor` is picklable; `attach_arrays(descriptor)` rebuilds read-only views in a worker.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        layout, offset = [], 0
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            offset = (offset + 63) // 64 * 64 # cache-line align each array
+            layout.append((key, arr.dtype.str, arr.shape, offset))
+            offset += arr.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        for (key, dtype, shape, off), arr in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=off)[...] = arr
+        self.descriptor = (self.shm.name, layout)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_arrays(descriptor) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+    name, layout = descriptor
+    shm = _attach(name)
+    views = {}
+    for key, dtype, shape, off in layout:
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=off)
+        view.flags.writeable = False
+        views[key] = view
+    return shm, views
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns and unlinks the block; spawned workers share its resource tracker
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def frame_from_shared(shm: shared_memory.SharedMemory, n: int) -> pd.DataFrame:
+    """Read-only DataFrame over the shared block (no copy)."""
+    block = np.ndarray((6, n), dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    index = pd.DatetimeIndex(block[0].view(np.int64).view("datetime64[ns]"), name="timestamp")
+    return pd.DataFrame({col: block[row] for row, col in enumerate(OHLCV_COLUMNS, start=1)},
+                        index=index, copy=False)
+
+
+def _init_worker(descriptor: Tuple[str, int]):
+    global _worker_shm, _worker_df
+    logger.remove()
+    _worker_shm = _attach(descriptor[0])
+    _worker_df = frame_from_shared(_worker_shm, descriptor[1])
+
+
+def _run_chunk(strategy_id: str, param_sets: List[Dict[str, Any]], sim_kwargs: Dict[str, Any]):
+    run = batch_engine.run_batch(_worker_df, strategy_id, param_sets, **sim_kwargs)
+    return param_sets, run
+
+
+def iter_sweep(df: pd.DataFrame, strategy_id: str, param_sets: List[Dict[str, Any]],
+               max_workers: Optional[int] = None, chunk_size: Optional[int] = None,
+               **sim_kwargs) -> Iterator[Tuple[List[Dict[str, Any]], batch_engine.BatchRunResult]]:
+    """
+    Splits `param_sets` into chunks and runs each chunk's batch simulation in a process pool.
+    Yields (chunk_params, BatchRunResult) as chunks finish, in completion order.
+    """
+    if not param_sets:
+        return
+    workers = max_workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(param_sets)))
+    if not chunk_size:
+        # A few chunks per worker keeps every core busy while results trickle in
+        chunk_size = max(1, math.ceil(len(param_sets) / (workers * 4)))
+    chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+
+    shared = SharedOHLCV(df)
+    logger.info(f"Sweep {strategy_id}: {len(param_sets)} sets in {len(chunks)} chunks on {workers} workers")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(shared.descriptor,)) as pool:
+            futures = [pool.submit(_run_chunk, strategy_id, chunk, sim_kwargs) for chunk in chunks]
+            try:
+                for fut in as_completed(futures):
+                    yield fut.result()
+            finally:
+                for fut in futures:
+                    fut.cancel()
+    finally:
+        shared.close()
@@ -0,0 +1,142 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.config import settings
+from core.execution import array_engine, batch_engine, sweep
+from core.utils.logger import logger
+
+# BatchRunResult fields usable as the in-sample objective
+OBJECTIVES = ("sharpe", "total_return", "final_equity")
+
+# Per-worker views over the shared arrays
+_worker_shm = None
+_worker_arrays = None
+
+
+@dataclass
+class WalkForwardWindow:
+    train_start: int
+    train_end: int # exclusive
+    test_start: int
+    test_end: int # exclusive
+    best_index: int
+    params: Dict[str, Any]
+    train_score: float
+    test_return: float = 0.0
+    test_trades: int = 0
+
+
+@dataclass
+class WalkForwardResult:
+    windows: List[WalkForwardWindow] = field(default_factory=list)
+    oos_index: Optional[pd.DatetimeIndex] = None
+    oos_equity: Optional[np.ndarray] = None
+
+
+def make_windows(n: int, train_bars: int, test_bars: int, step_bars: Optional[int] = None) -> List[Tuple[int, int, int, int]]:
+    """Rolling (train_start, train_end, test_start, test_end) bar ranges; step defaults to test_bars."""
+    if train_bars <= 0 or test_bars <= 0:
+        raise ValueError("train_bars and test_bars must be positive")
+    step = step_bars or test_bars
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= n:
+        windows.append((start, start + train_bars, start + train_bars, start + train_bars + test_bars))
+        start += step
+    return windows
+
+
+def _optimize(arrays: Dict[str, np.ndarray], lo: int, hi: int, objective: str, sim_kwargs: Dict[str, Any]):
+    run = batch_engine.simulate_batch(arrays['close'][lo:hi], arrays['high'][lo:hi], arrays['low'][lo:hi],
+                                      arrays['signals'][lo:hi], **sim_kwargs)
+    scores = getattr(run, objective)
+    best = int(np.argmax(scores))
+    return best, float(scores[best])
+
+
+def _init_worker(descriptor):
+    global _worker_shm, _worker_arrays
+    logger.remove()
+    _worker_shm, _worker_arrays = sweep.attach_arrays(descriptor)
+
+
+def _optimize_in_worker(lo: int, hi: int, objective: str, sim_kwargs: Dict[str, Any]):
+    return _optimize(_worker_arrays, lo, hi, objective, sim_kwargs)
+
+
+def run_walk_forward(df: pd.DataFrame, strategy_id: str, param_sets: List[Dict[str, Any]],
+                     train_bars: int, test_bars: int, step_bars: Optional[int] = None,
+                     objective: str = "sharpe", initial_capital: float = settings.INITIAL_CAPITAL,
+                     fee: float = settings.TAKER_FEE, max_workers: Optional[int] = None,
+                     tp_type: Optional[str] = None, tp_value: Optional[float] = None,
+                     sl_type: Optional[str] = None, sl_value: Optional[float] = None,
+                     trail_type: Optional[str] = None, trail_value: Optional[float] = None,
+                     time_stop: Optional[int] = None) -> WalkForwardResult:
+    """
+    Rolling walk-forward optimization.
+    Signals for every parameter set are computed once over the full series (indicators are
+    causal, so each window reuses the warmed-up values instead of recomputing them). Each
+    train window picks the best set by `objective`; those optimizations run in parallel.
+    The chosen set then trades the following test window, starting flat and carrying the
+    capital forward, and the out-of-sample equity is stitched across windows.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    if step_bars is not None and step_bars < test_bars:
+        raise ValueError("step_bars must be >= test_bars so out-of-sample windows do not overlap")
+    windows = make_windows(len(df), train_bars, test_bars, step_bars)
+    result = WalkForwardResult()
+    if not windows or not param_sets:
+        return result
+
+    arrays = {
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64) if 'high' in df.columns else df['close'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64) if 'low' in df.columns else df['close'].to_numpy(dtype=np.float64),
+        'signals': batch_engine.signal_matrix(df, strategy_id, param_sets),
+    }
+    risk = dict(tp_type=tp_type, tp_value=tp_value, sl_type=sl_type, sl_value=sl_value,
+                trail_type=trail_type, trail_value=trail_value, time_stop=time_stop)
+    sim_kwargs = dict(initial_capital=initial_capital, fee=fee, **risk)
+
+    # 1. In-sample optimization per window
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(windows)))
+    if workers == 1:
+        picks = [_optimize(arrays, w[0], w[1], objective, sim_kwargs) for w in windows]
+    else:
+        shared = sweep.SharedArrays(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(shared.descriptor,)) as pool:
+                picks = list(pool.map(_optimize_in_worker, [w[0] for w in windows], [w[1] for w in windows],
+                                      [objective] * len(windows), [sim_kwargs] * len(windows)))
+        finally:
+            shared.close()
+
+    # 2. Out-of-sample stitching (sequential: capital compounds across windows)
+    capital = float(initial_capital)
+    oos_parts, oos_index = [], []
+    for (tr_lo, tr_hi, te_lo, te_hi), (best, score) in zip(windows, picks):
+        run = array_engine.simulate(arrays['close'][te_lo:te_hi], arrays['high'][te_lo:te_hi],
+                                    arrays['low'][te_lo:te_hi], arrays['signals'][te_lo:te_hi, best],
+                                    initial_capital=capital, fee=fee, **risk)
+        end_capital = float(run.equity[-1])
+        result.windows.append(WalkForwardWindow(
+            train_start=tr_lo, train_end=tr_hi, test_start=te_lo, test_end=te_hi,
+            best_index=best, params=param_sets[best], train_score=score,
+            test_return=(end_capital / capital - 1) * 100 if capital else 0.0,
+            test_trades=len(run.fills)
+        ))
+        oos_parts.append(run.equity)
+        oos_index.append(np.arange(te_lo, te_hi))
+        capital = end_capital
+
+    result.oos_equity = np.concatenate(oos_parts)
+    result.oos_index = df.index[np.concatenate(oos_index)]
+    logger.info(f"Walk-forward {strategy_id}: {len(windows)} windows, {len(param_sets)} sets, "
+                f"OOS return {(capital / initial_capital - 1) * 100:.2f}%")
+    return result
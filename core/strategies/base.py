@@ -1,24 +1,86 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List
 from core.utils.logger import logger
+from core.utils.sim_logging import current_stats
+
+
+class Bars(Mapping):
+    """
+    Read-only column views over an OHLCV frame (no copy), plus its index.
+    `bars['close']` is a float ndarray.
+    """
+    def __init__(self, columns: Dict[str, np.ndarray], index: pd.Index):
+        self._columns = columns
+        self.index = index
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "Bars":
+        columns = {}
+        for col in df.columns:
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+                view = df[col].to_numpy()
+                if view.flags.writeable:
+                    view = view.view()
+                    view.flags.writeable = False
+                columns[col] = view
+        return cls(columns, df.index)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self._columns[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(dict(self._columns), index=self.index)
+
+
+@dataclass
+class SignalOutput:
+    signal: np.ndarray # int8: 1 entry, -1 exit, 0 hold
+    indicators: Dict[str, np.ndarray] = field(default_factory=dict)
+
 
 class Strategy(ABC):
     """
     Abstract base class for trading strategies.
-    Strategies should implement `generate_signals`.
+    Strategies implement `compute` (arrays in, int8 signal out); `generate_signals`
+    is the DataFrame adapter over it. Legacy strategies may implement `generate_signals` only.
     """
     def __init__(self, name: str, params: Dict[str, Any] = None):
         self.name = name
         self.params = params or {}
-        logger.info(f"Strategy initialized: {self.name} with params: {self.params}")
+        run_stats = current_stats()
+        if run_stats is not None:
+            run_stats.strategies += 1
+        else:
+            logger.info("Strategy initialized: {} with params: {}", self.name, self.params)
+
+    def compute(self, bars: Bars) -> SignalOutput:
+        """Signals and named indicator arrays for read-only `bars`."""
+        if type(self).generate_signals is Strategy.generate_signals:
+            raise NotImplementedError(f"{type(self).__name__} must implement compute or generate_signals")
+        out = self.generate_signals(bars.to_frame())
+        sig = out['signal'].to_numpy(dtype=np.float64) if 'signal' in out.columns else np.zeros(len(out))
+        return SignalOutput(np.nan_to_num(sig).astype(np.int8))
 
-    @abstractmethod
     def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Takes OHLCV data and returns a DataFrame with a 'signal' column.
         """
-        pass
+        out = self.compute(Bars.from_frame(df))
+        res = df.copy(deep=False)
+        for name, values in out.indicators.items():
+            res[name] = values
+        res['signal'] = out.signal.astype(np.int64)
+        return res
 
     @abstractmethod
     def describe(self) -> str:
@@ -35,6 +97,6 @@ class Strategy(ABC):
             logger.warning("Strategy received empty DataFrame")
             return df
             
-        logger.debug(f"Running strategy {self.name} on {len(df)} rows")
+        logger.debug("Running strategy {} on {} rows", self.name, len(df))
         result = self.generate_signals(df)
         return result
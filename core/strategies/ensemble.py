@@ -0,0 +1,130 @@
+import json
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from core.strategies.base import Bars
+from core.utils.logger import logger
+
+# Node keys are hashable tuples, so structurally identical nodes collapse into one:
+#   ("leaf", strategy_id, canonical_params_json)
+#   ("op", operator, (child_key, ...))
+NodeKey = Tuple
+
+OPERATORS = ("AND", "OR", "FILTER", "NOT", "MAJORITY")
+ENSEMBLE_ID = "EnsembleStrategy"
+
+
+def _canonical(params: Dict[str, Any]) -> str:
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+def legacy_to_tree(params: Dict[str, Any]) -> Dict[str, Any]:
+    """EnsembleStrategy params (strat_a/strat_b/operator/params_a/params_b) as a tree spec."""
+    if "tree" in params:
+        return params["tree"]
+    legs = []
+    for side, default in (("a", "SmaCrossover"), ("b", "VolatilityFilter")):
+        sid = params.get(f"strat_{side}", default)
+        leg_params = params.get(f"params_{side}", {})
+        legs.append(legacy_to_tree(leg_params) if sid == ENSEMBLE_ID else {"strategy": sid, "params": leg_params})
+    return {"op": params.get("operator", "FILTER"), "children": legs}
+
+
+class EnsembleGraph:
+    """
+    Ensembles compiled into a DAG of strategy leaves and operator nodes.
+    Nodes are interned by structure, so a leaf (strategy id, params) shared by several
+    ensembles, or by several branches of one, is stored once and evaluated once per dataset.
+
+    Tree spec: {"strategy": id, "params": {...}} for leaves, {"op": OP, "children": [...]} for
+    operators; an {"strategy": "EnsembleStrategy", "params": ...} leaf is inlined.
+    Operators on int8 signals (1 entry, -1 exit, 0 hold):
+      AND       children agree on a non-zero signal
+      OR        first non-zero child signal, left to right
+      FILTER    first child passes only where the second (gate) is 1
+      NOT       inverts the signal (entries <-> exits)
+      MAJORITY  1 / -1 when more than half of the children say so, else 0
+    """
+    def __init__(self):
+        self.nodes: Dict[NodeKey, Dict[str, Any]] = {}
+
+    def add(self, spec: Dict[str, Any]) -> NodeKey:
+        if "op" in spec:
+            op = str(spec["op"]).upper()
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown ensemble operator: {spec['op']}")
+            children = tuple(self.add(child) for child in spec.get("children", []))
+            arity = {"FILTER": 2, "NOT": 1}.get(op)
+            if (arity and len(children) != arity) or not children:
+                raise ValueError(f"{op} takes {arity or 'at least one'} operand(s), got {len(children)}")
+            key = ("op", op, children)
+        else:
+            sid = spec.get("strategy", "SmaCrossover")
+            params = spec.get("params", {}) or {}
+            if sid == ENSEMBLE_ID:
+                return self.add(legacy_to_tree(params))
+            key = ("leaf", sid, _canonical(params))
+        self.nodes.setdefault(key, {"spec": spec})
+        return key
+
+    @property
+    def leaves(self) -> List[NodeKey]:
+        return [k for k in self.nodes if k[0] == "leaf"]
+
+    def evaluate(self, bars: Bars, roots: List[NodeKey]) -> Dict[NodeKey, np.ndarray]:
+        """Signals of `roots`; every node reachable from them is computed exactly once."""
+        memo: Dict[NodeKey, np.ndarray] = {}
+        for root in roots:
+            self._eval(root, bars, memo)
+        return {root: memo[root] for root in roots}
+
+    def _eval(self, key: NodeKey, bars: Bars, memo: Dict[NodeKey, np.ndarray]) -> np.ndarray:
+        if key in memo:
+            return memo[key]
+        if key[0] == "leaf":
+            from core.strategies.factory import StrategyFactory
+            out = StrategyFactory.get_strategy(key[1], json.loads(key[2])).compute(bars).signal
+        else:
+            out = _apply(key[1], [self._eval(child, bars, memo) for child in key[2]])
+        memo[key] = out
+        return out
+
+
+def _apply(op: str, sigs: List[np.ndarray]) -> np.ndarray:
+    if op == "AND":
+        out = sigs[0]
+        for s in sigs[1:]:
+            out = np.where(out == s, out, 0)
+        return out.astype(np.int8)
+    if op == "OR":
+        out = sigs[0]
+        for s in sigs[1:]:
+            out = np.where(out != 0, out, s)
+        return out.astype(np.int8)
+    if op == "FILTER":
+        # Signal B must be 1 (Active) for Signal A to pass
+        return (sigs[1] == 1).astype(np.int8) * sigs[0]
+    if op == "NOT":
+        return -sigs[0]
+    # MAJORITY
+    stack = np.stack(sigs)
+    half = len(sigs) / 2
+    out = np.zeros(stack.shape[1], dtype=np.int8)
+    out[(stack == 1).sum(axis=0) > half] = 1
+    out[(stack == -1).sum(axis=0) > half] = -1
+    return out
+
+
+def ensemble_signal_matrix(bars: Bars, param_sets: List[Dict[str, Any]]) -> np.ndarray:
+    """(bars, sets) int8 signals of many EnsembleStrategy param sets over one shared DAG."""
+    graph = EnsembleGraph()
+    roots = {}
+    for j, params in enumerate(param_sets):
+        try:
+            roots[j] = graph.add(legacy_to_tree(params or {}))
+        except ValueError as e:
+            logger.warning(f"Ensemble {params} has no signal: {e}")
+    signals = graph.evaluate(bars, list(dict.fromkeys(roots.values())))
+    out = np.zeros((len(bars), len(param_sets)), dtype=np.int8)
+    for j, root in roots.items():
+        out[:, j] = signals[root]
+    return out
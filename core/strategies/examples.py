@@ -1,5 +1,4 @@
 import pandas as pd
-import pandas_ta as ta
 from core.strategies.base import Strategy
 from core.analysis.indicators import TechnicalAnalysis as TA
 
@@ -1,23 +1,34 @@
 import pandas as pd
 import numpy as np
-from core.strategies.base import Strategy
+from core.strategies.base import Bars, SignalOutput, Strategy
 from core.analysis.indicators import TechnicalAnalysis as TA
+from core.strategies.ensemble import ensemble_signal_matrix
+
+def _prev(x: np.ndarray) -> np.ndarray:
+    """Values shifted one bar forward (NaN first), like Series.shift(1)."""
+    out = np.empty(len(x))
+    out[:1] = np.nan
+    out[1:] = x[:-1]
+    return out
+
+def _cross_signals(buy: np.ndarray, sell: np.ndarray) -> np.ndarray:
+    signal = np.zeros(len(buy), dtype=np.int8)
+    signal[buy] = 1
+    signal[sell] = -1
+    return signal
 
 class RsiStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         length = int(self.params.get('length', 14))
         oversold = float(self.params.get('oversold', 30))
         overbought = float(self.params.get('overbought', 70))
-        df = df.copy()
-        TA.add_rsi(df, length=length)
-        col_rsi = f"RSI_{length}"
-        df['signal'] = 0
+        indicators = TA.rsi(bars, length=length)
+        rsi = indicators[f"RSI_{length}"]
+        rsi_prev = _prev(rsi)
         # Valid signals: exit previous state and cross trigger
-        buy_signal = (df[col_rsi] < oversold) & (df[col_rsi].shift(1) >= oversold)
-        sell_signal = (df[col_rsi] > overbought) & (df[col_rsi].shift(1) <= overbought)
-        df.loc[buy_signal, 'signal'] = 1
-        df.loc[sell_signal, 'signal'] = -1
-        return df
+        buy_signal = (rsi < oversold) & (rsi_prev >= oversold)
+        sell_signal = (rsi > overbought) & (rsi_prev <= overbought)
+        return SignalOutput(_cross_signals(buy_signal, sell_signal), indicators)
     
     def describe(self) -> str:
         return "Indicador de momentum que busca puntos de sobreextensión. Compra cuando el precio 'cae demasiado' y vende cuando 'sube demasiado'."
@@ -30,18 +41,15 @@ class RsiStrategy(Strategy):
         ]
 
 class SmaCrossoverStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         fast = int(self.params.get('fast_period', 10))
         slow = int(self.params.get('slow_period', 20))
-        df = df.copy()
-        TA.add_sma(df, length=fast)
-        TA.add_sma(df, length=slow)
-        df['signal'] = 0
-        buy = (df[f"SMA_{fast}"] > df[f"SMA_{slow}"]) & (df[f"SMA_{fast}"].shift(1) <= df[f"SMA_{slow}"].shift(1))
-        sell = (df[f"SMA_{fast}"] < df[f"SMA_{slow}"]) & (df[f"SMA_{fast}"].shift(1) >= df[f"SMA_{slow}"].shift(1))
-        df.loc[buy, 'signal'] = 1
-        df.loc[sell, 'signal'] = -1
-        return df
+        indicators = {**TA.sma(bars, length=fast), **TA.sma(bars, length=slow)}
+        f, s = indicators[f"SMA_{fast}"], indicators[f"SMA_{slow}"]
+        f_prev, s_prev = _prev(f), _prev(s)
+        buy = (f > s) & (f_prev <= s_prev)
+        sell = (f < s) & (f_prev >= s_prev)
+        return SignalOutput(_cross_signals(buy, sell), indicators)
 
     def describe(self) -> str:
         return "Estrategia de seguimiento de tendencia. Busca capturar movimientos largos cuando una tendencia de corto plazo supera a la de largo plazo."
@@ -53,15 +61,12 @@ class SmaCrossoverStrategy(Strategy):
         ]
 
 class VolatilityFilterStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         length = int(self.params.get('length', 20))
         threshold = float(self.params.get('threshold_pct', 0.5)) / 100
-        df = df.copy()
-        df['returns'] = df['close'].pct_change()
-        df['vol'] = df['returns'].rolling(length).std()
+        indicators = TA.volatility(bars, length=length)
         # 1 means "High Volatility / Trendable", 0 means "Low Volatility / Noise"
-        df['signal'] = (df['vol'] > threshold).astype(int)
-        return df
+        return SignalOutput((indicators['vol'] > threshold).astype(np.int8), indicators)
 
     def describe(self) -> str:
         return "Actúa como un 'interruptor' térmico. Detecta si el mercado tiene suficiente energía (volatilidad) para que las estrategias funcionen."
@@ -73,23 +78,22 @@ class VolatilityFilterStrategy(Strategy):
         ]
 
 class RandomStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         seed = int(self.params.get('seed', 42))
         prob = float(self.params.get('probability', 0.05))
         # Ensure probability is within [0, 1] for safety during stability audits
         prob = max(0.0, min(1.0, prob))
         
-        np.random.seed(seed)
-        df = df.copy()
+        # Local generator: same stream as np.random.seed(seed) without touching global state
+        rng = np.random.RandomState(seed)
         
         # We must ensure p sums to 1.0 exactly to avoid numpy errors
         p_none = 1.0 - prob
         p_buy = prob / 2.0
         p_sell = 1.0 - p_none - p_buy # Ensure exact sum to 1.0
         
-        signals = np.random.choice([0, 1, -1], size=len(df), p=[p_none, p_buy, p_sell])
-        df['signal'] = signals
-        return df
+        signals = rng.choice([0, 1, -1], size=len(bars), p=[p_none, p_buy, p_sell])
+        return SignalOutput(signals.astype(np.int8))
 
     def describe(self) -> str:
         return "Baseline de control. Si tu estrategia no puede batir a este generador de números aleatorios, no tienes una ventaja real."
@@ -101,30 +105,9 @@ class RandomStrategy(Strategy):
         ]
 
 class EnsembleStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
-        strat_a_id = self.params.get('strat_a', 'SmaCrossover')
-        strat_b_id = self.params.get('strat_b', 'VolatilityFilter')
-        op = self.params.get('operator', 'FILTER')
-        
-        # Instantiate sub-strategies with their specific params if available
-        s_a = StrategyFactory.get_strategy(strat_a_id, self.params.get('params_a', {}))
-        s_b = StrategyFactory.get_strategy(strat_b_id, self.params.get('params_b', {}))
-        
-        df_a = s_a.generate_signals(df.copy())
-        df_b = s_b.generate_signals(df.copy())
-        
-        df_res = df.copy()
-        sig_a = df_a['signal']
-        sig_b = df_b['signal']
-        
-        if op == 'AND':
-            df_res['signal'] = ((sig_a == sig_b) & (sig_a != 0)).astype(int) * sig_a
-        elif op == 'OR':
-            df_res['signal'] = sig_a.where(sig_a != 0, sig_b)
-        elif op == 'FILTER':
-            # Signal B must be 1 (Active) for Signal A to pass
-            df_res['signal'] = (sig_b == 1).astype(int) * sig_a
-        return df_res
+    def compute(self, bars: Bars) -> SignalOutput:
+        # Compiled to a DAG: legs shared across (nested) ensembles are evaluated once
+        return SignalOutput(ensemble_signal_matrix(bars, [self.params])[:, 0])
 
     def describe(self) -> str:
         return "El cerebro del laboratorio. Permite combinar dos lógicas para ver si la unión crea estabilidad o solo añade complejidad innecesaria."
@@ -137,11 +120,10 @@ class EnsembleStrategy(Strategy):
         ]
 
 class BollingerBandsStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         length = int(self.params.get('length', 20))
         std = float(self.params.get('std_dev', 2.0))
-        df = df.copy()
-        TA.add_bbands(df, length=length, std=std)
+        indicators = TA.bbands(bars, length=length, std=std)
         
         # Pandas TA names columns like: BBL_20_2.0, BBM_20_2.0, BBU_20_2.0
         # We need to handle potential float discrepancies in column naming if needed
@@ -152,19 +134,15 @@ class BollingerBandsStrategy(Strategy):
         # Fallback if typical naming fails (e.g. integer vs float string in col name)
         # But for now assume standard behavior.
         
-        df['signal'] = 0
-        
         # Mean Reversion Logic: 
         # Buy if Close < Lower Band (Oversold condition) -> Betting on return to mean
         # Sell if Close > Upper Band (Overbought condition)
         
         # Logic 1: Immediate Signal on State
-        buy_condition = df['close'] < df[col_lower]
-        sell_condition = df['close'] > df[col_upper]
-        
-        df.loc[buy_condition, 'signal'] = 1
-        df.loc[sell_condition, 'signal'] = -1
-        return df
+        close = bars['close']
+        buy_condition = close < indicators[col_lower]
+        sell_condition = close > indicators[col_upper]
+        return SignalOutput(_cross_signals(buy_condition, sell_condition), indicators)
 
     def describe(self) -> str:
         return "Clásica reversión a la media. Compra cuando el precio cae por debajo de la banda inferior (barato) y vende cuando rompe la superior (caro)."
@@ -176,28 +154,25 @@ class BollingerBandsStrategy(Strategy):
         ]
 
 class MacdStrategy(Strategy):
-    def generate_signals(self, df: pd.DataFrame) -> pd.DataFrame:
+    def compute(self, bars: Bars) -> SignalOutput:
         fast = int(self.params.get('fast', 12))
         slow = int(self.params.get('slow', 26))
         signal_span = int(self.params.get('signal', 9))
-        df = df.copy()
-        TA.add_macd(df, fast=fast, slow=slow, signal=signal_span)
+        indicators = TA.macd(bars, fast=fast, slow=slow, signal=signal_span)
         
         # Columns: MACD_12_26_9, MACDh_12_26_9 (hist), MACDs_12_26_9 (signal)
         col_macd = f"MACD_{fast}_{slow}_{signal_span}"
         col_signal = f"MACDs_{fast}_{slow}_{signal_span}"
         
-        df['signal'] = 0
+        line, sig = indicators[col_macd], indicators[col_signal]
+        line_prev, sig_prev = _prev(line), _prev(sig)
         
         # Crossover Logic
         # Buy: MACD crosses above Signal
-        buy_cross = (df[col_macd] > df[col_signal]) & (df[col_macd].shift(1) <= df[col_signal].shift(1))
+        buy_cross = (line > sig) & (line_prev <= sig_prev)
         # Sell: MACD crosses below Signal
-        sell_cross = (df[col_macd] < df[col_signal]) & (df[col_macd].shift(1) >= df[col_signal].shift(1))
-        
-        df.loc[buy_cross, 'signal'] = 1
-        df.loc[sell_cross, 'signal'] = -1
-        return df
+        sell_cross = (line < sig) & (line_prev >= sig_prev)
+        return SignalOutput(_cross_signals(buy_cross, sell_cross), indicators)
 
     def describe(self) -> str:
         return "El rey de los osciladores de tendencia. Busca cruces de impulso (momentum) para identificar nuevos ciclos de mercado."
@@ -0,0 +1,62 @@
+"""
+Quiet simulation logging: inside `quiet_simulation()` brokers and strategies stop emitting a
+log line per order, fill or instantiation and only bump counters on the run's SimStats.
+Every `sample_every`-th fill still goes out as a lazy DEBUG line, and one INFO summary is
+logged when the block exits. Outside the block, logging is unchanged (verbose).
+"""
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+from core.config import settings
+from core.utils.logger import logger
+
+_active: contextvars.ContextVar[Optional["SimStats"]] = contextvars.ContextVar("sim_stats", default=None)
+
+
+class SimStats:
+    """Counters of one simulation run (shared by every broker and strategy created inside it)."""
+    __slots__ = ("orders", "fills", "rejects", "strategies", "sample_every")
+
+    def __init__(self, sample_every: int = settings.SIM_LOG_SAMPLE_EVERY):
+        self.orders = 0
+        self.fills = 0
+        self.rejects: Counter = Counter() # by reason
+        self.strategies = 0
+        self.sample_every = sample_every
+
+    def reject(self, reason: str):
+        self.rejects[reason] += 1
+
+    def sampled(self, count: int) -> bool:
+        """True for every `sample_every`-th event (never when sampling is off)."""
+        return self.sample_every > 0 and count % self.sample_every == 0
+
+    def summary(self) -> Dict[str, Any]:
+        return {"orders": self.orders, "fills": self.fills, "rejects": sum(self.rejects.values()),
+                "rejects_by_reason": dict(self.rejects), "strategies": self.strategies}
+
+
+def current_stats() -> Optional[SimStats]:
+    """The enclosing quiet run's counters, or None when logging is verbose."""
+    return _active.get()
+
+
+@contextmanager
+def quiet_simulation(label: Optional[str] = None, sample_every: Optional[int] = None) -> Iterator[SimStats]:
+    """
+    Collects per-event logging into counters for the duration of the block. Nested blocks
+    share the outer run's counters. With a `label`, the summary is logged on exit.
+    """
+    outer = _active.get()
+    if outer is not None:
+        yield outer
+        return
+    stats = SimStats(settings.SIM_LOG_SAMPLE_EVERY if sample_every is None else sample_every)
+    token = _active.set(stats)
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+        if label:
+            logger.info("Simulation summary [{}]: {}", label, stats.summary())
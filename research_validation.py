@@ -9,8 +9,8 @@ ROOT_DIR = Path(__file__).resolve().parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from backend.app.routers.backtest import run_backtest
-from backend.app.schemas import BacktestRequest
+from backend.app.routers.backtest import run_backtest, run_batch_backtest
+from backend.app.schemas import BacktestRequest, BatchBacktestRequest
 
 def run_research_comparison():
     print("\n[RESEARCH] 1. COMPRACION CONTRA RANDOM BASELINE")
@@ -48,11 +48,13 @@ def run_sensitivity_analysis():
         {"fast_period": 50, "slow_period": 200}
     ]
     
+    # One vectorized pass over every parameter set
+    batch = run_batch_backtest(BatchBacktestRequest(
+        symbol="BTC/USDT", timeframe="1h", strategy_name="SmaCrossover", scenario_id="bull_2021", param_sets=params_list
+    ))
     sens_results = []
-    for p in params_list:
-        res = run_backtest(BacktestRequest(
-            symbol="BTC/USDT", timeframe="1h", strategy_name="SmaCrossover", scenario_id="bull_2021", params=p
-        ))
+    for res in batch.results:
+        p = res.params
         sens_results.append({
             "Params": f"{p['fast_period']}/{p['slow_period']}",
             "Return": res.total_return,
@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+
+def make_ohlcv(n=500, seed=0, band=0.005, jitter=False, start="2023-01-01", freq="h", index_name=None, price=100.0):
+    """
+    Hourly random-walk OHLCV (log-returns of 1%). high/low sit `band` above/below the close,
+    or a uniform draw in [0, band] per bar with `jitter`.
+    """
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    up = rng.uniform(0, band, n) if jitter else band
+    down = rng.uniform(0, band, n) if jitter else band
+    idx = pd.date_range(start, periods=n, freq=freq, name=index_name)
+    return pd.DataFrame({"open": close, "high": close * (1 + up), "low": close * (1 - down),
+                         "close": close, "volume": 1.0}, index=idx)
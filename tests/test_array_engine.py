@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from conftest import make_ohlcv
+from backend.app.routers.backtest import _execute_reference, _execute_array
+from backend.app.schemas import BacktestRequest
+from core.execution import array_engine, exits
+
+def make_signals(n=600, seed=1):
+    df = make_ohlcv(n, seed, band=0.02, jitter=True, start="2022-01-01")
+    df["signal"] = np.random.default_rng(seed + 100).choice([0, 1, -1], size=n, p=[0.8, 0.1, 0.1])
+    return df
+
+@pytest.mark.parametrize("risk", [
+    {},
+    {"tp_type": "percent", "tp_value": 2.0, "sl_type": "percent", "sl_value": 1.0},
+    {"tp_type": "absolute", "tp_value": 105.0, "sl_type": "absolute", "sl_value": 95.0},
+    {"trail_type": "percent", "trail_value": 1.5},
+    {"tp_type": "percent", "tp_value": 3.0, "sl_type": "percent", "sl_value": 2.0,
+     "trail_type": "absolute", "trail_value": 1.0, "time_stop_bars": 12},
+    {"time_stop_bars": 5},
+])
+def test_array_engine_matches_reference_loop(risk):
+    df = make_signals()
+    req = BacktestRequest(symbol="TEST/USDT", timeframe="1h", strategy_name="RandomStrategy", params={}, **risk)
+
+    eq_ref, log_ref, trades_ref, stats_ref = _execute_reference(df, req)
+    eq_arr, log_arr, trades_arr, stats_arr = _execute_array(df, req)
+
+    assert trades_ref == trades_arr
+    assert eq_ref == eq_arr
+    assert [s.model_dump() for s in log_ref] == [s.model_dump() for s in log_arr]
+    assert stats_ref == stats_arr
+
+def test_stop_loss_wins_same_bar_tie():
+    # Entry at bar 1 close (100); bar 2 touches both TP (+5%) and SL (-5%)
+    close = np.array([100.0, 100.0, 100.0, 100.0])
+    high = np.array([100.0, 100.0, 106.0, 100.0])
+    low = np.array([100.0, 100.0, 94.0, 100.0])
+    signal = np.array([1, 0, 0, 0])
+    run = array_engine.simulate(close, high, low, signal, initial_capital=1000.0, fee=0.0,
+                                tp_type="percent", tp_value=5.0, sl_type="percent", sl_value=5.0)
+    kinds = [f.kind for f in run.fills]
+    assert kinds == [array_engine.KIND_ENTRY, array_engine.KIND_STOP_LOSS]
+    assert run.fills[1].price == pytest.approx(95.0)
+
+def test_trailing_stop_follows_highs_and_wins_ties():
+    # Entry at bar 1 close (100); highs run to 110, then bar 5 touches both the TP and the
+    # 5% trail below 110 (104.5): the stop wins
+    close = np.array([100.0, 100.0, 104.0, 108.0, 109.0, 106.0, 100.0])
+    high = np.array([100.0, 100.0, 105.0, 110.0, 109.5, 120.0, 100.0])
+    low = np.array([100.0, 100.0, 103.0, 107.0, 106.0, 104.0, 100.0])
+    signal = np.array([1, 0, 0, 0, 0, 0, 0])
+    run = array_engine.simulate(close, high, low, signal, initial_capital=1000.0, fee=0.0,
+                                tp_type="percent", tp_value=15.0, trail_type="percent", trail_value=5.0)
+    assert [f.kind for f in run.fills] == [array_engine.KIND_ENTRY, exits.KIND_TRAILING_STOP]
+    assert run.fills[1].bar == 5
+    assert run.fills[1].price == pytest.approx(104.5)
+
+def test_find_exits_per_trade():
+    close = np.linspace(100.0, 80.0, 50)
+    high, low = close + 0.5, close - 0.5
+    rule = exits.ExitRule(sl_type="percent", sl_value=5.0, time_stop=30)
+    bars, kinds, prices = exits.find_exits(high, low, close, [0, 30, 45], close[[0, 30, 45]], rule)
+    # Falling 0.41/bar: the 5% stop is reached well before the time stop; the last trade runs out of data
+    assert kinds.tolist() == [exits.KIND_STOP_LOSS, exits.KIND_STOP_LOSS, 0]
+    assert prices[0] == pytest.approx(95.0) and low[bars[0]] <= 95.0 < low[bars[0] - 1]
+    assert bars[2] == -1
+
+    bars, kinds, prices = exits.find_exits(high, low, close, [0], [100.0], exits.ExitRule(time_stop=7))
+    assert (bars[0], kinds[0], prices[0]) == (7, exits.KIND_TIME_STOP, close[7])
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_ohlcv
+from core.execution import array_engine, batch_engine
+
+def make_market(n=800, seed=3):
+    df = make_ohlcv(n, seed, band=0.02, jitter=True)
+    signals = np.random.default_rng(seed + 100).choice([0, 1, -1], size=(n, 12), p=[0.9, 0.05, 0.05]).astype(np.int8)
+    return df["close"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(), signals
+
+def test_expand_grid():
+    sets = batch_engine.expand_grid({"fast_period": [5, 10], "slow_period": [20, 50, 100]})
+    assert len(sets) == 6
+    assert {"fast_period": 10, "slow_period": 50} in sets
+
+@pytest.mark.parametrize("risk", [{}, {"tp_type": "percent", "tp_value": 2.0, "sl_type": "percent", "sl_value": 1.5},
+                                  {"sl_type": "percent", "sl_value": 3.0, "trail_type": "percent", "trail_value": 1.0},
+                                  {"tp_type": "absolute", "tp_value": 130.0, "trail_type": "absolute", "trail_value": 5.0,
+                                   "time_stop": 12}])
+def test_batch_columns_match_single_runs(risk):
+    close, high, low, signals = make_market()
+    batch = batch_engine.simulate_batch(close, high, low, signals, initial_capital=1000.0, keep_equity=True, **risk)
+
+    for j in range(signals.shape[1]):
+        single = array_engine.simulate(close, high, low, signals[:, j], initial_capital=1000.0, **risk)
+        np.testing.assert_array_equal(batch.equity[:, j], single.equity)
+        assert batch.total_trades[j] == len(single.fills)
+        assert batch.final_equity[j] == single.equity[-1]
+
+def test_batch_metrics_match_pandas_definitions():
+    close, high, low, signals = make_market()
+    batch = batch_engine.simulate_batch(close, high, low, signals, keep_equity=True)
+    eq = pd.Series(batch.equity[:, 0])
+    rets = eq.pct_change().dropna()
+    dd = ((eq - eq.cummax()) / eq.cummax()).min() * 100
+    assert batch.max_drawdown[0] == pytest.approx(dd)
+    assert batch.sharpe[0] == pytest.approx(rets.mean() / rets.std() * np.sqrt(8760), rel=1e-6)
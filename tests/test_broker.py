@@ -1,6 +1,6 @@
 import pytest
 from core.execution.simulated_broker import SimulatedBroker
-from core.core.models import Order, OrderType, Side
+from core.core.models import Order, OrderStatus, OrderType, Side
 
 def test_broker_initialization():
     broker = SimulatedBroker(initial_capital=10000.0)
@@ -66,3 +66,126 @@ def test_broker_sell_execution():
     # Comm = 2000 * 0.001 = 2.0
     expected_cash = initial_cash_after_buy + 2000.0 - 2.0
     assert abs(broker.cash - expected_cash) < 1e-5
+
+def test_limit_book_fills_only_triggerable_orders():
+    broker = SimulatedBroker(initial_capital=100000.0)
+    buys = [Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=0.1, price=p) for p in (100.0, 95.0, 90.0)]
+    for o in buys:
+        broker.create_order(o)
+    other = broker.create_order(Order(symbol="ETH/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=1.0, price=1000.0))
+
+    broker.process_data_event("BTC/USDT", 96.0, 1)
+    assert [o.status for o in buys] == [OrderStatus.FILLED, OrderStatus.PENDING, OrderStatus.PENDING]
+    assert broker.trades[-1].price == 100.0 # limit price
+
+    broker.process_data_event("BTC/USDT", 92.0, 2)
+    assert buys[1].status == OrderStatus.FILLED and buys[2].status == OrderStatus.PENDING
+    assert sorted(o.source.id for o in broker.orders.values()) == sorted([buys[2].id, other.id])
+    assert sorted(o.source.id for o in broker.order_archive.values()) == sorted([buys[0].id, buys[1].id])
+
+    sell = broker.create_order(Order(symbol="BTC/USDT", side=Side.SELL, type=OrderType.LIMIT, amount=0.2, price=110.0))
+    broker.process_data_event("BTC/USDT", 105.0, 3)
+    assert sell.status == OrderStatus.PENDING
+    broker.process_data_event("BTC/USDT", 111.0, 4)
+    assert sell.status == OrderStatus.FILLED
+    assert abs(broker.positions["BTC/USDT"].amount) < 1e-9
+
+def test_cancel_and_market_fifo():
+    broker = SimulatedBroker(initial_capital=1000.0)
+    limit = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=1.0, price=50.0))
+    assert broker.cancel_order(limit.id)
+    assert not broker.cancel_order(limit.id)
+    assert len(broker.order_archive) == 1 and limit.status == OrderStatus.CANCELED
+
+    first = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.MARKET, amount=6.0))
+    second = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.MARKET, amount=6.0))
+    broker.process_data_event("BTC/USDT", 100.0, 1)
+    # Canceled limit never fills; the second market order runs out of cash
+    assert first.status == OrderStatus.FILLED and second.status == OrderStatus.REJECTED
+    assert not broker.orders and len(broker.trades) == 1
+
+def test_records_and_model_boundary():
+    from core.core.models import Position, Trade
+    from core.core.records import OrderRecord
+    broker = SimulatedBroker(initial_capital=1000.0)
+    first = broker.create_order(OrderRecord("BTC/USDT", Side.BUY, OrderType.MARKET, 1.0))
+    second = broker.create_order(OrderRecord("BTC/USDT", Side.SELL, OrderType.LIMIT, 1.0, 120.0))
+    assert second.id > first.id
+
+    broker.process_data_event("BTC/USDT", 100.0, 1625097600)
+    trade = broker.trades[-1]
+    assert trade.order_id == first.id and trade.cost == 100.0
+    model = trade.to_model()
+    assert isinstance(model, Trade) and model.order_id == str(first.id) and model.timestamp.year == 2021
+    position = broker.get_positions()["BTC/USDT"].to_model()
+    assert isinstance(position, Position) and position.amount == 1.0
+    assert first.status == OrderStatus.FILLED and second.status == OrderStatus.PENDING
+    assert [t.id for t in broker.trades] == [1]
+    # Records never stamp wall-clock time
+    from core.core.records import TradeRecord
+    with pytest.raises(TypeError):
+        TradeRecord(1, "BTC/USDT", Side.BUY, 1.0, 100.0, 100.0, 0.1).to_model()
+
+def test_process_bars_fills_limits_inside_the_bar_range():
+    import numpy as np
+    import pandas as pd
+    broker = SimulatedBroker(initial_capital=100000.0)
+    market = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.MARKET, amount=0.1))
+    buys = [broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=0.1, price=p))
+            for p in (95.0, 97.0, 80.0)]
+    sell = broker.create_order(Order(symbol="BTC/USDT", side=Side.SELL, type=OrderType.LIMIT, amount=0.3, price=104.0))
+
+    ts = pd.date_range("2024-01-01", periods=5, freq="h")
+    open_ = np.array([100.0, 100.0, 99.0, 98.0, 101.0])
+    close = np.array([100.0, 99.0, 98.0, 101.0, 103.0])
+    high = np.array([101.0, 100.5, 99.5, 102.0, 105.0])
+    low = np.array([99.0, 96.5, 94.0, 97.5, 100.5]) # closes never reach the limits
+    fills = broker.process_bars("BTC/USDT", ts, open_, high, low, close)
+
+    assert [(t.price, t.timestamp) for t in fills] == [(100.0, ts[0]), (97.0, ts[1]), (95.0, ts[2]), (104.0, ts[4])]
+    assert market.status == buys[0].status == buys[1].status == sell.status == OrderStatus.FILLED
+    assert buys[2].status == OrderStatus.PENDING
+    assert list(broker.orders) == [broker._model_ids[buys[2].id]]
+    assert abs(broker.positions["BTC/USDT"].amount) < 1e-9
+
+    # Untouched orders stay in the book for later per-bar events
+    broker.process_data_event("BTC/USDT", 79.0, ts[-1] + pd.Timedelta(hours=1))
+    assert buys[2].status == OrderStatus.FILLED and not broker.orders
+
+def test_process_bars_matches_same_bar_priority_and_rejections():
+    broker = SimulatedBroker(initial_capital=150.0)
+    low_bid = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=1.0, price=90.0))
+    high_bid = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=1.0, price=95.0))
+    # Sell before anything is held: triggers on bar 0 and is rejected
+    early = broker.create_order(Order(symbol="BTC/USDT", side=Side.SELL, type=OrderType.LIMIT, amount=1.0, price=100.0))
+    fills = broker.process_bars("BTC/USDT", [1, 2], [100.0, 100.0], [101.0, 100.0], [99.0, 85.0], [100.0, 88.0])
+
+    # Both bids trigger on bar 1; the better one fills first and the other runs out of cash
+    assert [t.price for t in fills] == [95.0]
+    assert high_bid.status == OrderStatus.FILLED and low_bid.status == OrderStatus.REJECTED
+    assert early.status == OrderStatus.REJECTED
+    assert broker.positions["BTC/USDT"].current_price == 88.0
+    assert broker.process_bars("BTC/USDT", [], [], [], [], []) == []
+
+def test_state_dict_round_trip_keeps_positions_orders_and_ledger():
+    import json
+    broker = SimulatedBroker(initial_capital=1000.0)
+    broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.MARKET, amount=2.0))
+    broker.process_data_event("BTC/USDT", 100.0, 1)
+    first = broker.create_order(Order(symbol="BTC/USDT", side=Side.SELL, type=OrderType.MARKET, amount=1.0))
+    second = broker.create_order(Order(symbol="BTC/USDT", side=Side.SELL, type=OrderType.MARKET, amount=1.0))
+    limit = broker.create_order(Order(symbol="BTC/USDT", side=Side.BUY, type=OrderType.LIMIT, amount=1.0, price=90.0))
+
+    state = json.loads(json.dumps(broker.state_dict()))
+    assert state["ledger_rows"] == 1 and len(state["orders"]) == 3
+    ledger = broker.trades
+    ledger.append(2, Side.SELL, "BTC/USDT", 1.0, 100.0, 100.0, 0.1) # written after the state: rolled back
+    restored = SimulatedBroker.from_state(state, ledger)
+
+    assert restored.stats.orders == 0 # counted by the run that created them
+    assert restored.cash == broker.cash and len(restored.trades) == 1
+    assert restored.positions["BTC/USDT"].amount == 2.0
+    assert restored.cancel_order(limit.id) and len(restored.orders) == 2
+    restored.process_data_event("BTC/USDT", 110.0, 3)
+    assert [t.amount for t in restored.trades][1:] == [1.0, 1.0]
+    assert abs(restored.positions["BTC/USDT"].amount) < 1e-9
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from conftest import make_ohlcv
+from core.strategies.base import Bars
+from core.strategies.ensemble import EnsembleGraph, ensemble_signal_matrix
+from core.strategies.factory import StrategyFactory, RandomStrategy
+
+def make_bars(n=500):
+    return Bars.from_frame(make_ohlcv(n, start="2022-01-01")[['close']])
+
+def rand(seed):
+    return {"strategy": "RandomStrategy", "params": {"seed": seed, "probability": 0.4}}
+
+def sig(bars, seed):
+    return StrategyFactory.get_strategy("RandomStrategy", {"seed": seed, "probability": 0.4}).compute(bars).signal
+
+def test_shared_leaves_are_interned_and_evaluated_once(monkeypatch):
+    bars = make_bars()
+    calls = []
+    original = RandomStrategy.compute
+    monkeypatch.setattr(RandomStrategy, "compute", lambda self, b: calls.append(self.params["seed"]) or original(self, b))
+
+    gate = {"strategy": "RandomStrategy", "params": {"probability": 0.4, "seed": 9}} # same leaf, other key order
+    param_sets = [{"tree": {"op": "FILTER", "children": [rand(s), gate]}} for s in range(5)]
+    param_sets.append({"strat_a": "EnsembleStrategy", "params_a": param_sets[0],
+                       "strat_b": "RandomStrategy", "params_b": {"seed": 9, "probability": 0.4}, "operator": "AND"})
+    out = ensemble_signal_matrix(bars, param_sets)
+    assert sorted(calls) == [0, 1, 2, 3, 4, 9]
+    np.testing.assert_array_equal(out[:, 2], np.where(sig(bars, 9) == 1, sig(bars, 2), 0))
+
+    graph = EnsembleGraph()
+    for p in param_sets[:5]:
+        graph.add(p["tree"])
+    assert len(graph.leaves) == 6
+
+def test_operators():
+    bars = make_bars()
+    a, b, c = sig(bars, 1), sig(bars, 2), sig(bars, 3)
+    graph = EnsembleGraph()
+    specs = {
+        "AND": {"op": "AND", "children": [rand(1), rand(2)]},
+        "OR": {"op": "OR", "children": [rand(1), rand(2)]},
+        "NOT": {"op": "NOT", "children": [rand(1)]},
+        "MAJORITY": {"op": "MAJORITY", "children": [rand(1), rand(2), rand(3)]},
+    }
+    keys = {name: graph.add(spec) for name, spec in specs.items()}
+    out = graph.evaluate(bars, list(keys.values()))
+    np.testing.assert_array_equal(out[keys["AND"]], np.where((a == b) & (a != 0), a, 0))
+    np.testing.assert_array_equal(out[keys["OR"]], np.where(a != 0, a, b))
+    np.testing.assert_array_equal(out[keys["NOT"]], -a)
+    votes = np.stack([a, b, c])
+    expected = np.where((votes == 1).sum(0) >= 2, 1, np.where((votes == -1).sum(0) >= 2, -1, 0))
+    np.testing.assert_array_equal(out[keys["MAJORITY"]], expected)
+    assert len(graph.leaves) == 3
+
+def test_invalid_specs():
+    graph = EnsembleGraph()
+    with pytest.raises(ValueError):
+        graph.add({"op": "XOR", "children": [rand(1), rand(2)]})
+    with pytest.raises(ValueError):
+        graph.add({"op": "FILTER", "children": [rand(1)]})
+    # Legacy unknown operator keeps producing no signal
+    out = StrategyFactory.get_strategy("EnsembleStrategy", {"operator": "XOR"}).compute(make_bars())
+    assert not out.signal.any()
@@ -0,0 +1,99 @@
+import numpy as np
+from conftest import make_ohlcv
+from core.execution import incremental
+from backend.app.routers.backtest import _simple_backtest
+
+def test_resume_processes_only_new_bars_and_matches_full_run(tmp_path):
+    store = incremental.CheckpointStore(tmp_path)
+    df = make_ohlcv(900, 11)
+    params = {"fast": 12, "slow": 26, "signal": 9}
+    first = incremental.run_incremental(df.iloc[:600], "X", "1h", "MacdStrategy", params, 1000.0, store=store)
+    assert first.resumed_bars == 0 and first.new_bars == 600
+
+    run = incremental.run_incremental(df, "X", "1h", "MacdStrategy", params, 1000.0, store=store)
+    assert run.resumed_bars == 600 and run.new_bars == 300
+    ref = _simple_backtest(df, "MacdStrategy", params, 1000.0)
+    np.testing.assert_allclose(run.equity, ref, rtol=1e-12)
+    assert len(run.ledger) > len(first.ledger)
+
+    # Nothing new: nothing simulated, same curve
+    again = incremental.run_incremental(df, "X", "1h", "MacdStrategy", params, 1000.0, store=store)
+    assert again.new_bars == 0
+    np.testing.assert_array_equal(again.equity, run.equity)
+
+def test_revised_history_or_other_params_replay(tmp_path):
+    store = incremental.CheckpointStore(tmp_path)
+    df = make_ohlcv(900, 11)
+    incremental.run_incremental(df.iloc[:600], "X", "1h", "SmaCrossover", {}, 1000.0, store=store)
+
+    revised = df.copy()
+    revised.iloc[590, revised.columns.get_loc("close")] *= 1.01
+    run = incremental.run_incremental(revised, "X", "1h", "SmaCrossover", {}, 1000.0, store=store)
+    assert run.resumed_bars == 0
+    np.testing.assert_allclose(run.equity, _simple_backtest(revised, "SmaCrossover", {}, 1000.0), rtol=1e-12)
+
+    other = incremental.run_incremental(df, "X", "1h", "SmaCrossover", {"fast_period": 5}, 1000.0, store=store)
+    assert other.resumed_bars == 0
+
+def test_too_short_warmup_falls_back_to_replay(tmp_path):
+    store = incremental.CheckpointStore(tmp_path)
+    df = make_ohlcv(900, 11)
+    params = {"fast_period": 10, "slow_period": 60}
+    incremental.run_incremental(df.iloc[:600], "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=20, store=store)
+    run = incremental.run_incremental(df, "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=20, store=store)
+    assert run.resumed_bars == 0
+    np.testing.assert_allclose(run.equity, _simple_backtest(df, "SmaCrossover", params, 1000.0), rtol=1e-12)
+
+def test_loader_reads_only_the_warmup_tail_and_new_bars(tmp_path):
+    store = incremental.CheckpointStore(tmp_path)
+    df = make_ohlcv(900, 11)
+    params = {"fast_period": 10, "slow_period": 30}
+    incremental.run_incremental(df.iloc[:600], "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=200, store=store)
+
+    requested = []
+    def load(start):
+        requested.append(start)
+        return df if start is None else df.loc[start:]
+    run = incremental.run_incremental(load, "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=200, store=store)
+    assert requested == [df.index[400]]
+    assert run.resumed_bars == 600 and run.new_bars == 300
+    assert run.index.equals(df.index) and run.first_close == df["close"].iloc[0]
+    np.testing.assert_allclose(run.equity, _simple_backtest(df, "SmaCrossover", params, 1000.0), rtol=1e-12)
+
+def test_resume_writes_only_the_new_bars_history(tmp_path, monkeypatch):
+    store = incremental.CheckpointStore(tmp_path)
+    df = make_ohlcv(900, 11)
+    params = {"fast_period": 10, "slow_period": 30}
+    incremental.run_incremental(df.iloc[:600], "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=200, store=store)
+    key = next(tmp_path.glob("*.json")).stem
+    history = store._history_dir(key)
+    sizes = {f.name: f.stat().st_size for f in history.glob("*.bin")}
+    assert sizes["equity.bin"] == 600 * 8
+    first_rows = store.load(key)[0]["ledger_rows"]
+
+    # Rows past the recorded lengths (a save interrupted before its metadata) are cut off
+    with open(history / "equity.bin", "ab") as f:
+        f.write(np.zeros(7).tobytes())
+
+    appended = []
+    append = store.append_history
+    monkeypatch.setattr(store, "append_history", lambda key, lengths, cols: appended.append(
+        {k: len(v) for k, v in cols.items()}) or append(key, lengths, cols))
+    read = []
+    load = store.load_history
+    monkeypatch.setattr(store, "load_history", lambda *a: read.append(a) or load(*a))
+    run = incremental.run_incremental(df, "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=200, store=store)
+    assert appended[0]["index"] == appended[0]["equity"] == 300
+    assert 0 < appended[0]["ledger_timestamp"] == len(run.ledger) - first_rows
+    assert (history / "equity.bin").stat().st_size == 900 * 8
+    # The checkpoint itself keeps only the warm-up tail
+    assert {k for k in store.load(key)[1] if not k.startswith("tail_")} == {"bars"}
+
+    # The full history is read only when asked for, and matches a full run
+    read.clear()
+    run = incremental.run_incremental(df, "X", "1h", "SmaCrossover", params, 1000.0, warmup_bars=200, store=store)
+    assert read == []
+    np.testing.assert_allclose(run.equity, _simple_backtest(df, "SmaCrossover", params, 1000.0), rtol=1e-12)
+    assert len(read) == 1 and run.index.equals(df.index)
+    full = incremental.run_incremental(df, "Y", "1h", "SmaCrossover", params, 1000.0, store=store)
+    np.testing.assert_array_equal(run.ledger.columns()["price"], full.ledger.columns()["price"])
@@ -0,0 +1,84 @@
+import threading
+import numpy as np
+import pandas as pd
+from conftest import make_ohlcv
+from core.analysis.indicator_cache import IndicatorCache, indicator_cache
+from core.strategies.factory import StrategyFactory
+
+def make_df(n=500, seed=0):
+    return make_ohlcv(n, seed, start="2022-01-01")[['close']]
+
+def sma(df, length):
+    return lambda: pd.DataFrame({f"SMA_{length}": df['close'].rolling(length).mean()})
+
+def test_hit_on_same_content_across_frames():
+    cache = IndicatorCache(max_bytes=1 << 20)
+    df = make_df()
+    a = cache.get_or_compute(df, "sma", {"length": 10}, ["close"], sma(df, 10))
+    b = cache.get_or_compute(df.copy(), "sma", {"length": 10}, ["close"], sma(df, 10))
+    assert a["SMA_10"] is b["SMA_10"]
+    assert not a["SMA_10"].flags.writeable
+    cache.get_or_compute(make_df(seed=1), "sma", {"length": 10}, ["close"], sma(df, 10))
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+def test_lru_eviction_by_bytes():
+    df = make_df(n=1000)
+    cache = IndicatorCache(max_bytes=2 * 1000 * 8)
+    for length in (5, 10, 20):
+        cache.get_or_compute(df, "sma", {"length": length}, ["close"], sma(df, length))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1 and stats["bytes"] <= cache.max_bytes
+    cache.get_or_compute(df, "sma", {"length": 5}, ["close"], sma(df, 5))
+    assert cache.stats()["misses"] == 4 # length 5 was the oldest entry
+
+def test_concurrent_access():
+    cache = IndicatorCache(max_bytes=1 << 20)
+    df = make_df()
+    results = []
+    def worker():
+        for length in range(2, 30):
+            results.append(cache.get_or_compute(df, "sma", {"length": length}, ["close"], sma(df, length)))
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 28
+    assert stats["entries"] == 28
+
+def test_strategies_share_cached_indicators():
+    df = make_df()
+    before = indicator_cache.stats()["hits"]
+    out1 = StrategyFactory.get_strategy("SmaCrossover", {"fast_period": 7, "slow_period": 21}).generate_signals(df)
+    out2 = StrategyFactory.get_strategy("SmaCrossover", {"fast_period": 7, "slow_period": 33}).generate_signals(df)
+    assert indicator_cache.stats()["hits"] >= before + 1
+    pd.testing.assert_series_equal(out1["SMA_7"], df['close'].rolling(7).mean(), check_names=False)
+    np.testing.assert_array_equal(out1["SMA_7"].to_numpy(), out2["SMA_7"].to_numpy())
+
+def test_known_read_only_inputs_are_not_hashed_again():
+    from core.strategies.base import Bars
+    cache = IndicatorCache(max_bytes=1 << 20)
+    df = make_df()
+    bars = Bars.from_frame(df)
+    for length in (5, 10, 5, 10):
+        cache.get_or_compute(bars, "sma", {"length": length}, ["close"], sma(df, length))
+    assert cache.stats()["hashes"] == 1 and cache.stats()["hits"] == 2
+    # Another view over the same buffers is recognized; a copy is hashed and hits by content
+    cache.get_or_compute(Bars.from_frame(df), "sma", {"length": 5}, ["close"], sma(df, 5))
+    assert cache.stats()["hashes"] == 1
+    cache.get_or_compute(Bars.from_frame(df.copy()), "sma", {"length": 5}, ["close"], sma(df, 5))
+    assert cache.stats()["hashes"] == 2 and cache.stats()["hits"] == 4
+    # Writable inputs are always hashed
+    raw = {"close": df["close"].to_numpy().copy()}
+    holder = type("Raw", (dict,), {})(raw)
+    holder.index = df.index
+    cache.get_or_compute(holder, "sma", {"length": 5}, ["close"], sma(df, 5))
+    cache.get_or_compute(holder, "sma", {"length": 5}, ["close"], sma(df, 5))
+    assert cache.stats()["hashes"] == 4
+
+def test_freed_buffers_are_forgotten():
+    cache = IndicatorCache(max_bytes=1 << 20)
+    df = make_df()
+    cache.get_or_compute(df, "sma", {"length": 5}, ["close"], sma(df, 5))
+    assert len(cache._fingerprints) == 1
+    del df
+    assert len(cache._fingerprints) == 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_ohlcv
+from core.analysis import kernels
+from core.analysis.indicators import TechnicalAnalysis as TA
+
+def make_ohlc(n=1500, seed=4):
+    return make_ohlcv(n, seed, band=0.01, jitter=True, start="2022-01-01", price=30000.0)
+
+def assert_close(actual, expected):
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(np.asarray(expected, dtype=float)))
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_kernels_match_pandas_definitions():
+    df = make_ohlc()
+    close = df['close']
+    rma = lambda s, n: s.ewm(alpha=1 / n, min_periods=n).mean()
+    diff = close.diff()
+    up, down = rma(diff.clip(lower=0), 14), rma(diff.clip(upper=0), 14)
+    assert_close(kernels.rsi(close.to_numpy(), 14), 100 * up / (up + down.abs()))
+
+    seeded = close.copy()
+    seeded.iloc[:19] = np.nan
+    seeded.iloc[19] = close.iloc[:20].mean()
+    assert_close(kernels.ema(close.to_numpy(), 20), seeded.ewm(span=20, adjust=False).mean())
+
+    prev = close.shift(1)
+    tr = pd.concat([df['high'] - df['low'], df['high'] - prev, prev - df['low']], axis=1).abs().max(axis=1)
+    tr.iloc[0] = np.nan
+    assert_close(kernels.atr(df['high'].to_numpy(), df['low'].to_numpy(), close.to_numpy(), 14), rma(tr, 14))
+
+    lower, mid, upper, _, _ = kernels.bbands(close.to_numpy(), 20, 2.0)
+    assert_close(mid, close.rolling(20).mean())
+    assert_close(upper - mid, 2.0 * close.rolling(20).std(ddof=0))
+
+def test_numpy_backend_column_names():
+    df = make_ohlc(300)
+    TA.add_rsi(df, 14); TA.add_ema(df, 20); TA.add_atr(df, 14)
+    TA.add_bbands(df, 20, 2.0); TA.add_macd(df, 12, 26, 9)
+    for col in ["RSI_14", "EMA_20", "ATRr_14", "BBL_20_2.0", "BBU_20_2.0", "BBP_20_2.0",
+                "MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]:
+        assert col in df.columns
+    assert df["MACDs_12_26_9"].isna().sum() == 33
+
+@pytest.mark.parametrize("indicator,kwargs", [
+    ("rsi", {"length": 14}), ("ema", {"length": 20}), ("atr", {"length": 14}),
+    ("bbands", {"length": 20, "std": 2.0}), ("macd", {"fast": 12, "slow": 26, "signal": 9}),
+])
+def test_parity_with_pandas_ta(indicator, kwargs, monkeypatch):
+    pytest.importorskip("pandas_ta")
+    df = make_ohlc()
+    monkeypatch.setattr(TA, "backend", "pandas_ta")
+    reference = getattr(TA, f"add_{indicator}")(df.copy(), **kwargs)
+    monkeypatch.setattr(TA, "backend", "numpy")
+    native = getattr(TA, f"add_{indicator}")(df.copy(), **kwargs)
+    new_cols = [c for c in reference.columns if c not in df.columns]
+    assert new_cols and set(new_cols) <= set(native.columns)
+    for col in new_cols:
+        assert_close(native[col].to_numpy(), reference[col].to_numpy())
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.core.models import Side
+from core.execution.ledger import TradeLedger
+
+def fill_ledger():
+    ledger = TradeLedger(capacity=2)
+    ts = pd.Timestamp("2024-01-01")
+    h = pd.Timedelta(hours=1)
+    rows = [
+        # symbol, side, amount, price, position after
+        ("BTC", Side.BUY, 1.0, 100.0, 1.0),
+        ("ETH", Side.BUY, 2.0, 10.0, 2.0),
+        ("BTC", Side.SELL, 0.5, 110.0, 0.5),
+        ("BTC", Side.SELL, 0.5, 120.0, 0.0),
+        ("ETH", Side.SELL, 2.0, 9.0, 0.0),
+        ("BTC", Side.BUY, 1.0, 130.0, 1.0), # still open
+    ]
+    for k, (sym, side, amount, price, pos) in enumerate(rows):
+        cost = amount * price
+        ledger.append(ts + k * h, side, sym, amount, price, cost, cost * 0.001, order_id=k, position=pos)
+    return ledger
+
+def test_growth_and_record_views():
+    ledger = fill_ledger()
+    assert len(ledger) == 6 and len(ledger.timestamp) >= 6
+    last = ledger[-1]
+    assert last.symbol == "BTC" and last.side == Side.BUY and last.cost == 130.0
+    assert last.timestamp == pd.Timestamp("2024-01-01 05:00")
+    assert [t.order_id for t in ledger] == list(range(6))
+
+def test_exports_share_memory():
+    ledger = fill_ledger()
+    df = ledger.to_pandas()
+    assert list(df["symbol"]) == ["BTC", "ETH", "BTC", "BTC", "ETH", "BTC"]
+    assert np.shares_memory(df["price"].to_numpy(), ledger.price)
+    pa = pytest.importorskip("pyarrow")
+    table = ledger.to_arrow()
+    assert table.num_rows == 6
+    assert table.column("timestamp").type == pa.timestamp("ns")
+    assert table.column("cost").to_pylist() == list(df["cost"])
+
+@pytest.mark.parametrize("recorded_position", [True, False])
+def test_round_trips(recorded_position):
+    ledger = fill_ledger()
+    if not recorded_position:
+        ledger.position[:len(ledger)] = np.nan
+    trips = ledger.round_trips()
+    assert list(trips["symbol"]) == ["BTC", "ETH"]
+    btc, eth = trips.iloc[0], trips.iloc[1]
+    assert btc["pnl"] == pytest.approx(55 + 60 - 100 - 0.215)
+    assert btc["exit_price"] == pytest.approx(115.0) and btc["fills"] == 3
+    assert eth["pnl"] == pytest.approx(18 - 20 - 0.038)
+    assert eth["return_pct"] == pytest.approx((18 - 20 - 0.038) / 20 * 100)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from core.analysis.monte_carlo import MonteCarlo
+
+def brute_force(log_r, starts, lens):
+    T = len(log_r)
+    idx = np.stack([np.concatenate([(s + np.arange(l)) % T for s, l in zip(st, ln)]) for st, ln in zip(starts, lens)])
+    log_eq = np.cumsum(log_r[idx], axis=1)
+    return MonteCarlo._summarize(log_eq, 1.0)
+
+def test_segments_cover_series():
+    rng = np.random.default_rng(0)
+    starts, lens = MonteCarlo._segments(rng, 64, 300, 12.0, 36)
+    assert (lens.sum(axis=1) == 300).all()
+    assert (lens >= 0).all() and (lens <= 36).all()
+    assert ((starts >= 0) & (starts < 300)).all()
+
+def test_block_bootstrap_matches_bar_by_bar_paths():
+    T, max_len = 400, 30
+    log_r = np.log1p(np.random.default_rng(1).normal(0, 0.02, T))
+    starts, lens = MonteCarlo._segments(np.random.default_rng(2), 40, T, 10.0, max_len)
+    final, max_dd = brute_force(log_r, starts, lens)
+
+    table = MonteCarlo._segment_tables(log_r, max_len)
+    seg_final, seg_dd = MonteCarlo._reduce_segments(table, starts, lens, max_len, 1.0)
+    np.testing.assert_allclose(seg_final, final, rtol=1e-12)
+    np.testing.assert_allclose(seg_dd, max_dd, atol=1e-10)
+
+def test_block_bootstrap_is_seeded_and_centered():
+    r = np.random.default_rng(5).normal(0.0002, 0.01, 2000)
+    a = MonteCarlo.block_bootstrap(r, 1000.0, n_paths=3000, seed=7)
+    b = MonteCarlo.block_bootstrap(r, 1000.0, n_paths=3000, seed=7)
+    np.testing.assert_array_equal(a.final_equity, b.final_equity)
+    assert (a.max_drawdown <= 0).all()
+    # Median log growth close to the realized one
+    realized = np.log1p(r).sum()
+    assert np.median(np.log(a.final_equity / 1000.0)) == pytest.approx(realized, abs=0.15)
+
+def test_trade_reshuffle_keeps_final_equity():
+    factors = [1.05, 0.9, 1.2, 0.97, 1.01, 0.8, 1.1]
+    res = MonteCarlo.trade_reshuffle(factors, 1000.0, n_paths=500, seed=1)
+    np.testing.assert_allclose(res.final_equity, 1000.0 * np.prod(factors))
+    assert res.max_drawdown.min() >= (0.9 * 0.97 * 0.8 - 1) * 100 - 1e-9
+    bands = res.bands()
+    assert bands["max_drawdown"]["p5"] <= bands["max_drawdown"]["p95"] <= 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_ohlcv
+from core.execution import portfolio
+from core.strategies.factory import StrategyFactory
+from backend.app.routers.backtest import _simple_backtest
+
+PARAMS = {"fast_period": 3, "slow_period": 8}
+FEE = 0.001
+
+def reference_portfolio(frames, params, initial_capital, fee):
+    """Bar-by-bar loop over the union timeline with the same rules as run_portfolio."""
+    symbols = list(frames)
+    strategy = StrategyFactory.get_strategy("SmaCrossover", params)
+    sig = {s: strategy.generate_signals(df)["signal"] for s, df in frames.items()}
+    index = sorted(set().union(*(df.index for df in frames.values())))
+    cash, qty, last, prev = initial_capital, dict.fromkeys(symbols, 0.0), {}, dict.fromkeys(symbols, 0)
+    equity = []
+    for ts in index:
+        live = [s for s in symbols if ts in frames[s].index]
+        for s in live:
+            last[s] = frames[s].at[ts, "close"]
+        for kind in (-1, 1): # exits first
+            for s in live:
+                if prev[s] != kind:
+                    continue
+                price = last[s]
+                if kind == -1 and qty[s] > 1e-9:
+                    cash += qty[s] * price * (1 - fee)
+                    qty[s] = 0.0
+                elif kind == 1 and qty[s] <= 1e-9:
+                    eq = cash + sum(q * last[o] for o, q in qty.items() if q)
+                    q = min(cash, eq / len(symbols)) * 0.98 / price
+                    cash -= q * price * (1 + fee)
+                    qty[s] = q
+        for s in live:
+            prev[s] = sig[s].at[ts]
+        equity.append(cash + sum(q * last[o] for o, q in qty.items() if q))
+    return pd.DatetimeIndex(index), np.array(equity)
+
+def test_single_symbol_matches_simple_backtest():
+    df = make_ohlcv(600, 1)
+    res = portfolio.run_portfolio({"X": df}, "SmaCrossover", PARAMS, initial_capital=1000.0)
+    ref = _simple_backtest(df, "SmaCrossover", PARAMS, 1000.0)
+    np.testing.assert_allclose(res.equity, ref, rtol=1e-12)
+    assert len(res.ledger) > 10
+
+def test_misaligned_symbols_share_cash_on_merged_timeline():
+    a = make_ohlcv(500, 2)
+    b = make_ohlcv(400, 3, start="2023-01-03 05:00") # starts later, ends later
+    c = make_ohlcv(200, 4, freq="2h").iloc[::3] # sparse, with gaps
+    frames = {"A": a, "B": b, "C": c}
+    res = portfolio.run_portfolio(frames, "SmaCrossover", PARAMS, initial_capital=1000.0, fee=FEE)
+
+    idx, ref = reference_portfolio(frames, PARAMS, 1000.0, FEE)
+    assert res.index.equals(idx)
+    np.testing.assert_allclose(res.equity, ref, rtol=1e-10)
+    np.testing.assert_allclose(res.equity, res.cash + res.market_value.sum(axis=0))
+    assert res.cash.min() >= 0
+
+    ledger = res.ledger.to_pandas()
+    assert set(ledger["symbol"]) == {"A", "B", "C"}
+    assert ledger["timestamp"].is_monotonic_increasing
+
+    stats = res.per_symbol().set_index("symbol")
+    assert stats.loc["C", "bars"] == len(c)
+    assert stats["trades"].sum() == len(res.ledger.round_trips())
+
+def test_rejects_empty_universe():
+    with pytest.raises(ValueError):
+        portfolio.run_portfolio({"A": make_ohlcv(0, 1)}, "SmaCrossover", PARAMS)
@@ -7,6 +7,8 @@ from pathlib import Path
 # We add it just in case.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
+from fastapi import HTTPException
+from pydantic import ValidationError
 from backend.app.routers.backtest import run_backtest
 from backend.app.schemas import BacktestRequest
 
@@ -44,6 +46,18 @@ class TestQuantAuditor(unittest.TestCase):
         res = run_backtest(req)
         if res.total_trades > 1000:
             self.assertTrue(res.total_return < 500, "Suspiciously high returns with massive trade count")
+    def test_missing_data_is_not_an_engine_failure(self):
+        """Data errors keep their status instead of surfacing as a 500."""
+        req = BacktestRequest(symbol="NOPE/USDT", timeframe="1h", strategy_name="SmaCrossover", params={})
+        with self.assertRaises(HTTPException) as ctx:
+            run_backtest(req)
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    def test_unknown_engine_is_rejected(self):
+        """A misspelled engine is a validation error, not a silent array run."""
+        with self.assertRaises(ValidationError):
+            BacktestRequest(symbol="BTC/USDT", timeframe="1h", strategy_name="SmaCrossover", params={},
+                            engine="refrence")
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+import pytest
+from core.core.models import OrderType, Side
+from core.core.records import OrderRecord
+from core.execution.simulated_broker import SimulatedBroker
+from core.strategies.factory import StrategyFactory
+from core.utils.logger import logger
+from core.utils.sim_logging import current_stats, quiet_simulation
+
+@pytest.fixture
+def log_lines():
+    lines = []
+    sink = logger.add(lambda m: lines.append(m.record), level="DEBUG")
+    yield lines
+    logger.remove(sink)
+
+def trade(broker, n):
+    for k in range(n):
+        broker.create_order(OrderRecord("BTC/USDT", Side.BUY, OrderType.MARKET, 1.0))
+        broker.process_data_event("BTC/USDT", 100.0, k)
+    broker.create_order(OrderRecord("BTC/USDT", Side.SELL, OrderType.MARKET, 1000.0)) # more than held
+    broker.process_data_event("BTC/USDT", 100.0, n)
+
+def test_quiet_run_counts_instead_of_logging(log_lines):
+    with quiet_simulation("unit", sample_every=4) as stats:
+        assert current_stats() is stats
+        StrategyFactory.get_strategy("SmaCrossover", {})
+        broker = SimulatedBroker(initial_capital=1000.0)
+        trade(broker, 12) # 10 fit in cash, 2 rejected for funds, the oversized sell for assets
+        with quiet_simulation() as inner: # nested blocks share the run
+            assert inner is stats
+    assert current_stats() is None
+
+    assert stats.summary() == {"orders": 13, "fills": 9, "rejects": 4, "strategies": 1,
+                               "rejects_by_reason": {"insufficient_funds": 3, "insufficient_assets": 1}}
+    assert broker.stats is stats
+    messages = [r["message"] for r in log_lines]
+    assert sum("FILLED #" in m for m in messages) == 2 # fills 4 and 8, at DEBUG
+    assert all(r["level"].name == "DEBUG" for r in log_lines[:-1])
+    assert messages[-1].startswith("Simulation summary [unit]")
+    assert not any("Order received" in m or "rejected" in m or "initialized" in m for m in messages)
+
+def test_verbose_outside_quiet_runs(log_lines):
+    broker = SimulatedBroker(initial_capital=1000.0)
+    trade(broker, 2)
+    messages = [r["message"] for r in log_lines]
+    assert sum("FILLED" in m for m in messages) == 2
+    assert any("Insufficient assets" in m for m in messages)
+    assert broker.stats.summary()["fills"] == 2
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_ohlcv
+from core.core.models import Side, OrderType
+from core.core.records import OrderRecord
+from core.execution import snapshots
+from core.execution.simulated_broker import SimulatedBroker
+from backend.app.routers.backtest import _simple_backtest, _execute_array, _exit_rule
+from backend.app.schemas import BacktestRequest
+from core.strategies.factory import StrategyFactory
+
+def test_state_at_matches_full_run_with_bounded_replay():
+    df = make_ohlcv(1200, 5)
+    run = snapshots.run_with_snapshots(df, "X", "SmaCrossover", {}, 1000.0, every=100)
+    np.testing.assert_allclose(run.equity, _simple_backtest(df, "SmaCrossover", {}, 1000.0), rtol=1e-12)
+    assert run.snapshots.bars == list(range(0, len(df), 100))
+
+    ledger = run.ledger.to_pandas()
+    fill_ts = ledger["timestamp"].to_numpy()
+    for n in [0, 1, 99, 100, 101, 555, len(df) - 1]:
+        state = run.state_at(df.index[n])
+        k = int(np.searchsorted(fill_ts, df.index[n].to_datetime64(), side="right"))
+        assert state["bar"] == n and state["replayed_bars"] < 100
+        assert state["trades"] == k
+        assert state["position"] == pytest.approx(ledger["position"].iloc[k - 1] if k else 0.0)
+        assert state["equity"] == pytest.approx(run.equity[n], rel=1e-12)
+        assert state["candle"]["close"] == df["close"].iloc[n]
+        assert set(state["indicators"]) == {"SMA_10", "SMA_20"}
+
+    # Between bars: the state of the last bar before the timestamp
+    mid = run.state_at(df.index[300] + pd.Timedelta(minutes=30))
+    assert mid["bar"] == 300
+    with pytest.raises(IndexError):
+        run.state_at(df.index[0] - pd.Timedelta(hours=1))
+
+def test_risk_managed_run_matches_the_run_endpoint_engine():
+    df = make_ohlcv(n=1500, seed=9)
+    params = {"fast_period": 8, "slow_period": 30}
+    req = BacktestRequest(symbol="X", timeframe="1h", strategy_name="SmaCrossover", params=params,
+                          initial_capital=1000.0, tp_type="percent", tp_value=3.0, sl_type="percent", sl_value=1.5,
+                          trail_type="percent", trail_value=1.0, time_stop_bars=24)
+    equity, signals_log, total_trades, _ = _execute_array(StrategyFactory.get_strategy("SmaCrossover", params)
+                                                          .generate_signals(df), req)
+    run = snapshots.run_with_snapshots(df, "X", "SmaCrossover", params, 1000.0, every=64, rule=_exit_rule(req))
+
+    assert len(run.ledger) == total_trades and {s.trigger for s in signals_log} > {"SIGNAL_ENTRY", "TRAILING_STOP"}
+    np.testing.assert_allclose(run.equity, equity, rtol=1e-12)
+    for trade, s in zip(run.ledger, signals_log):
+        assert str(trade.timestamp) == s.timestamp and trade.price == s.price
+        assert trade.amount == pytest.approx(s.amount, rel=1e-12)
+    for s in signals_log[::7]:
+        state = run.state_at(pd.Timestamp(s.timestamp))
+        assert state["replayed_bars"] < 64
+        assert state["cash"] == pytest.approx(s.cash_after, rel=1e-9)
+        assert state["position"] == pytest.approx(s.pos_after, rel=1e-9, abs=1e-12)
+        assert state["equity"] == pytest.approx(s.equity_after, rel=1e-9)
+
+def test_snapshots_keep_pending_orders():
+    broker = SimulatedBroker(initial_capital=1000.0)
+    index = snapshots.SnapshotIndex(every=10)
+    index.capture_until(5, broker)
+    broker.create_order(OrderRecord("X", Side.BUY, OrderType.LIMIT, 1.0, 90.0))
+    index.capture_until(25, broker)
+    assert index.bars == [0, 10, 20]
+    assert index.states[0]["orders"] == [] and index.states[1] is index.states[2]
+    restored = SimulatedBroker.from_state(index.states[index.at_or_before(17)])
+    assert restored.state_dict()["orders"] == index.states[1]["orders"]
+    assert len(restored.state_dict()["orders"]) == 1
+
+def test_registry_evicts_least_recently_used():
+    df = make_ohlcv(200, 5)
+    registry = snapshots.RunRegistry(max_runs=2)
+    a, b, c = (snapshots.run_with_snapshots(df, "X", "SmaCrossover", {}, 1000.0) for _ in range(3))
+    registry.add(a); registry.add(b)
+    registry.get(a.run_id)
+    registry.add(c)
+    assert registry.get(b.run_id) is None and registry.get(a.run_id) is a
@@ -0,0 +1,38 @@
+import numpy as np
+from conftest import make_ohlcv
+from core.analysis.stability import StabilityAnalysis
+
+def test_neighbors_perturb_numeric_params_one_at_a_time():
+    nbs = StabilityAnalysis.neighbors("SmaCrossover", {"fast_period": 20, "slow_period": 50}, pct=10)
+    assert {"fast_period": 18, "slow_period": 50} in nbs
+    assert {"fast_period": 22, "slow_period": 50} in nbs
+    assert {"fast_period": 20, "slow_period": 45} in nbs
+    assert {"fast_period": 20, "slow_period": 55} in nbs
+    assert len(nbs) == 4
+
+def test_neighbors_skip_selects_and_seed():
+    assert StabilityAnalysis.neighbors("EnsembleStrategy", {}) == []
+    nbs = StabilityAnalysis.neighbors("RandomStrategy", {"probability": 0.1, "seed": 1})
+    assert all(nb["seed"] == 1 for nb in nbs)
+
+def test_variance_is_positive_and_memoized():
+    df = make_ohlcv(1500, 21, band=0.0)
+    params = {"fast_period": 5, "slow_period": 20}
+    v1 = StabilityAnalysis.variance(df, "SmaCrossover", params, budget_s=10.0)
+    assert v1 > 0
+    assert StabilityAnalysis.variance(df, "SmaCrossover", params, budget_s=10.0) == v1
+
+def test_variance_is_the_std_of_neighbor_returns_in_points():
+    from core.execution import batch_engine
+    from core.strategies.base import Bars
+    from core.strategies.factory import StrategyFactory
+    df = make_ohlcv(1500, 21, band=0.0)
+    params = {"fast_period": 7, "slow_period": 30}
+    candidates = [params] + StabilityAnalysis.neighbors("SmaCrossover", params)
+    bars = Bars.from_frame(df)
+    signals = np.stack([StrategyFactory.get_strategy("SmaCrossover", p).compute(bars).signal for p in candidates], axis=1)
+    close = df["close"].to_numpy()
+    rets = batch_engine.simulate_batch(close, close, close, signals).total_return
+    v = StabilityAnalysis.variance(df, "SmaCrossover", params, budget_s=10.0)
+    assert np.isclose(v, np.std(rets))
+    assert not np.isclose(v, np.var(rets))
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+from conftest import make_ohlcv
+from core.data.storage import DataStorage
+
+def test_partitioned_append_overlap_and_compaction(tmp_path):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(96, 2, start="2024-01-30", index_name="timestamp")
+    storage.save_ohlcv(df.iloc[:60].copy(), "BTC/USDT", "1h")
+    files = storage.partition_files("BTC/USDT", "1h")
+    assert [f.parent.name for f in files] == ["month=01", "month=02"]
+    assert files[0].parent.parent.name == "year=2024"
+
+    # New candles after the stored ones: appended as a new file, nothing rewritten
+    storage.save_ohlcv(df.iloc[60:].copy(), "BTC/USDT", "1h")
+    appended = storage.partition_files("BTC/USDT", "1h")
+    assert len(appended) == 3 and set(files) <= set(appended)
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "1h"), df, check_freq=False)
+
+    # Revised candles: only February is rewritten, the new values win
+    revised = df.iloc[[50, 80]].copy()
+    revised["close"] = -1.0
+    storage.save_ohlcv(revised, "BTC/USDT", "1h")
+    after = storage.partition_files("BTC/USDT", "1h")
+    assert after[0] == files[0] and len(after) == 2
+    loaded = storage.load_ohlcv("BTC/USDT", "1h")
+    assert len(loaded) == len(df) and loaded.index.is_monotonic_increasing
+    assert (loaded["close"].iloc[[50, 80]] == -1.0).all()
+
+    storage.save_ohlcv(make_ohlcv(5, 3, start="2024-02-04 00:00", index_name="timestamp"), "BTC/USDT", "1h")
+    assert len(storage.partition_files("BTC/USDT", "1h")) == 3
+    assert storage.compact("BTC/USDT", "1h") == 1
+    assert len(storage.partition_files("BTC/USDT", "1h")) == 2
+    assert len(storage.load_ohlcv("BTC/USDT", "1h")) == len(df) + 5
+
+def test_compaction_keeps_derived_data_without_rebuilding(tmp_path, monkeypatch):
+    import core.data.storage as storage_module
+    storage = DataStorage(tmp_path, ipc_cache=True)
+    df = make_ohlcv(96, 2, start="2024-01-30", index_name="timestamp")
+    storage.save_ohlcv(df.iloc[:60].copy(), "BTC/USDT", "1h")
+    storage.save_ohlcv(df.iloc[60:].copy(), "BTC/USDT", "1h")
+    audit = storage.audit("BTC/USDT", "1h")
+    for tf in ("1h", "4h", "1d"):
+        storage.load_ohlcv("BTC/USDT", tf)
+    assert storage.compact("BTC/USDT", "1h") == 1
+
+    # Nothing is read back from the stored 1h data: no index, resampled or IPC rebuild
+    monkeypatch.setattr(storage_module, "_read_timestamps", None)
+    monkeypatch.setattr(storage, "_load_from_parquet", None)
+    assert storage.audit("BTC/USDT", "1h") == audit
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "1h"), df, check_freq=False)
+    assert len(storage.load_ohlcv("BTC/USDT", "4h")) == 24
+    storage.ipc_cache = False
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "12h"), DataStorage._resample(storage, df, "12h"),
+                                  check_freq=False)
+
+def test_legacy_flat_file_is_read_and_migrated(tmp_path):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(96, 2, start="2024-01-30", index_name="timestamp")
+    df.to_parquet(storage._get_file_path("ETH/USDT", "1h"))
+    assert storage.list_datasets() == [("ETH/USDT", "1h")]
+    pd.testing.assert_frame_equal(storage.load_ohlcv("ETH/USDT", "1h"), df, check_freq=False)
+    assert len(storage.load_ohlcv("ETH/USDT", "4h")) == 24
+
+    storage.save_ohlcv(make_ohlcv(10, 4, start="2024-02-03", index_name="timestamp"), "ETH/USDT", "1h")
+    assert not storage._get_file_path("ETH/USDT", "1h").exists()
+    assert storage.list_datasets() == [("ETH/USDT", "1h")]
+    loaded = storage.load_ohlcv("ETH/USDT", "1h")
+    assert len(loaded) == len(df) + 10 and loaded.index.is_unique
+
+def test_range_and_column_pushdown(tmp_path):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(24 * 120, 5, start="2024-01-01", index_name="timestamp")
+    storage.save_ohlcv(df.copy(), "BTC/USDT", "1h")
+    start, end = pd.Timestamp("2024-02-10 05:00"), pd.Timestamp("2024-03-03 13:30")
+
+    # Only the February and March files are read
+    assert [f.parent.name for f in storage.partition_files("BTC/USDT", "1h", start, end)] == ["month=02", "month=03"]
+    got = storage.load_ohlcv("BTC/USDT", "1h", start="2024-02-10T05:00:00Z", end=end, columns=["close"])
+    assert list(got.columns) == ["close"]
+    pd.testing.assert_frame_equal(got, df.loc[start:end, ["close"]], check_freq=False)
+
+    # Resampled bars are the full-history bars labeled in the range
+    full = storage.load_ohlcv("BTC/USDT", "4h")
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "4h", start, end),
+                                  full[(full.index >= start) & (full.index <= end)])
+    assert storage.load_ohlcv("BTC/USDT", "1h", start="2030-01-01").empty
+
+def test_resampled_bars_are_materialized_and_refreshed_incrementally(tmp_path, monkeypatch):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(24 * 40, 6, start="2023-12-10", index_name="timestamp")
+    storage.save_ohlcv(df.iloc[:-30].copy(), "BTC/USDT", "1h")
+    for tf in ("4h", "12h", "1d"):
+        assert (storage._resampled_dir("BTC/USDT", tf) / "_source").exists()
+        pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", tf), storage._resample(df.iloc[:-30], tf),
+                                      check_freq=False)
+    before = {f: f.stat().st_mtime_ns for f in (tmp_path / "resampled").rglob("year=2023/part-*.parquet")}
+    assert len(before) == 3
+
+    # Appending only reads the 1h bars of the trailing buckets, and leaves the older partitions alone
+    reads = []
+    load = storage._load_from_parquet
+    monkeypatch.setattr(storage, "_load_from_parquet", lambda *a, **k: reads.append(k.get("start")) or load(*a, **k))
+    storage.save_ohlcv(df.iloc[-30:].copy(), "BTC/USDT", "1h")
+    assert reads and all(start is not None and start >= df.index[-30].floor("1D") for start in reads)
+    assert {f: f.stat().st_mtime_ns for f in before} == before
+
+    # Served as stored, without resampling
+    reads.clear()
+    monkeypatch.setattr(storage, "_resample", None)
+    for tf in ("4h", "12h", "1d"):
+        expected = DataStorage._resample(storage, df, tf)
+        pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", tf), expected, check_freq=False)
+    assert reads == []
+
+def test_ipc_cache_is_mapped_and_regenerated_on_change(tmp_path, monkeypatch):
+    storage = DataStorage(tmp_path, ipc_cache=True)
+    df = make_ohlcv(48, 2, start="2024-01-30", index_name="timestamp")
+    storage.save_ohlcv(df.iloc[:40].copy(), "BTC/USDT", "1h")
+    first = storage.load_ohlcv("BTC/USDT", "1h")
+    old = storage._ipc_path("BTC/USDT", "1h", storage._source_fingerprint("BTC/USDT"))
+    assert old.exists()
+    assert not first["close"].to_numpy().flags.writeable # view of the mapping
+
+    # Served from the mapped copy: no parquet decode
+    load = storage._load_from_parquet
+    monkeypatch.setattr(storage, "_load_from_parquet", None)
+    got = storage.load_ohlcv("BTC/USDT", "1h", start=df.index[10], end=df.index[20], columns=["close"])
+    pd.testing.assert_frame_equal(got, df.iloc[10:21][["close"]], check_freq=False)
+
+    assert len(storage.load_ohlcv("BTC/USDT", "4h")) == 10
+
+    # A save carries the copies over, decoding only the new tail; loads then read no parquet
+    reads = []
+    monkeypatch.setattr(storage, "_load_from_parquet", lambda *a, **k: reads.append(k.get("start")) or load(*a, **k))
+    storage.save_ohlcv(df.iloc[40:].copy(), "BTC/USDT", "1h")
+    assert reads and all(start is not None and start >= df.index[40].floor("1D") for start in reads)
+    monkeypatch.setattr(storage, "_load_from_parquet", None)
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "1h"), df, check_freq=False)
+    pd.testing.assert_frame_equal(storage.load_ohlcv("BTC/USDT", "4h"), DataStorage._resample(storage, df, "4h"),
+                                  check_freq=False)
+
+    # The new version is a new file; the old one (still mapped by `first`) is dropped
+    new = storage._ipc_path("BTC/USDT", "1h", storage._source_fingerprint("BTC/USDT"))
+    assert new.exists() and new != old and not old.exists()
+    pd.testing.assert_frame_equal(first, df.iloc[:40], check_freq=False)
+
+def test_quality_index_built_at_ingest_and_audited_by_range(tmp_path):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(200, 2, start="2024-01-30", index_name="timestamp")
+    # Two holes (3h and 6h), two repeated rows and one row out of order
+    body = df.drop(df.index[[40, 41, 120, 121, 122, 123, 124]])
+    messy = pd.concat([body.iloc[:11], body.iloc[[10, 10]], body.iloc[11:]])
+    messy = pd.concat([messy.iloc[:150], messy.iloc[[-1]], messy.iloc[150:-1]])
+    storage.save_ohlcv(messy.copy(), "BTC/USDT", "1h")
+
+    assert storage.audit("BTC/USDT", "1h") == {
+        "is_ordered": False, "duplicates": 2, "gaps": 2, "biggest_gap": str(pd.Timedelta("6h"))}
+    first_hole = storage.audit("BTC/USDT", "1h", df.index[0], df.index[100])
+    assert first_hole == {"is_ordered": True, "duplicates": 2, "gaps": 1, "biggest_gap": str(pd.Timedelta("3h"))}
+    assert storage.audit("BTC/USDT", "1h", df.index[130], df.index[-2])["gaps"] == 0
+    # A gap counts only when the range holds both bars around it
+    assert storage.audit("BTC/USDT", "1h", df.index[42], df.index[-1])["gaps"] == 1
+    # Resampled timeframes audit their 1h source
+    assert storage.audit("BTC/USDT", "4h")["gaps"] == 2
+
+    # The write history survives later saves; a clean append adds nothing
+    storage.save_ohlcv(make_ohlcv(10, 4, start=df.index[-1] + pd.Timedelta("1h"), index_name="timestamp"), "BTC/USDT", "1h")
+    index = storage.quality_index("BTC/USDT", "1h")
+    assert index.rows == len(body) + 10 and len(index.duplicate_ts) == 2 and len(index.unordered_ts) == 1
+
+def test_quality_index_is_updated_from_the_written_partitions(tmp_path, monkeypatch):
+    import core.data.storage as storage_module
+    from core.data.quality import QualityIndex
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(24 * 70, 5, start="2024-01-01", index_name="timestamp") # January to mid-March
+    holes = df.drop(df.index[[100, 101, 900, 1500, 1501, 1502]])
+    messy = pd.concat([holes.iloc[:11], holes.iloc[[10, 10]], holes.iloc[11:1400]])
+    storage.save_ohlcv(messy.copy(), "BTC/USDT", "1h")
+    first = storage.audit("BTC/USDT", "1h")
+
+    # Re-ingesting the same window does not count its repeated rows again
+    storage.save_ohlcv(messy.copy(), "BTC/USDT", "1h")
+    assert storage.audit("BTC/USDT", "1h") == first == {
+        "is_ordered": True, "duplicates": 2, "gaps": 2, "biggest_gap": str(pd.Timedelta("3h"))}
+
+    # Filling a hole and appending read only the partitions written to
+    reads = []
+    read = storage_module._read_timestamps
+    monkeypatch.setattr(storage_module, "_read_timestamps", lambda files: reads.extend(files) or read(files))
+    storage.save_ohlcv(df.iloc[[900]].copy(), "BTC/USDT", "1h")
+    storage.save_ohlcv(holes.iloc[1400:].copy(), "BTC/USDT", "1h")
+    assert reads and {f.parent.name for f in reads} == {"month=02", "month=03"}
+
+    index = storage.quality_index("BTC/USDT", "1h")
+    full = QualityIndex.build(read(storage.partition_files("BTC/USDT", "1h")), 3_600_000_000_000, index.source)
+    assert index.rows == full.rows == len(holes) + 1
+    np.testing.assert_array_equal(index.gap_start, full.gap_start)
+    np.testing.assert_array_equal(index.gap_end, full.gap_end)
+    assert storage.audit("BTC/USDT", "1h")["gaps"] == 2 and len(index.duplicate_ts) == 2
+
+def test_quality_index_of_legacy_file_is_built_lazily(tmp_path):
+    storage = DataStorage(tmp_path)
+    df = make_ohlcv(48, 2, start="2024-01-30", index_name="timestamp")
+    df = df.drop(df.index[[5, 6]])
+    df.to_parquet(tmp_path / "ETH_USDT_1h.parquet")
+    assert storage.audit("ETH/USDT", "1h") == {
+        "is_ordered": True, "duplicates": 0, "gaps": 1, "biggest_gap": str(pd.Timedelta("3h"))}
+    assert (tmp_path / "quality" / "ETH_USDT_1h.json").exists()
+    assert storage.audit("SOL/USDT", "1h") is None
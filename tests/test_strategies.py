@@ -2,7 +2,7 @@ import pytest
 import pandas as pd
 import numpy as np
 from core.strategies.factory import StrategyFactory
-from core.strategies.base import Strategy
+from core.strategies.base import Bars, SignalOutput, Strategy
 
 def create_dummy_data():
     # Linear price increase: 100, 101, 102... 120
@@ -69,3 +69,47 @@ def test_random_strategy_stability():
     
     # Should be different
     assert not df1['signal'].equals(df3['signal'])
+
+def test_compute_returns_int8_over_column_views():
+    x = np.linspace(0, 8*np.pi, 300)
+    df = pd.DataFrame({'close': 100 + 10 * np.sin(x)}, index=pd.date_range('2021-01-01', periods=300, freq='h'))
+    bars = Bars.from_frame(df)
+    assert np.shares_memory(bars['close'], df['close'].to_numpy())
+    assert not bars['close'].flags.writeable
+
+    strategy = StrategyFactory.get_strategy("SmaCrossover", {'fast_period': 5, 'slow_period': 15})
+    out = strategy.compute(bars)
+    assert out.signal.dtype == np.int8
+    assert set(out.indicators) == {'SMA_5', 'SMA_15'}
+    # DataFrame adapter carries the same signal and indicator columns
+    framed = strategy.generate_signals(df)
+    np.testing.assert_array_equal(framed['signal'].to_numpy(), out.signal)
+    np.testing.assert_array_equal(framed['SMA_5'].to_numpy(), out.indicators['SMA_5'])
+    assert 'signal' not in df.columns
+
+def test_ensemble_combines_leg_arrays():
+    df = pd.DataFrame({'close': 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, 400))},
+                      index=pd.date_range('2021-01-01', periods=400, freq='h'))
+    bars = Bars.from_frame(df)
+    a = StrategyFactory.get_strategy("RandomStrategy", {'seed': 1, 'probability': 0.3}).compute(bars).signal
+    b = StrategyFactory.get_strategy("RandomStrategy", {'seed': 2, 'probability': 0.3}).compute(bars).signal
+    params = {'strat_a': 'RandomStrategy', 'strat_b': 'RandomStrategy',
+              'params_a': {'seed': 1, 'probability': 0.3}, 'params_b': {'seed': 2, 'probability': 0.3}}
+    for op, expected in [('AND', np.where((a == b) & (a != 0), a, 0)), ('OR', np.where(a != 0, a, b)),
+                         ('FILTER', np.where(b == 1, a, 0))]:
+        out = StrategyFactory.get_strategy("EnsembleStrategy", {**params, 'operator': op}).compute(bars)
+        np.testing.assert_array_equal(out.signal, expected)
+
+def test_legacy_dataframe_strategy_is_adapted():
+    class Legacy(Strategy):
+        def generate_signals(self, df):
+            df = df.copy()
+            df['signal'] = np.where(df['close'] > df['close'].shift(1), 1, -1)
+            return df
+        def describe(self): return ""
+        def parameters_schema(self): return []
+
+    df = pd.DataFrame({'close': [1.0, 2.0, 1.5, 3.0]}, index=pd.date_range('2021-01-01', periods=4, freq='h'))
+    out = Legacy("legacy").compute(Bars.from_frame(df))
+    assert isinstance(out, SignalOutput)
+    np.testing.assert_array_equal(out.signal, np.array([-1, 1, -1, 1], dtype=np.int8))
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from conftest import make_ohlcv
+from core.analysis.metrics import PerformanceMetrics
+from core.execution import streaming
+from backend.app.routers.backtest import _simple_backtest
+
+def test_streamed_run_matches_in_memory_backtest(tmp_path):
+    df = make_ohlcv(2000, 21, index_name="timestamp")
+    df.to_parquet(tmp_path / "data.parquet", row_group_size=300)
+    params = {"fast": 12, "slow": 26, "signal": 9}
+    res = streaming.stream_backtest(tmp_path / "data.parquet", "MacdStrategy", params, tmp_path / "out",
+                                    initial_capital=1000.0, batch_size=250, warmup_bars=300)
+
+    ref = np.asarray(_simple_backtest(df, "MacdStrategy", params, 1000.0))
+    equity = pq.read_table(res.equity_path).to_pandas()
+    assert res.bars == len(df) == len(equity)
+    assert (equity["timestamp"].to_numpy() == df.index.to_numpy()).all()
+    np.testing.assert_allclose(equity["equity"], ref, rtol=1e-12)
+
+    expected = PerformanceMetrics.calculate(pd.Series(ref, index=df.index))
+    assert res.metrics == {k: expected[k] for k in res.metrics}
+
+    trades = pq.read_table(res.trades_path)
+    assert res.total_trades == trades.num_rows > 20
+    assert (np.diff(trades.column("timestamp").to_numpy().astype(np.int64)) >= 0).all()
+    assert res.stats["fills"] == res.total_trades
+
+def test_short_warmup_is_reported(tmp_path, caplog):
+    from core.utils.logger import logger
+    lines = []
+    sink = logger.add(lambda m: lines.append(m.record["message"]), level="WARNING")
+    try:
+        df = make_ohlcv(600, 21, index_name="timestamp")
+        df.to_parquet(tmp_path / "data.parquet")
+        streaming.stream_backtest(tmp_path / "data.parquet", "SmaCrossover", {"fast_period": 5, "slow_period": 80},
+                                  tmp_path / "out", batch_size=100, warmup_bars=10)
+    finally:
+        logger.remove(sink)
+    assert any("warm-up of 10 bars is too short" in m for m in lines)
+
+def test_broker_memory_stays_flat_across_batches(tmp_path, monkeypatch):
+    df = make_ohlcv(2000, 21, index_name="timestamp")
+    df.to_parquet(tmp_path / "data.parquet")
+    sizes = []
+    step = streaming.step_broker
+    def spy(broker, *args, **kwargs):
+        equity = step(broker, *args, **kwargs)
+        sizes.append((len(broker.order_archive), len(broker.orders),
+                      sum(len(b.market) for b in broker._books.values())))
+        return equity
+    monkeypatch.setattr(streaming, "step_broker", spy)
+    res = streaming.stream_backtest(tmp_path / "data.parquet", "SmaCrossover", {"fast_period": 5, "slow_period": 20},
+                                    tmp_path / "out", batch_size=200, warmup_bars=50)
+    assert res.total_trades > 20 and len(sizes) == 10
+    assert set(sizes) == {(0, 0, 0)}
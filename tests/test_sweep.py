@@ -0,0 +1,27 @@
+import pandas as pd
+from conftest import make_ohlcv
+from core.execution import batch_engine, sweep
+
+def test_shared_frame_roundtrip():
+    df = make_ohlcv(500, 11, band=0.01)
+    shared = sweep.SharedOHLCV(df)
+    try:
+        view = sweep.frame_from_shared(shared.shm, len(df))
+        pd.testing.assert_frame_equal(view, df, check_names=False, check_freq=False, check_index_type=False)
+        assert not view['close'].to_numpy().flags.writeable
+    finally:
+        shared.close()
+
+def test_sweep_matches_single_process_batch():
+    df = make_ohlcv(500, 11, band=0.01)
+    sets = batch_engine.expand_grid({"fast_period": [3, 5, 8], "slow_period": [13, 21]})
+    expected = batch_engine.run_batch(df, "SmaCrossover", sets)
+
+    seen = {}
+    for chunk, run in sweep.iter_sweep(df, "SmaCrossover", sets, max_workers=2, chunk_size=2):
+        for j, p in enumerate(chunk):
+            seen[(p["fast_period"], p["slow_period"])] = run.final_equity[j]
+
+    assert len(seen) == len(sets)
+    for j, p in enumerate(sets):
+        assert seen[(p["fast_period"], p["slow_period"])] == expected.final_equity[j]
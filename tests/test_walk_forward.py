@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from conftest import make_ohlcv
+from core.execution import batch_engine, walk_forward
+
+def test_make_windows_rolls_by_step():
+    assert walk_forward.make_windows(10, 4, 2) == [(0, 4, 4, 6), (2, 6, 6, 8), (4, 8, 8, 10)]
+    assert walk_forward.make_windows(10, 4, 2, step_bars=3) == [(0, 4, 4, 6), (3, 7, 7, 9)]
+    assert walk_forward.make_windows(5, 4, 2) == []
+
+def test_walk_forward_picks_in_sample_best_and_stitches_oos():
+    df = make_ohlcv(1200, 5)
+    sets = batch_engine.expand_grid({"fast_period": [3, 8], "slow_period": [21, 34]})
+    res = walk_forward.run_walk_forward(df, "SmaCrossover", sets, train_bars=400, test_bars=200,
+                                        objective="total_return", initial_capital=1000.0, max_workers=1)
+
+    assert len(res.windows) == 4
+    assert len(res.oos_equity) == len(res.oos_index) == 4 * 200
+    assert res.oos_index[0] == df.index[400]
+
+    signals = batch_engine.signal_matrix(df, "SmaCrossover", sets)
+    w = res.windows[0]
+    train = batch_engine.simulate_batch(df['close'].to_numpy()[:400], df['high'].to_numpy()[:400],
+                                        df['low'].to_numpy()[:400], signals[:400], initial_capital=1000.0)
+    assert w.best_index == int(np.argmax(train.total_return))
+    assert w.params == sets[w.best_index]
+
+def test_overlapping_test_windows_rejected():
+    with pytest.raises(ValueError):
+        walk_forward.run_walk_forward(make_ohlcv(1200, 5), "SmaCrossover", [{}], train_bars=100, test_bars=50, step_bars=25)
+
+def test_trailing_and_time_stops_reach_train_and_test_runs():
+    from core.execution import array_engine
+    df = make_ohlcv(1200, 5)
+    sets = batch_engine.expand_grid({"fast_period": [3, 8], "slow_period": [21, 34]})
+    risk = {"trail_type": "percent", "trail_value": 0.8, "time_stop": 10}
+    res = walk_forward.run_walk_forward(df, "SmaCrossover", sets, train_bars=400, test_bars=200,
+                                        objective="total_return", initial_capital=1000.0, max_workers=1, **risk)
+    plain = walk_forward.run_walk_forward(df, "SmaCrossover", sets, train_bars=400, test_bars=200,
+                                          objective="total_return", initial_capital=1000.0, max_workers=1)
+    assert not np.allclose(res.oos_equity, plain.oos_equity)
+
+    signals = batch_engine.signal_matrix(df, "SmaCrossover", sets)
+    w = res.windows[0]
+    close, high, low = (df[c].to_numpy() for c in ("close", "high", "low"))
+    train = batch_engine.simulate_batch(close[:400], high[:400], low[:400], signals[:400], initial_capital=1000.0, **risk)
+    assert w.best_index == int(np.argmax(train.total_return))
+    test = array_engine.simulate(close[400:600], high[400:600], low[400:600], signals[400:600, w.best_index],
+                                 initial_capital=1000.0, **risk)
+    np.testing.assert_allclose(res.oos_equity[:200], test.equity, rtol=1e-12)